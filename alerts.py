@@ -0,0 +1,201 @@
+#####################################################################################
+#####################################################################################
+# Price Alerts © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Alert rules evaluated in constant time per close, configured in
+# config.json, e.g.
+#     "alerts": [{"type": "above", "price": 70000},
+#                {"type": "below", "price": 55000},
+#                {"type": "change", "percent": 3, "intervals": 4},
+#                {"type": "zscore", "threshold": 3, "window": 48}]
+# The rules follow the closes like the indicators do (push a new close,
+# amend the newest one) and Alerts.check() returns the messages of the
+# rules that just fired. A rule fires once when its condition starts
+# to hold and again only after it cleared and cooldown seconds passed.
+#####################################################################################
+#####################################################################################
+
+from utime import ticks_ms, ticks_diff
+from indicators import Returns, Series
+
+COOLDOWN = 900          # default seconds between two alerts of a rule
+
+class Rule:
+
+    def __init__ (self, spec):
+        self.cooldown = 1000 * spec.get('cooldown', COOLDOWN)
+        self.holding = False    # condition held at the last check
+        self.fired = None       # ticks_ms of the last alert
+        self.clear()
+
+    def clear (self):
+        self.close = None
+
+    def push (self, x):
+        self.close = x
+
+    def amend (self, x):
+        self.close = x
+
+    def check (self):
+
+        '''
+        Returns the alert message if the rule fires now, else None.
+        '''
+
+        message = self.test() if self.close is not None else None
+        if not message:
+            self.holding = False
+            return None
+        if self.holding:
+            return None
+        self.holding = True
+        now = ticks_ms()
+        if self.fired is not None and ticks_diff(now, self.fired) < self.cooldown:
+            return None
+        self.fired = now
+        return message
+
+class Above(Rule):
+
+    def __init__ (self, spec):
+        self.price = float(spec['price'])
+        super().__init__(spec)
+
+    def test (self):
+        if self.close >= self.price:
+            return f'ABOVE {int(self.price)}'
+
+class Below(Rule):
+
+    def __init__ (self, spec):
+        self.price = float(spec['price'])
+        super().__init__(spec)
+
+    def test (self):
+        if self.close <= self.price:
+            return f'BELOW {int(self.price)}'
+
+class Change(Rule):
+
+    '''
+    Rise or fall of at least percent over the last intervals candles.
+    '''
+
+    def __init__ (self, spec):
+        self.percent = abs(float(spec['percent']))
+        self.intervals = int(spec.get('intervals', 1))
+        if self.intervals < 1:
+            raise ValueError('intervals must be at least 1')
+        self.closes = Series(self.intervals + 1)
+        super().__init__(spec)
+
+    def clear (self):
+        super().clear()
+        self.closes.clear()
+
+    def push (self, x):
+        super().push(x)
+        self.closes.push(x)
+
+    def amend (self, x):
+        super().amend(x)
+        self.closes.amend(x)
+
+    def test (self):
+        if self.closes.count <= self.intervals:
+            return None
+        change = 100 * (self.closes.get(0) / self.closes.get(self.intervals) - 1)
+        if abs(change) >= self.percent:
+            return f'CHG {["+", ""][change < 0]}{round(change, 1)}%'
+
+class ZScore(Rule):
+
+    '''
+    Log return of the open candle at least threshold standard
+    deviations off the mean of the last window closed candles.
+    '''
+
+    def __init__ (self, spec):
+        self.threshold = float(spec.get('threshold', 3))
+        window = int(spec.get('window', 48))
+        # the deviation of a single return is undefined
+        if window < 2:
+            raise ValueError('window must be at least 2')
+        self.returns = Returns(window)
+        super().__init__(spec)
+
+    def clear (self):
+        super().clear()
+        self.returns.clear()
+
+    def push (self, x):
+        super().push(x)
+        self.returns.push(x)
+
+    def amend (self, x):
+        super().amend(x)
+        self.returns.amend(x)
+
+    def test (self):
+        if self.returns.window.count < self.returns.n:
+            return None
+        deviation = self.returns.volatility()
+        if not deviation:
+            return None
+        z = (self.returns.open() - self.returns.mean()) / deviation
+        if abs(z) >= self.threshold:
+            return f'Z {["+", ""][z < 0]}{round(z, 1)}'
+
+KINDS = {'above': Above, 'below': Below, 'change': Change, 'zscore': ZScore}
+
+def rule (spec):
+
+    '''
+    Builds the rule of a config.json entry, raises ValueError if invalid.
+    '''
+
+    try:
+        return KINDS[spec['type']](spec)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f'invalid alert {spec}')
+
+class Alerts:
+
+    '''
+    The configured rules, fed like an indicator of the engine.
+    '''
+
+    def __init__ (self, specs):
+        self.rules = []
+        for spec in specs:
+            try:
+                self.rules.append(rule(spec))
+            except ValueError as e:
+                print('alerts:', e)
+
+    def clear (self):
+        for r in self.rules:
+            r.clear()
+
+    def push (self, x):
+        for r in self.rules:
+            r.push(x)
+
+    def amend (self, x):
+        for r in self.rules:
+            r.amend(x)
+
+    def check (self):
+
+        '''
+        Messages of the rules that fire now.
+        '''
+
+        fired = []
+        for r in self.rules:
+            message = r.check()
+            if message:
+                fired.append(message)
+        return fired
@@ -0,0 +1,469 @@
+#####################################################################################
+#####################################################################################
+# Benchmark Suite © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Micro benchmarks of the hot paths: statistics, rendering, parsing and
+# the portal's request handling. Runs on the device
+#     mpremote cp bench.py : + mpremote exec "import bench; bench.run()"
+# and on the host emulator (see sim/)
+#     python bench.py [--filter chart] [--out sim/bench.json]
+#     python bench.py compare base.json head.json [--threshold 10]
+# Results are stored as JSON with ops/s, µs/op and bytes allocated/op.
+#####################################################################################
+#####################################################################################
+
+import gc, io, json, sys
+
+HOST = sys.implementation.name != 'micropython'
+if HOST:
+    import sim
+    sim.install()
+
+from math import sin
+from utime import ticks_us, ticks_diff
+import fetch, portal, symbols, ticker
+
+# time budget per case and the cap of timed iterations
+BUDGET_US = 500000
+MAX_ITERATIONS = 100000
+# iterations of the allocation pass
+ALLOC_ITERATIONS = 8
+# relative slowdown (%) and growth of allocations flagged as
+# regression by compare(), allocations may also grow by SLACK_BYTES
+THRESHOLD = 10
+SLACK_BYTES = 16
+
+cases = []
+
+def case (name):
+
+    '''
+    Registers a case. The decorated function prepares the inputs and
+    returns the callable which is timed.
+    '''
+
+    def register (setup):
+        cases.append((name, setup))
+        return setup
+    return register
+
+# ---- inputs ----
+def series (n, base=64000.0):
+
+    '''
+    Deterministic price series of n values.
+    '''
+
+    return [base * (1 + .03 * sin(i / 9) + .01 * sin(i * 1.7)) for i in range(n)]
+
+def ohlc_payload (n=ticker.EPOCH, t=1700000000):
+
+    '''
+    OHLC reply in the shape of the kraken API.
+    '''
+
+    rows = []
+    for i, price in enumerate(series(n)):
+        rows.append([t + 900 * i, f'{price:.1f}', f'{price * 1.001:.1f}', f'{price * .999:.1f}', f'{price:.1f}', f'{price:.1f}', '12.34567890', 250])
+    return json.dumps({'error': [], 'result': {'XXBTZUSD': rows, 'last': t + 900 * n}})
+
+def asset_pairs_payload (n=300):
+
+    '''
+    AssetPairs reply of n made up pairs, half of them quoted in USD.
+    '''
+
+    pairs = {}
+    for i in range(n):
+        base, quote = f'C{i:03d}', ('USD', 'EUR')[i % 2]
+        pairs[base + quote] = {'altname': base + quote, 'wsname': f'{base}/{quote}', 'base': base, 'quote': 'Z' + quote,
+                               'pair_decimals': 1, 'lot_decimals': 8, 'fees': [[0, 0.26], [50000, 0.24]]}
+    return json.dumps({'error': [], 'result': pairs}).replace(' ', '').encode()
+
+class Stream:
+
+    '''
+    In-memory stream pair for the portal: replays a request and
+    swallows the response.
+    '''
+
+    def __init__ (self, request):
+        self.request = request
+        self.caret = 0
+        self.sent = 0
+
+    async def readline (self):
+        end = self.request.find(b'\n', self.caret) + 1 or len(self.request)
+        line = self.request[self.caret:end]
+        self.caret = end
+        return line
+
+    async def read (self, n=-1):
+        end = len(self.request) if n < 0 else min(len(self.request), self.caret + n)
+        data = self.request[self.caret:end]
+        self.caret = end
+        return data
+
+    async def readexactly (self, n):
+        return await self.read(n)
+
+    def write (self, data):
+        self.sent += len(data)
+
+    async def drain (self):
+        pass
+
+    def close (self):
+        pass
+
+    async def wait_closed (self):
+        pass
+
+class SlowStream (Stream):
+
+    '''
+    Stream of a client on a slow link: every line takes a pass of the
+    event loop, so the connections of a flood overlap. Keeps the
+    status code of the response.
+    '''
+
+    def __init__ (self, request):
+        super().__init__(request)
+        self.status = None
+
+    async def readline (self):
+        import uasyncio
+        await uasyncio.sleep_ms(0)
+        return await Stream.readline(self)
+
+    def write (self, data):
+        if self.status is None:
+            self.status = int(bytes(data[9:12]))
+        Stream.write(self, data)
+
+def _quiet (*args, **kwargs):
+    pass
+
+def serve (request):
+
+    '''
+    Returns a callable which feeds request through _handle_request.
+    '''
+
+    import uasyncio
+    # the portal logs every request
+    portal.print = _quiet
+    def run ():
+        stream = Stream(request)
+        uasyncio.run(portal._handle_request(stream, stream))
+    return run
+
+# ---- cases ----
+for _window in (16, 64, 128):
+    def _drift (window=_window):
+        history = series(ticker.EPOCH)
+        return lambda: ticker.drift(history, window)
+    def _volatility (window=_window):
+        history = series(ticker.EPOCH)
+        d = ticker.drift(history, window)
+        return lambda: ticker.volatility(history, d, window)
+    case(f'drift/{_window}')(_drift)
+    case(f'volatility/{_window}')(_volatility)
+
+@case('indicators/update')
+def _ ():
+    # a tick amending the open candle, as the ticker does between closes
+    data = series(ticker.EPOCH)
+    engine = ticker.indicators.Engine(ticker.INTERVAL, ticker.EPOCH)
+    engine.seed(data, 0)
+    prices = [data[-1], data[-1] * 1.001]
+    state = [0]
+    def run ():
+        state[0] ^= 1
+        data[-1] = prices[state[0]]
+        engine.update(data, 0)
+    return run
+
+@case('alerts/update')
+def _ ():
+    # one rule of each kind, fed and checked like a tick does
+    data = series(ticker.EPOCH)
+    monitor = ticker.alerts.Alerts([{'type': 'above', 'price': 1e9}, {'type': 'change', 'percent': 50, 'intervals': 4},
+                                    {'type': 'zscore', 'threshold': 50, 'window': 48}])
+    monitor.clear()
+    for x in data:
+        monitor.push(x)
+    prices = [data[-1], data[-1] * 1.001]
+    state = [0]
+    def run ():
+        state[0] ^= 1
+        monitor.amend(prices[state[0]])
+        monitor.check()
+    return run
+
+@case('indicators/seed')
+def _ ():
+    data = series(ticker.EPOCH)
+    engine = ticker.indicators.Engine(ticker.INTERVAL, ticker.EPOCH)
+    return lambda: engine.seed(data, 0)
+
+@case('plot_chart')
+def _ ():
+    data = series(ticker.EPOCH)
+    def run ():
+        ticker.clear()
+        ticker.plot_chart(ticker.canvas, data, 30, 0)
+    return run
+
+for _page in ('price', 'chart', 'statistics'):
+    def _compose (page=_page):
+        # a flip to a page drawn before, against drawing it anew
+        data = series(ticker.EPOCH)
+        ticker.update_pages(data, int(data[-1]))
+        ticker.compose(page, data, int(data[-1]))
+        return lambda: ticker.compose(page, data, int(data[-1]))
+    def _draw (page=_page):
+        data = series(ticker.EPOCH)
+        def run ():
+            ticker.clear()
+            ticker.draw_page(page, data, int(data[-1]))
+        return run
+    case(f'page/{_page}/cached')(_compose)
+    case(f'page/{_page}/drawn')(_draw)
+
+@case('plot_candles')
+def _ ():
+    data = series(ticker.EPOCH)
+    store = ticker.candles.Candles(ticker.EPOCH)
+    for i, c in enumerate(data):
+        o = data[i - 1] if i else c
+        store.push(1700000000 + 900 * i, o, max(o, c) * 1.001, min(o, c) * .999, c, 5.0)
+    def run ():
+        ticker.clear()
+        ticker.plot_candles(ticker.canvas, store)
+    return run
+
+@case('renderPrice')
+def _ ():
+    def run ():
+        ticker.clear()
+        ticker.renderPrice(64231.5, 25, 0)
+    return run
+
+@case('text')
+def _ ():
+    # text() ends with present(), which shows the frame
+    message = 'Should I update to new version v7.2? Press button for "yes" (5s)'
+    def run ():
+        ticker.clear()
+        ticker.text(message)
+    return run
+
+@case('json/ohlc')
+def _ ():
+    payload = ohlc_payload()
+    return lambda: json.loads(payload)
+
+def _deflated (payload):
+    # firmware builds come without a compressor, such cases run on the host
+    try:
+        from zlib import compress
+    except ImportError:
+        return None
+    return compress(payload.encode())
+
+if fetch.ENCODINGS != 'identity' and _deflated('') is not None:
+    @case('json/ohlc/deflate')
+    def _ ():
+        payload = _deflated(ohlc_payload())
+        return lambda: json.load(fetch._inflate(io.BytesIO(payload), 'deflate'))
+
+@case('symbols/scan')
+def _ ():
+    payload = asset_pairs_payload()
+    def run ():
+        stream = io.BytesIO(payload)
+        symbols.scan(stream.read, 'USD')
+    return run
+
+@case('symbols/search')
+def _ ():
+    table = symbols.Table('USD', symbols.scan(io.BytesIO(asset_pairs_payload()).read, 'USD'))
+    return lambda: table.search('C12')
+
+@case('render_template')
+def _ ():
+    def run ():
+        for chunk in portal.render_template('index.html'):
+            pass
+    return run
+
+@case('portal/get')
+def _ ():
+    portal.add_route('/bench', lambda request: portal.render_template('index.html'))
+    return serve(b'GET /bench HTTP/1.1\r\nHost: bitboi.access\r\nConnection: close\r\n\r\n')
+
+@case('portal/post_json')
+def _ ():
+    portal.add_route('/bench/json', lambda request: portal.Response(json.dumps(request.data), headers={'Content-Type': 'application/json'}), ['POST'])
+    body = b'{"ssid": "bench", "wpa2": "0123456789"}'
+    head = 'POST /bench/json HTTP/1.1\r\nContent-Type: application/json\r\nContent-Length: ' + str(len(body)) + '\r\nConnection: close\r\n\r\n'
+    return serve(head.encode() + body)
+
+@case('portal/keepalive_4')
+def _ ():
+    portal.add_route('/bench/ping', lambda request: ('pong', 200, 'text/plain'), ['GET'])
+    request = b'GET /bench/ping HTTP/1.1\r\nHost: bitboi.access\r\n\r\n'
+    return serve(request * 3 + request.replace(b'\r\n\r\n', b'\r\nConnection: close\r\n\r\n'))
+
+@case('portal/flood_50')
+def _ ():
+    # 50 clients at once: MAX_CONNECTIONS are served, the others must
+    # get a 503 right away instead of queueing up
+    import uasyncio
+    portal.print = _quiet
+    portal.add_route('/bench/ping', lambda request: ('pong', 200, 'text/plain'), ['GET'])
+    request = b'GET /bench/ping HTTP/1.1\r\nHost: bitboi.access\r\nConnection: close\r\n\r\n'
+    async def flood ():
+        streams = [SlowStream(request) for _ in range(50)]
+        await uasyncio.gather(*[portal._handle_connection(stream, stream) for stream in streams])
+        statuses = [stream.status for stream in streams]
+        if statuses.count(200) != portal.MAX_CONNECTIONS or statuses.count(503) != 50 - portal.MAX_CONNECTIONS or portal.connection_stats['open']:
+            raise AssertionError(f'flood answered {statuses}')
+    return lambda: uasyncio.run(flood())
+
+@case('portal/not_found')
+def _ ():
+    return serve(b'GET /missing HTTP/1.1\r\nConnection: close\r\n\r\n')
+
+# ---- measurement ----
+def _trace (on):
+    # gc.mem_alloc() is backed by tracemalloc on the host
+    if HOST:
+        import tracemalloc
+        if on:
+            tracemalloc.start()
+        else:
+            tracemalloc.stop()
+
+def allocated (run):
+
+    '''
+    Bytes allocated per call, measured with the collector disabled.
+    '''
+
+    _trace(True)
+    gc.collect()
+    gc.disable()
+    try:
+        start = gc.mem_alloc()
+        for _ in range(ALLOC_ITERATIONS):
+            run()
+        return (gc.mem_alloc() - start) // ALLOC_ITERATIONS
+    finally:
+        gc.enable()
+        _trace(False)
+
+def measure (run):
+
+    '''
+    Times run() for about BUDGET_US, returns the result record.
+    '''
+
+    # warm up, then estimate the iterations fitting into the budget
+    start = ticks_us()
+    run()
+    single = max(1, ticks_diff(ticks_us(), start))
+    iterations = max(1, min(MAX_ITERATIONS, BUDGET_US // single))
+    gc.collect()
+    start = ticks_us()
+    for _ in range(iterations):
+        run()
+    elapsed = max(1, ticks_diff(ticks_us(), start))
+    us = elapsed / iterations
+    return {
+        'iterations': iterations,
+        'us_per_op': round(us, 2),
+        'ops_per_s': round(1000000 / us, 1),
+        'bytes_per_op': allocated(run)
+    }
+
+def run (pattern='', out='bench.json'):
+
+    '''
+    Runs all cases whose name contains pattern, prints a table and
+    stores the results in out.
+    '''
+
+    results = {}
+    print(f'{"case":24}{"ops/s":>12}{"µs/op":>12}{"bytes/op":>10}')
+    for name, setup in cases:
+        if pattern not in name:
+            continue
+        result = measure(setup())
+        results[name] = result
+        print(f'{name:24}{result["ops_per_s"]:>12}{result["us_per_op"]:>12}{result["bytes_per_op"]:>10}')
+    report = {
+        'version': ticker.__version__,
+        'platform': sys.platform,
+        'implementation': sys.implementation.name,
+        'results': results
+    }
+    if out:
+        with open(out, 'w') as f:
+            json.dump(report, f)
+    return report
+
+def compare (base, head, threshold=THRESHOLD):
+
+    '''
+    Compares two reports (dicts or paths), prints the changes and
+    returns the names of the cases which got slower or allocate more
+    than threshold percent.
+    '''
+
+    if isinstance(base, str):
+        with open(base) as f:
+            base = json.load(f)
+    if isinstance(head, str):
+        with open(head) as f:
+            head = json.load(f)
+    regressions = []
+    print(f'{"case":24}{"base µs":>12}{"head µs":>12}{"change":>9}{"bytes":>14}')
+    for name, new in head['results'].items():
+        old = base['results'].get(name)
+        if not old:
+            print(f'{name:24}{"-":>12}{new["us_per_op"]:>12}{"new":>9}')
+            continue
+        change = 100 * (new['us_per_op'] - old['us_per_op']) / old['us_per_op']
+        grown = new['bytes_per_op'] - old['bytes_per_op']
+        flag = ''
+        if change > threshold or grown > max(SLACK_BYTES, old['bytes_per_op'] * threshold / 100):
+            flag = '  REGRESSION'
+            regressions.append(name)
+        elif change < -threshold:
+            flag = '  improved'
+        print(f'{name:24}{old["us_per_op"]:>12}{new["us_per_op"]:>12}{change:>8.1f}%{grown:>+14}{flag}')
+    return regressions
+
+def main (argv):
+    # host only, the device calls run() directly
+    import argparse, os
+    parser = argparse.ArgumentParser(prog='python bench.py', description='Micro benchmarks of the hot paths.')
+    parser.add_argument('--filter', default='', help='run only the cases whose name contains this')
+    parser.add_argument('--out', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sim', 'bench.json'),
+                        help='report to write, defaults to sim/bench.json')
+    commands = parser.add_subparsers(dest='command')
+    command = commands.add_parser('compare', help='compare two reports, fails on regressions')
+    command.add_argument('base')
+    command.add_argument('head')
+    command.add_argument('--threshold', type=float, default=THRESHOLD, help='percent a case may get slower or allocate more')
+    args = parser.parse_args(argv)
+    if args.command == 'compare':
+        return 1 if compare(args.base, args.head, args.threshold) else 0
+    run(args.filter, args.out)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
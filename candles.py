@@ -0,0 +1,95 @@
+#####################################################################################
+#####################################################################################
+# Candle Store © 2024
+# Copyright © 2024 github.com/B0-B
+
+# OHLCV candles as a struct of arrays, without an object per candle:
+#     store = candles.Candles(128)
+#     store.update(start, o, h, l, c, v)  # oldest first, newest amended
+#     store.column(store.closes, 32)      # last 32 closes
+# Every candle costs BYTES: a 4 byte unsigned start time (s) and a
+# 4 byte float for each of open, high, low, close and volume. The
+# arrays are allocated once, a store of size candles holds
+# size * BYTES bytes however long it runs.
+#####################################################################################
+#####################################################################################
+
+from array import array
+
+BYTES = 24
+
+class Candles:
+
+    '''
+    Ring of the last size candles.
+    '''
+
+    def __init__ (self, size):
+        self.size = size
+        self.starts = array('I', [0] * size)
+        self.opens = array('f', [0] * size)
+        self.highs = array('f', [0] * size)
+        self.lows = array('f', [0] * size)
+        self.closes = array('f', [0] * size)
+        self.volumes = array('f', [0] * size)
+        self.head = 0       # index of the next candle
+        self.count = 0
+        self.revision = 0   # counts the writes, e.g. to tell a drawn chart is stale
+
+    def clear (self):
+        self.head = self.count = 0
+        self.revision += 1
+
+    def _write (self, i, start, o, h, l, c, v):
+        self.revision += 1
+        self.starts[i] = start
+        self.opens[i] = o
+        self.highs[i] = h
+        self.lows[i] = l
+        self.closes[i] = c
+        self.volumes[i] = v
+
+    def push (self, start, o, h, l, c, v):
+        self._write(self.head, start, o, h, l, c, v)
+        self.head = (self.head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def amend (self, start, o, h, l, c, v):
+
+        '''
+        Replaces the newest candle.
+        '''
+
+        self._write(self.index(0), start, o, h, l, c, v)
+
+    def update (self, start, o, h, l, c, v):
+
+        '''
+        Amends the newest candle if start is its start, appends it if
+        it is newer and ignores older ones. Returns True if stored.
+        '''
+
+        if self.count and start <= self.starts[self.index(0)]:
+            if start < self.starts[self.index(0)]:
+                return False
+            self.amend(start, o, h, l, c, v)
+        else:
+            self.push(start, o, h, l, c, v)
+        return True
+
+    def index (self, i):
+
+        '''
+        Array index of the candle i steps back, 0 is the newest.
+        '''
+
+        return (self.head - 1 - i) % self.size
+
+    def column (self, values, n=None):
+
+        '''
+        The last n (all if None) entries of one of the arrays, oldest first.
+        '''
+
+        n = self.count if n is None else min(n, self.count)
+        return [values[(self.head - n + i) % self.size] for i in range(n)]
@@ -0,0 +1,211 @@
+#####################################################################################
+#####################################################################################
+# Config Store © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Keeps config.json in memory:
+# - the file is parsed once, reads are served from memory
+# - writes are validated and collected until flush()
+# - flush() writes a temporary file and renames it over config.json
+#####################################################################################
+#####################################################################################
+
+import json, os
+
+PATH = 'config.json'
+TEMP_PATH = PATH + '.tmp'
+
+# ---- validation ----
+def _text (value):
+    if not isinstance(value, str):
+        raise ValueError('expected a string')
+    return value
+
+def _positive_int (value):
+    value = int(value)
+    if value <= 0:
+        raise ValueError('expected a positive integer')
+    return value
+
+def _flag (value):
+    if not isinstance(value, bool):
+        raise ValueError('expected true or false')
+    return value
+
+def _url (value):
+    value = _text(value)
+    if not value.startswith(('http://', 'https://')):
+        raise ValueError('expected an http(s) url')
+    return value
+
+def _ws_url (value):
+    value = _text(value)
+    if not value.startswith(('ws://', 'wss://')):
+        raise ValueError('expected a ws(s) url')
+    return value
+
+def _chart (value):
+    if value not in ('line', 'candles', 'bars'):
+        raise ValueError('expected line, candles or bars')
+    return value
+
+def _alerts (value):
+    # the rules themselves are checked by alerts.rule()
+    if not isinstance(value, list) or not all(isinstance(spec, dict) and isinstance(spec.get('type'), str) for spec in value):
+        raise ValueError('expected a list of alert rules')
+    return value
+
+def _timeframes (value):
+    if not isinstance(value, list):
+        raise ValueError('expected a list of intervals')
+    return [_interval(minutes) for minutes in value]
+
+def _interval (value):
+    value = int(value)
+    # candle intervals offered by the kraken OHLC endpoint (minutes)
+    if value not in (1, 5, 15, 30, 60, 240, 1440, 10080, 21600):
+        raise ValueError(f'unsupported interval {value}')
+    return value
+
+# validators for every known key, unknown keys found in
+# config.json are kept but can't be written
+SCHEMA = {
+    'ssid': _text,
+    'wpa2': _text,
+    'interval': _interval,
+    'trend_intervals': _positive_int,
+    'reference': _text,
+    'coin': _text,
+    'diagnostics': _flag,
+    'kraken_url': _url,
+    'repository': _url,
+    'stream': _flag,
+    'stream_url': _ws_url,
+    'chart_overlay': _flag,
+    'chart': _chart,
+    'alerts': _alerts,
+    'timeframes': _timeframes,
+    'poll_min': _positive_int,
+    'poll_max': _positive_int
+}
+
+# values assumed for keys missing in config.json
+DEFAULTS = {
+    'ssid': '',
+    'wpa2': '',
+    'interval': 15,
+    'trend_intervals': 12,
+    'reference': 'USD',
+    'coin': 'bitcoin',
+    'diagnostics': False,
+    # endpoints, e.g. pointed at a local stand-in (sim/standin.py)
+    'kraken_url': 'https://api.kraken.com',
+    'repository': 'https://raw.githubusercontent.com/B0-B/bitboi/main/',
+    # push prices over kraken's websocket feed, REST only backfills
+    'stream': False,
+    'stream_url': 'wss://ws.kraken.com',
+    # EMA and bollinger bands over the chart
+    'chart_overlay': False,
+    # line, candles (with volume) or bars
+    'chart': 'line',
+    # price alert rules, see alerts.py
+    'alerts': [],
+    # chart pages of longer intervals (minutes) resampled from 'interval'
+    'timeframes': [],
+    # bounds (s) of the delay between two price polls, see schedule.py
+    'poll_min': 10,
+    'poll_max': 120
+}
+
+_values = None
+_dirty = False
+
+# ---- access ----
+def _read (path):
+    with open(path) as f:
+        return json.load(f)
+
+def load ():
+
+    '''
+    Parses config.json once and returns the in-memory config.
+    Falls back to a temporary file left behind by an interrupted
+    flush, and to the defaults if neither can be read. Values that
+    fail their validator are replaced by their defaults.
+    '''
+
+    global _values
+    if _values is not None:
+        return _values
+    values = dict(DEFAULTS)
+    for path in (PATH, TEMP_PATH):
+        try:
+            loaded = _read(path)
+            if not isinstance(loaded, dict):
+                raise ValueError('expected an object')
+            break
+        except (OSError, ValueError):
+            loaded = {}
+    for key, value in loaded.items():
+        try:
+            values[key] = validate(key, value) if key in SCHEMA else value
+        except (TypeError, ValueError) as e:
+            print(f'config: invalid {key} ({e}), using {repr(DEFAULTS[key])}')
+    _values = values
+    return _values
+
+def get (key, default=None):
+    return load().get(key, default)
+
+def validate (key, value):
+
+    '''
+    Returns the normalized value or raises ValueError.
+    '''
+
+    if key not in SCHEMA:
+        raise ValueError(f'unknown config key {key}')
+    return SCHEMA[key](value)
+
+def update (**changes):
+
+    '''
+    Validates all changes first and applies them only if all of them
+    are valid. The changes stay in memory until flush() is called,
+    so several updates are persisted with a single write.
+    '''
+
+    global _dirty
+    validated = {}
+    for key, value in changes.items():
+        validated[key] = validate(key, value)
+    values = load()
+    for key, value in validated.items():
+        if values.get(key) != value:
+            values[key] = value
+            _dirty = True
+
+def assign (key, value):
+    update(**{key: value})
+
+def flush ():
+
+    '''
+    Persists pending changes. The config is written to a temporary
+    file first which then replaces config.json, so an interrupted
+    write never leaves a truncated config behind.
+    '''
+
+    global _dirty
+    if not _dirty:
+        return False
+    with open(TEMP_PATH, 'w') as f:
+        json.dump(_values, f)
+    try:
+        os.rename(TEMP_PATH, PATH)
+    except OSError:
+        # FAT refuses to rename onto an existing file
+        os.remove(PATH)
+        os.rename(TEMP_PATH, PATH)
+    _dirty = False
+    return True
@@ -0,0 +1,316 @@
+#####################################################################################
+#####################################################################################
+# Fetch Guard © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Per-endpoint circuit breakers with jittered exponential backoff:
+#     with fetch.guard('ohlc'):
+#         with fetch.Download('ohlc', url) as body:
+#             pkg = fetch.kraken(body.json())
+# A failed request delays the next one of its endpoint by a growing,
+# randomized backoff, until then the guard raises Unavailable right
+# away without touching the network. THRESHOLD failures in a row
+# open the circuit, the first request after the backoff is a probe
+# and a success closes it again. Kraken's "EAPI:Rate limit" replies
+# back off for at least RATE_LIMIT_MS.
+# Downloads ask for gzip or deflate and inflate the reply while it's
+# parsed, through a window of 2^WINDOW_BITS bytes, so neither the
+# compressed nor the inflated body is held as a whole. The window is
+# reserved at import and handed over to each inflater, a download
+# without room for it asks for the uncompressed reply.
+#####################################################################################
+#####################################################################################
+
+import json
+import urequests as requests
+from os import urandom
+from utime import ticks_add, ticks_diff, ticks_ms
+
+BACKOFF_MS = 2000           # delay after the first failure, doubled per failure
+MAX_BACKOFF_MS = 300000
+RATE_LIMIT_MS = 15000       # least delay after a rate limit reply
+THRESHOLD = 3               # failures in a row which open the circuit
+WINDOW_BITS = 15            # inflate window, as large as servers compress with
+
+# states
+CLOSED = 'closed'
+BACKOFF = 'backoff'         # failed, fewer than THRESHOLD times
+OPEN = 'open'
+HALF_OPEN = 'half-open'     # open, the next request is a probe
+
+# ---- compressed replies ----
+try:
+    # firmware >= 1.21
+    from deflate import DeflateIO, GZIP, ZLIB
+    def _inflate (stream, encoding):
+        return DeflateIO(stream, GZIP if encoding == 'gzip' else ZLIB, WINDOW_BITS)
+except ImportError:
+    try:
+        from zlib import DecompIO
+        def _inflate (stream, encoding):
+            return DecompIO(stream, WINDOW_BITS + (16 if encoding == 'gzip' else 0))
+    except ImportError:
+        # replies are requested uncompressed
+        _inflate = None
+
+ENCODINGS = 'gzip, deflate' if _inflate else 'identity'
+
+# block kept for the window of the next inflater, so a fragmented
+# heap can't refuse it mid-parse, None while handed over
+_window = None
+
+def _reserve ():
+
+    '''
+    Reserves the window anew if it was handed over, returns True if
+    it's reserved.
+    '''
+
+    global _window
+    if _inflate and _window is None:
+        try:
+            _window = bytearray(1 << WINDOW_BITS)
+        except MemoryError:
+            pass
+    return _window is not None
+
+_reserve()
+
+class Unavailable(OSError):
+    pass
+
+class ServerError(OSError):
+    pass
+
+class RateLimited(ServerError):
+    pass
+
+class Breaker:
+
+    '''
+    Context manager around the requests of one endpoint. Only network
+    and API errors (OSError, ValueError) count as failures, anything
+    else, e.g. a MemoryError, passes through unrecorded.
+    '''
+
+    def __init__ (self, name):
+        self.name = name
+        self.failures = 0
+        self.rate_limited = False
+        self.retry = 0          # ticks_ms from which requests are allowed
+        self.requests = 0
+        self.refused = 0        # requests held back by the guard
+
+    def wait_ms (self):
+
+        '''
+        Milliseconds until a request is allowed, 0 if it is now.
+        '''
+
+        if not self.failures:
+            return 0
+        return max(0, ticks_diff(self.retry, ticks_ms()))
+
+    def state (self):
+        if not self.failures:
+            return CLOSED
+        if self.failures < THRESHOLD:
+            return BACKOFF
+        return OPEN if self.wait_ms() else HALF_OPEN
+
+    def success (self):
+        self.failures = 0
+        self.rate_limited = False
+
+    def failure (self, rate_limited=False):
+        self.failures += 1
+        self.rate_limited = rate_limited
+        delay = min(MAX_BACKOFF_MS, BACKOFF_MS << min(self.failures - 1, 16))
+        # equal jitter: half fixed, half random, so devices don't sync up
+        delay = delay // 2 + delay * urandom(1)[0] // 512
+        if rate_limited:
+            delay = max(delay, RATE_LIMIT_MS)
+        self.retry = ticks_add(ticks_ms(), delay)
+
+    def __enter__ (self):
+        wait = self.wait_ms()
+        if wait:
+            self.refused += 1
+            raise Unavailable(f'{self.name} backs off for {wait // 1000} s ({self.state()})')
+        self.requests += 1
+        return self
+
+    def __exit__ (self, kind, value, traceback):
+        if kind is None:
+            self.success()
+        elif issubclass(kind, (OSError, ValueError)):
+            self.failure(issubclass(kind, RateLimited))
+
+_breakers = {}
+
+def guard (name):
+
+    '''
+    Returns the breaker registered under name, created on first use.
+    '''
+
+    b = _breakers.get(name)
+    if b is None:
+        b = _breakers[name] = Breaker(name)
+    return b
+
+def breakers ():
+    return list(_breakers.values())
+
+def outage (*names):
+
+    '''
+    True while any of the named endpoints, or any at all, fails.
+    '''
+
+    for b in _breakers.values():
+        if b.failures and (not names or b.name in names):
+            return True
+    return False
+
+def wait_ms (*names):
+
+    '''
+    Milliseconds until all of the named endpoints allow requests.
+    '''
+
+    return max([guard(name).wait_ms() for name in names] + [0])
+
+def ok (response):
+
+    '''
+    Returns response, raises ServerError for a server error status
+    and RateLimited for 429.
+    '''
+
+    status = response.status_code
+    if status == 429 or status >= 500:
+        response.close()
+        if status == 429:
+            raise RateLimited(f'HTTP {status}')
+        raise ServerError(f'HTTP {status}')
+    return response
+
+def kraken (pkg):
+
+    '''
+    Returns the result of a kraken reply, raises RateLimited or
+    ValueError for its errors.
+    '''
+
+    errors = pkg['error']
+    if errors:
+        for error in errors:
+            if error.startswith('EAPI:Rate limit'):
+                raise RateLimited(error)
+        raise ValueError(errors[0])
+    return pkg['result']
+
+def _header (headers, name):
+    # servers differ in the case of header names
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+class Download:
+
+    '''
+    GET request of url whose reply body is read through this object,
+    inflated on the fly if the server compressed it. Raises like ok().
+    On close it reports the bytes received and how long the reply
+    took to arrive and to be read and parsed.
+    '''
+
+    def __init__ (self, name, url, **kw):
+        global _window
+        self.name = name
+        self.url = url
+        self.kw = kw
+        self.fresh = True       # nothing was read, the request can be redone
+        self._get(ENCODINGS if _reserve() else 'identity')
+        if self.encoding in ('gzip', 'deflate'):
+            # the reserved block is freed for the inflater's window,
+            # which firmware >= 1.21 allocates on the first read
+            _window = None
+            try:
+                self.stream = _inflate(self.stream, self.encoding)
+            except MemoryError:
+                self._identity()
+        self.start = ticks_ms()
+
+    def _get (self, encodings):
+        start = ticks_ms()
+        self.response = ok(requests.get(self.url, headers={'Accept-Encoding': encodings}, **self.kw))
+        self.reply_ms = ticks_diff(ticks_ms(), start)
+        self.status = self.response.status_code
+        headers = self.response.headers
+        self.size = int(_header(headers, 'content-length') or -1)
+        self.encoding = _header(headers, 'content-encoding') or 'identity'
+        self.stream = self.response.raw
+
+    def _identity (self):
+        # the inflater found no room for its window, the reply is
+        # requested again uncompressed
+        self.response.close()
+        self._get('identity')
+        if self.encoding != 'identity':
+            raise MemoryError(f'{self.name}: no room to inflate')
+
+    def _retry (self):
+        # True if a MemoryError can be met by an uncompressed reply
+        if self.fresh and self.encoding != 'identity':
+            self._identity()
+            return True
+        return False
+
+    def read (self, n=-1):
+        try:
+            data = self.stream.read() if n < 0 else self.stream.read(n)
+        except MemoryError:
+            if not self._retry():
+                raise
+            data = self.stream.read() if n < 0 else self.stream.read(n)
+        self.fresh = False
+        return data
+
+    def readinto (self, buffer):
+        try:
+            n = self.stream.readinto(buffer)
+        except MemoryError:
+            if not self._retry():
+                raise
+            n = self.stream.readinto(buffer)
+        self.fresh = False
+        return n
+
+    def json (self):
+
+        '''
+        Parses the body while it arrives.
+        '''
+
+        try:
+            return json.load(self.stream)
+        except MemoryError:
+            # the body is parsed anew, so a started parse doesn't matter
+            self.fresh = True
+            if not self._retry():
+                raise
+            return json.load(self.stream)
+
+    def close (self):
+        self.response.close()
+        size = f'{self.size} B' if self.size >= 0 else 'unknown size'
+        print(f'{self.name}: {size} {self.encoding}, reply {self.reply_ms} ms, parse {ticks_diff(ticks_ms(), self.start)} ms')
+
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, *exc):
+        self.close()
@@ -0,0 +1,375 @@
+#####################################################################################
+#####################################################################################
+# Indicator Engine © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Technical indicators with constant time updates per close:
+#     engine = indicators.Engine(15, 128)
+#     engine.update(closed, end)  # end time (s) of the newest candle
+#     engine.rsi.value, engine.bands.upper, engine.macd.histogram
+# The newest candle is still open, its close changes until the next
+# candle starts, so every indicator can push a new close or amend
+# the newest one. The engine tells both apart by the candle end time
+# and seeds itself from the whole series only when the two don't
+# line up, e.g. after a reconnect or a coin switch.
+#####################################################################################
+#####################################################################################
+
+from array import array
+from math import log, sqrt
+
+class Series:
+
+    '''
+    Ring of the last size values, without allocating per value.
+    '''
+
+    def __init__ (self, size):
+        self.size = size
+        self.data = array('f', [0] * size)
+        self.head = 0       # index of the next value
+        self.count = 0
+
+    def clear (self):
+        self.head = self.count = 0
+
+    def push (self, x):
+        self.data[self.head] = x
+        self.head = (self.head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def amend (self, x):
+        self.data[(self.head - 1) % self.size] = x
+
+    def get (self, i):
+
+        '''
+        Value i steps back, 0 is the newest.
+        '''
+
+        return self.data[(self.head - 1 - i) % self.size]
+
+    def values (self):
+
+        '''
+        The values in order, oldest first.
+        '''
+
+        return [self.data[(self.head - self.count + i) % self.size] for i in range(self.count)]
+
+class EMA:
+
+    '''
+    Exponential moving average over n closes, starting at the first.
+    '''
+
+    def __init__ (self, n):
+        self.n = n
+        self.alpha = 2 / (n + 1)
+        self.clear()
+
+    def clear (self):
+        self.value = None
+        self.previous = None    # value before the newest close
+
+    def push (self, x):
+        self.previous = self.value
+        self.amend(x)
+
+    def amend (self, x):
+        if self.previous is None:
+            self.value = x
+        else:
+            self.value = self.previous + self.alpha * (x - self.previous)
+
+class RSI:
+
+    '''
+    Relative strength index with Wilder's smoothing over n changes,
+    seeded with the plain mean of the first n.
+    '''
+
+    def __init__ (self, n=14):
+        self.n = n
+        self.clear()
+
+    def clear (self):
+        self.value = None
+        self.count = 0          # changes seen
+        self.close = None       # newest close
+        self.gain = self.loss = 0.0
+        # state before the newest close
+        self.state = (0, None, 0.0, 0.0)
+
+    def push (self, x):
+        self.state = (self.count, self.close, self.gain, self.loss)
+        self.amend(x)
+
+    def amend (self, x):
+        count, close, gain, loss = self.state
+        self.close = x
+        if close is None:
+            return
+        change = x - close
+        up, down = max(change, 0), max(-change, 0)
+        count += 1
+        n = min(count, self.n)
+        self.gain = gain + (up - gain) / n
+        self.loss = loss + (down - loss) / n
+        self.count = count
+        if count >= self.n:
+            self.value = 100.0 if not self.loss else 100 - 100 / (1 + self.gain / self.loss)
+
+class Bollinger:
+
+    '''
+    Bands k standard deviations around the mean of the last n closes.
+    Sums are kept relative to a reference close so single precision
+    floats don't cancel out, and are summed anew every n pushes so
+    rounding errors can't build up.
+    '''
+
+    def __init__ (self, n=20, k=2):
+        self.n = n
+        self.k = k
+        self.window = Series(n)
+        self.clear()
+
+    def clear (self):
+        self.window.clear()
+        self.reference = None
+        self.sum = self.squares = 0.0
+        self.pushes = 0
+        self.mean = self.upper = self.lower = None
+
+    def _add (self, x, sign):
+        x -= self.reference
+        self.sum += sign * x
+        self.squares += sign * x * x
+
+    def _resum (self):
+        self.sum = self.squares = 0.0
+        for i in range(self.window.count):
+            self._add(self.window.get(i), 1)
+
+    def push (self, x):
+        if self.reference is None:
+            self.reference = x
+        if self.window.count == self.n:
+            self._add(self.window.get(self.n - 1), -1)
+        self.window.push(x)
+        self._add(x, 1)
+        self.pushes += 1
+        if self.pushes % self.n == 0:
+            self._resum()
+        self._bands()
+
+    def amend (self, x):
+        self._add(self.window.get(0), -1)
+        self.window.amend(x)
+        self._add(x, 1)
+        self._bands()
+
+    def _bands (self):
+        count = self.window.count
+        mean = self.sum / count
+        deviation = sqrt(max(0, self.squares / count - mean * mean))
+        self.mean = self.reference + mean
+        self.upper = self.mean + self.k * deviation
+        self.lower = self.mean - self.k * deviation
+
+    def position (self, x):
+
+        '''
+        Where x lies in the bands, 0 at the lower and 1 at the upper.
+        '''
+
+        width = self.upper - self.lower
+        return .5 if not width else (x - self.lower) / width
+
+class Returns:
+
+    '''
+    Log returns of the last n closed candles with their rolling mean
+    and standard deviation. The sums are summed anew every n pushes
+    so rounding errors can't build up.
+    '''
+
+    def __init__ (self, n):
+        self.n = n
+        self.window = Series(n)
+        self.clear()
+
+    def clear (self):
+        self.window.clear()
+        self.base = None        # close of the last closed candle
+        self.close = None
+        self.sum = self.squares = 0.0
+        self.pushes = 0
+
+    def push (self, x):
+        if self.base and self.close:
+            r = log(self.close / self.base)
+            if self.window.count == self.n:
+                old = self.window.get(self.n - 1)
+                self.sum -= old
+                self.squares -= old * old
+            self.window.push(r)
+            self.sum += r
+            self.squares += r * r
+            self.pushes += 1
+            if self.pushes % self.n == 0:
+                self.sum = self.squares = 0.0
+                for i in range(self.window.count):
+                    r = self.window.get(i)
+                    self.sum += r
+                    self.squares += r * r
+        self.base = self.close
+        self.close = x
+
+    def amend (self, x):
+        self.close = x
+
+    def mean (self):
+        return self.sum / self.window.count if self.window.count else None
+
+    def volatility (self):
+
+        '''
+        Standard deviation of the returns, None while fewer than two
+        are known.
+        '''
+
+        n = self.window.count
+        if n < 2:
+            return None
+        mean = self.sum / n
+        return sqrt(max(0, (self.squares - n * mean * mean) / (n - 1)))
+
+    def open (self):
+
+        '''
+        Log return of the open candle, None while unknown.
+        '''
+
+        if self.base and self.close:
+            return log(self.close / self.base)
+        return None
+
+class MACD:
+
+    '''
+    Moving average convergence divergence of a fast and a slow EMA,
+    with an EMA of it as signal line.
+    '''
+
+    def __init__ (self, fast=12, slow=26, signal=9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+        self.clear()
+
+    def clear (self):
+        self.fast.clear()
+        self.slow.clear()
+        self.signal.clear()
+        self.value = self.histogram = None
+
+    def push (self, x):
+        self.fast.push(x)
+        self.slow.push(x)
+        self.value = self.fast.value - self.slow.value
+        self.signal.push(self.value)
+        self.histogram = self.value - self.signal.value
+
+    def amend (self, x):
+        self.fast.amend(x)
+        self.slow.amend(x)
+        self.value = self.fast.value - self.slow.value
+        self.signal.amend(self.value)
+        self.histogram = self.value - self.signal.value
+
+class Engine:
+
+    '''
+    Indicators over the closes of candles of interval minutes, with
+    the last size values of the EMA and bands kept for chart overlays.
+    '''
+
+    def __init__ (self, interval, size, ema=20, rsi=14, bands=(20, 2), macd=(12, 26, 9)):
+        self.step = interval * 60
+        self.end = 0            # end time (s) of the newest candle
+        self.close = None       # newest close
+        self.ema = EMA(ema)
+        self.rsi = RSI(rsi)
+        self.bands = Bollinger(*bands)
+        self.macd = MACD(*macd)
+        self.indicators = (self.ema, self.rsi, self.bands, self.macd)
+        # overlay histories
+        self.averages = Series(size)
+        self.uppers = Series(size)
+        self.lowers = Series(size)
+        self.histories = (self.averages, self.uppers, self.lowers)
+
+    def follow (self, indicator):
+
+        '''
+        Feeds another object with clear(), push(x) and amend(x) the
+        same closes, e.g. the alert rules.
+        '''
+
+        self.indicators += (indicator,)
+
+    def push (self, x):
+        for indicator in self.indicators:
+            indicator.push(x)
+        self.averages.push(self.ema.value)
+        self.uppers.push(self.bands.upper)
+        self.lowers.push(self.bands.lower)
+        self.close = x
+
+    def amend (self, x):
+        for indicator in self.indicators:
+            indicator.amend(x)
+        self.averages.amend(self.ema.value)
+        self.uppers.amend(self.bands.upper)
+        self.lowers.amend(self.bands.lower)
+        self.close = x
+
+    def seed (self, closed, end):
+
+        '''
+        Starts over from the series, once per backfill.
+        '''
+
+        for indicator in self.indicators + self.histories:
+            indicator.clear()
+        for x in closed:
+            self.push(x)
+        self.end = end
+
+    def update (self, closed, end):
+
+        '''
+        Follows closed, whose newest candle ends at end. Costs constant
+        time while candles only advance one at a time.
+        Returns True if the values changed.
+        '''
+
+        if not closed:
+            return False
+        if end == self.end:
+            if closed[-1] == self.close:
+                return False
+            self.amend(closed[-1])
+        elif self.end and end == self.end + self.step and len(closed) > 1:
+            # the previous candle closed, a new one opened
+            self.amend(closed[-2])
+            self.push(closed[-1])
+            self.end = end
+        else:
+            self.seed(closed, end)
+        return True
+
+    def ready (self):
+        return self.rsi.value is not None and self.bands.window.count == self.bands.n
@@ -0,0 +1,136 @@
+#####################################################################################
+#####################################################################################
+# Input Service © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Samples the BOOTSEL button on a timer and queues debounced events:
+#     inputs.start(bootsel_is_pressed)
+#     event = inputs.wait(5000) # PRESS, LONG_PRESS or NONE after 5 s
+# The sampling runs in the timer callback, waiting sleeps between
+# polls, so prompts no longer spin the CPU.
+#####################################################################################
+#####################################################################################
+
+from machine import Timer
+from utime import sleep_ms, ticks_ms, ticks_diff
+
+NONE = 0
+PRESS = 1           # released before LONG_PRESS_MS
+LONG_PRESS = 2      # held for LONG_PRESS_MS, emitted while still held
+
+PERIOD_MS = 20      # sampling period
+DEBOUNCE = 3        # equal samples in a row to accept a new level
+LONG_PRESS_MS = 800
+QUEUE_SIZE = 8
+
+# event queue, a ring of event codes written by the timer callback
+_queue = bytearray(QUEUE_SIZE)
+_head = 0
+_tail = 0
+dropped = 0
+
+# debouncer state
+_read = None
+_timer = None
+_level = False      # debounced level
+_streak = 0         # samples differing from the debounced level
+_since = 0          # ticks_ms of the last accepted press
+_held = False       # long press already emitted for this press
+
+def _push (event):
+    global _head, dropped
+    following = (_head + 1) % QUEUE_SIZE
+    if following == _tail:
+        dropped += 1
+        return
+    _queue[_head] = event
+    _head = following
+
+def _sample (timer):
+
+    '''
+    Timer callback, must not allocate.
+    '''
+
+    global _level, _streak, _since, _held
+    if _read() != _level:
+        _streak += 1
+        if _streak < DEBOUNCE:
+            return
+        _streak = 0
+        _level = not _level
+        if _level:
+            _since = ticks_ms()
+            _held = False
+        elif not _held:
+            _push(PRESS)
+        return
+    _streak = 0
+    if _level and not _held and ticks_diff(ticks_ms(), _since) >= LONG_PRESS_MS:
+        _held = True
+        _push(LONG_PRESS)
+
+def start (read, period=PERIOD_MS):
+
+    '''
+    Starts sampling read(), which returns True while the button is
+    pressed. A press held during start is ignored.
+    '''
+
+    global _read, _timer, _level, _held, _streak
+    stop()
+    _read = read
+    _level = _held = bool(read())
+    _streak = 0
+    clear()
+    _timer = Timer(period=period, mode=Timer.PERIODIC, callback=_sample)
+
+def stop ():
+    global _timer
+    if _timer:
+        _timer.deinit()
+        _timer = None
+
+def poll ():
+
+    '''
+    Pops the oldest event, NONE if there is none.
+    '''
+
+    global _tail
+    if _tail == _head:
+        return NONE
+    event = _queue[_tail]
+    _tail = (_tail + 1) % QUEUE_SIZE
+    return event
+
+def wait (timeout_ms):
+
+    '''
+    Returns the next event or NONE once timeout_ms passed,
+    sleeping between the polls.
+    '''
+
+    start = ticks_ms()
+    while True:
+        event = poll()
+        if event or ticks_diff(ticks_ms(), start) >= timeout_ms:
+            return event
+        sleep_ms(PERIOD_MS)
+
+def clear ():
+
+    '''
+    Drops queued events, e.g. presses made before a prompt showed.
+    '''
+
+    global _tail
+    _tail = _head
+
+def pressed ():
+
+    '''
+    Debounced button level.
+    '''
+
+    return _level
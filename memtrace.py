@@ -0,0 +1,203 @@
+#####################################################################################
+#####################################################################################
+# Heap Telemetry © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Samples the heap around the profiling spans of the tick loop:
+#     perf.observer = memtrace
+# records the allocation delta of every span and detected collections,
+# keeps a ring buffer trace which is written to flash before the
+# watchdog resets and printed again on the next boot.
+#####################################################################################
+#####################################################################################
+
+import gc, os, _thread
+from array import array
+from utime import ticks_ms
+
+PATH = 'memtrace.bin'
+CAPACITY = 64 # records in the ring buffer
+DEPTH = 8 # maximal nesting of spans
+
+# ring record: stage index, time (ms), free, allocated, delta, largest block
+FIELDS = 6
+_ring = array('i', [0] * (CAPACITY * FIELDS))
+_head = 0
+_count = 0
+
+# per stage: samples, last delta, max delta, summed delta, collections
+_names = []
+_stats = []
+_index = {}
+
+# heap allocation at span entry, one slot per nesting level
+_stack = array('i', [0] * DEPTH)
+_depth = 0
+
+# only the thread that installed the observer is traced, the
+# render thread on the other core allocates independently
+_owner = _thread.get_ident()
+
+def _stage (name):
+    index = _index.get(name)
+    if index is None:
+        index = _index[name] = len(_names)
+        _names.append(name)
+        _stats.append(array('i', [0] * 5))
+    return index
+
+def _record (index, delta, largest):
+    global _head, _count
+    base = _head * FIELDS
+    _ring[base] = index
+    _ring[base + 1] = ticks_ms()
+    _ring[base + 2] = gc.mem_free()
+    _ring[base + 3] = gc.mem_alloc()
+    _ring[base + 4] = delta
+    _ring[base + 5] = largest
+    _head = (_head + 1) % CAPACITY
+    if _count < CAPACITY:
+        _count += 1
+
+# ---- span observer ----
+def enter (name):
+    global _depth
+    if _thread.get_ident() != _owner or _depth >= DEPTH:
+        return
+    _stack[_depth] = gc.mem_alloc()
+    _depth += 1
+
+def exit (name):
+
+    '''
+    Records the allocation delta of the span. The heap only shrinks
+    when a collection ran, so a negative delta counts as collection
+    and the delta itself is unknown then (recorded as -1).
+    '''
+
+    global _depth
+    if _thread.get_ident() != _owner or _depth == 0:
+        return
+    _depth -= 1
+    delta = gc.mem_alloc() - _stack[_depth]
+    index = _stage(name)
+    stats = _stats[index]
+    stats[0] += 1
+    if delta < 0:
+        stats[4] += 1
+        delta = -1
+    else:
+        stats[2] = max(stats[2], delta)
+        stats[3] += delta
+    stats[1] = delta
+    _record(index, delta, -1)
+
+# ---- sampling ----
+def largest_block ():
+
+    '''
+    Returns the largest block which can be allocated right now, found
+    by binary search with probe allocations. Freed probes are only
+    reclaimed by a collection, so every probe is preceded by one -
+    this takes a few tens of ms, only sample it between stages.
+    '''
+
+    enabled = gc.isenabled()
+    low, high = 0, gc.mem_free()
+    while low < high:
+        middle = (low + high + 1) // 2
+        gc.collect()
+        # a failing probe must not trigger a collection by itself
+        gc.disable()
+        try:
+            probe = bytearray(middle)
+            probe = None
+            low = middle
+        except MemoryError:
+            high = middle - 1
+        if enabled:
+            gc.enable()
+    return low
+
+def sample (name, largest=False):
+
+    '''
+    Records the current heap state, including the largest block
+    (and so the fragmentation) if requested.
+    '''
+
+    _record(_stage(name), 0, largest_block() if largest else -1)
+
+def steady (name):
+
+    '''
+    True if the stage allocated nothing in its last sample.
+    '''
+
+    index = _index.get(name)
+    return index is not None and _stats[index][0] > 0 and _stats[index][1] == 0
+
+def report ():
+
+    '''
+    Prints allocation statistics per stage and the heap state to serial.
+    '''
+
+    print(f'{"stage":<10}{"n":>6}{"last":>8}{"max":>8}{"mean":>8}{"gc":>5}')
+    for index, name in enumerate(_names):
+        count, last, most, total, collections = _stats[index]
+        measured = count - collections
+        mean = total // measured if measured else 0
+        print(f'{name:<10}{count:>6}{last:>8}{most:>8}{mean:>8}{collections:>5}')
+    print(f'heap free {gc.mem_free()} allocated {gc.mem_alloc()}')
+
+# ---- persistence ----
+def _records (ring, head, count, names):
+    result = []
+    start = (head - count) % CAPACITY
+    for i in range(count):
+        base = ((start + i) % CAPACITY) * FIELDS
+        name = names[ring[base]] if ring[base] < len(names) else '?'
+        result.append((name,) + tuple(ring[base + 1:base + FIELDS]))
+    return result
+
+def records ():
+
+    '''
+    Returns the ring buffer records, oldest first, as tuples
+    (stage, ms, free, allocated, delta, largest block).
+    '''
+
+    return _records(_ring, _head, _count, _names)
+
+def snapshot ():
+
+    '''
+    Writes the trace to flash, call it before resetting the device.
+    '''
+
+    with open(PATH, 'wb') as f:
+        f.write(f'{_head} {_count} {",".join(_names)}\n'.encode())
+        f.write(_ring)
+
+def restore ():
+
+    '''
+    Prints the trace of the previous run if a snapshot exists and
+    removes it, so it's printed once.
+    '''
+
+    try:
+        with open(PATH, 'rb') as f:
+            header = f.readline().decode().split()
+            ring = array('i', [0] * (CAPACITY * FIELDS))
+            f.readinto(ring)
+    except OSError:
+        return False
+    names = header[2].split(',') if len(header) > 2 else []
+    previous = _records(ring, int(header[0]), int(header[1]), names)
+    print(f'memtrace of previous run ({len(previous)} records):')
+    for record in previous:
+        print('  ', record)
+    os.remove(PATH)
+    return True
@@ -0,0 +1,122 @@
+#####################################################################################
+#####################################################################################
+# Profiling Spans © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Named timing spans with fixed-bucket histograms:
+#     with perf.span('history'):
+#         closed = krakenApi.history(...)
+# or  plot = perf.wrap('chart', plot_chart)
+# Recording a duration never allocates once a span exists.
+#####################################################################################
+#####################################################################################
+
+from array import array
+from utime import ticks_us, ticks_diff
+
+# optional observer notified with enter(name) and exit(name)
+# around every span, outside of the timed block (e.g. memtrace)
+observer = None
+
+# bucket i counts durations below 2**(i+1) µs, the last
+# bucket holds everything from 2**24 µs (~17 s) up
+BUCKETS = 25
+
+class Span:
+
+    '''
+    Times the enclosed block when used as context manager and sorts
+    the duration into power-of-two buckets.
+    '''
+
+    def __init__ (self, name):
+        self.name = name
+        self.histogram = array('I', [0] * BUCKETS)
+        self.count = 0
+        self.max = 0
+        self.start = 0
+
+    def __enter__ (self):
+        if observer:
+            observer.enter(self.name)
+        self.start = ticks_us()
+        return self
+
+    def __exit__ (self, kind, value, traceback):
+        self.record(ticks_diff(ticks_us(), self.start))
+        if observer:
+            observer.exit(self.name)
+
+    def record (self, us):
+        bucket = 0
+        while bucket < BUCKETS - 1 and us >> (bucket + 1):
+            bucket += 1
+        self.histogram[bucket] += 1
+        self.count += 1
+        if us > self.max:
+            self.max = us
+
+    def percentile (self, p):
+
+        '''
+        Returns the upper bound (µs) of the bucket holding the p-th
+        percentile, capped by the slowest recorded duration.
+        '''
+
+        if not self.count:
+            return 0
+        rank = self.count * p / 100
+        seen = 0
+        for bucket in range(BUCKETS):
+            seen += self.histogram[bucket]
+            if seen >= rank:
+                return min(1 << (bucket + 1), self.max)
+        return self.max
+
+    def reset (self):
+        for bucket in range(BUCKETS):
+            self.histogram[bucket] = 0
+        self.count = 0
+        self.max = 0
+
+_spans = {}
+
+def span (name):
+
+    '''
+    Returns the span registered under name, created on first use.
+    '''
+
+    s = _spans.get(name)
+    if s is None:
+        s = _spans[name] = Span(name)
+    return s
+
+def wrap (name, function):
+
+    '''
+    Returns function wrapped in the span registered under name.
+    '''
+
+    s = span(name)
+    def wrapped (*args, **kwargs):
+        with s:
+            return function(*args, **kwargs)
+    return wrapped
+
+def spans ():
+    return [_spans[name] for name in sorted(_spans)]
+
+def report ():
+
+    '''
+    Prints count, p50, p95 and max (ms) of every span to serial.
+    '''
+
+    print(f'{"span":<10}{"n":>6}{"p50":>9}{"p95":>9}{"max":>9}')
+    for s in spans():
+        print(f'{s.name:<10}{s.count:>6}{s.percentile(50)/1000:>9.1f}{s.percentile(95)/1000:>9.1f}{s.max/1000:>9.1f}')
+
+def reset ():
+    for s in _spans.values():
+        s.reset()
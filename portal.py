@@ -13,6 +13,7 @@ import machine
 import usocket
 import uasyncio
 import json
+import config
 
 
 # ========== Baked Phew Dependencies ==========
@@ -44,7 +45,8 @@ def access_point(ssid, password = None):
   return wlan
 
 # template.py
-async def render_template(template, **kwargs):
+# a plain generator, the response writer iterates it synchronously
+def render_template(template, **kwargs):
   start_time = time.ticks_ms()
   with open(template, "rb") as f:
     # read the whole template file, we could work on single lines but
@@ -139,6 +141,7 @@ class Request:
     self.form = {}
     self.data = {}
     self.query = {}
+    self.rejected = [] # filenames of file parts the upload handler refused
     query_string_start = uri.find("?") if uri.find("?") != -1 else len(uri)
     self.path = uri[:query_string_start]
     self.query_string = uri[query_string_start + 1:]
@@ -152,9 +155,9 @@ form: {str(self.form)}
 data: {str(self.data)}"""
 
 class Response:
-  def __init__(self, body, status=200, headers={}):
+  def __init__(self, body, status=200, headers=None):
     self.status = status
-    self.headers = headers
+    self.headers = headers if headers is not None else {}
     self.body = body
 
   def add_header(self, name, value):
@@ -178,9 +181,9 @@ content_type_map = {
 }
 
 class FileResponse(Response):
-  def __init__(self, file, status=200, headers={}):
+  def __init__(self, file, status=200, headers=None):
     self.status = 404
-    self.headers = headers
+    self.headers = headers = headers if headers is not None else {}
     self.file = file
 
     try:
@@ -194,7 +197,8 @@ class FileResponse(Response):
 
         headers["Content-Length"] = os.stat(self.file)[6]
     except OSError:
-      return False
+      # missing, answered with a 404
+      pass
 
 
 class Route:
@@ -258,14 +262,151 @@ def _match_route(request):
       return route
   return None
 
-async def _parse_form_data(reader, headers):
-    return
+# multipart/form-data is parsed while it arrives and never holds more than
+# a chunk of the body plus the boundary. small fields are collected into
+# request.form, file parts are streamed to the upload handler
+_MULTIPART_CHUNK = 512
+_MULTIPART_FIELD_LIMIT = 1024
+upload_handler = None
+
+# returns the parameters of a header value like 'form-data; name="file"'
+def _header_parameters(value):
+  parameters = {}
+  for parameter in value.split(";")[1:]:
+    if "=" in parameter:
+      key, parameter_value = parameter.split("=", 1)
+      parameters[key.strip().lower()] = parameter_value.strip().strip('"')
+  return parameters
+
+def _discard(chunk):
+  pass
+
+# a multipart header line or field beyond _MULTIPART_FIELD_LIMIT, other
+# malformed parts raise a plain ValueError
+class _PartTooLarge(ValueError):
+  pass
+
+# reads a request body of known length in bounded chunks
+class _BodyReader:
+  def __init__(self, reader, length):
+    self.reader = reader
+    self.remaining = length
+    self.buffer = b""
+
+  async def fill(self):
+    if self.remaining <= 0:
+      return False
+    data = await uasyncio.wait_for(self.reader.read(min(self.remaining, _MULTIPART_CHUNK)), READ_TIMEOUT)
+    if not data:
+      self.remaining = 0
+      return False
+    self.remaining -= len(data)
+    self.buffer += data
+    return True
+
+  async def readline(self):
+    while True:
+      end = self.buffer.find(b"\r\n")
+      if end != -1:
+        line = self.buffer[:end]
+        self.buffer = self.buffer[end + 2:]
+        return line
+      if len(self.buffer) > _MULTIPART_FIELD_LIMIT:
+        raise _PartTooLarge("multipart header line too long")
+      if not await self.fill():
+        line, self.buffer = self.buffer, b""
+        return line
+
+  # passes everything up to the delimiter to sink and consumes the
+  # delimiter, returns False if the body ended before it
+  async def stream_until(self, delimiter, sink):
+    # keep a tail which could be the beginning of the delimiter
+    keep = len(delimiter) - 1
+    while True:
+      start = self.buffer.find(delimiter)
+      if start != -1:
+        if start:
+          sink(self.buffer[:start])
+        self.buffer = self.buffer[start + len(delimiter):]
+        return True
+      if len(self.buffer) > keep:
+        sink(self.buffer[:-keep])
+        self.buffer = self.buffer[-keep:]
+      if not await self.fill():
+        return False
+
+  async def skip(self):
+    self.buffer = b""
+    while await self.fill():
+      self.buffer = b""
+
+async def _parse_form_data(reader, headers, rejected=None):
+  form = {}
+  body = _BodyReader(reader, int(headers["content-length"]))
+  boundary = _header_parameters(headers["content-type"]).get("boundary")
+  if not boundary:
+    await body.skip()
+    return form
+  # skip the preamble up to the first delimiter, the following ones are
+  # preceded by the line break which ends the previous part
+  delimiter = b"--" + boundary.encode()
+  complete = await body.stream_until(delimiter, _discard)
+  delimiter = b"\r\n" + delimiter
+  while complete:
+    # a delimiter is followed by "--" after the last part
+    if (await body.readline()).startswith(b"--"):
+      break
+    part_headers = {}
+    while True:
+      line = await body.readline()
+      if not line:
+        break
+      if b":" not in line:
+        raise ValueError("malformed multipart header")
+      name, value = line.decode().split(":", 1)
+      part_headers[name.strip().lower()] = value.strip()
+    disposition = _header_parameters(part_headers.get("content-disposition", ""))
+    name = disposition.get("name")
+    filename = disposition.get("filename")
+    if filename is None:
+      # plain field, collected in memory up to the field limit
+      value = bytearray()
+      def collect(chunk):
+        if len(value) + len(chunk) > _MULTIPART_FIELD_LIMIT:
+          raise _PartTooLarge("multipart field too large")
+        value.extend(chunk)
+      complete = await body.stream_until(delimiter, collect)
+      if complete:
+        form[name] = value.decode()
+      continue
+    # file part, streamed to the sink returned by the upload handler
+    sink = upload_handler(name, filename) if upload_handler else None
+    if sink is None and rejected is not None:
+      rejected.append(filename)
+    try:
+      complete = await body.stream_until(delimiter, sink.write if sink else _discard)
+    except BaseException:
+      # timed out or cancelled, a partial upload never stays behind
+      if sink and hasattr(sink, "abort"):
+        sink.abort()
+      raise
+    if complete:
+      if sink:
+        sink.close()
+      form[name] = filename
+    elif sink:
+      if hasattr(sink, "abort"):
+        sink.abort()
+      else:
+        sink.close()
+  await body.skip()
+  return form
 
 # if the content type is application/json then parse the body
 async def _parse_json_body(reader, headers):
   import json
   content_length_bytes = int(headers["content-length"])
-  body = await reader.readexactly(content_length_bytes)
+  body = await uasyncio.wait_for(reader.readexactly(content_length_bytes), READ_TIMEOUT)
   return json.loads(body.decode())
 
 
@@ -279,36 +420,232 @@ status_message_map = {
   400: "Bad Request", 401: "Unauthorized", 403: "Forbidden",
   404: "Not Found", 405: "Method Not Allowed", 406: "Not Acceptable",
   408: "Request Timeout", 409: "Conflict", 410: "Gone",
-  414: "URI Too Long", 415: "Unsupported Media Type", 
+  413: "Payload Too Large", 414: "URI Too Long", 415: "Unsupported Media Type", 
   416: "Range Not Satisfiable", 418: "I'm a teapot",
   500: "Internal Server Error", 501: "Not Implemented"
 }
 
 
-# handle an incoming request to the web server
-async def _handle_request(reader, writer):
+# keep-alive: an idle connection is closed after the timeout (seconds)
+# and no connection serves more than the request cap
+KEEPALIVE_TIMEOUT = 5
+KEEPALIVE_MAX_REQUESTS = 16
+
+# connection governor: at most MAX_CONNECTIONS connections are open at
+# once, each takes its slot before anything is read. a new client takes
+# over the slot of the connection idling longest in keep-alive, if there
+# is none it gets an immediate 503. every stage has its own timeout
+# (seconds) and each request must be done within REQUEST_TIMEOUT, so a
+# client trickling its request byte by byte can't hold on to a slot
+MAX_CONNECTIONS = 4
+READ_TIMEOUT = 5 # request line, headers and each read of the body
+WRITE_TIMEOUT = 10 # each drain of the response
+REQUEST_TIMEOUT = 20 # a whole request, from its headers to the response
+connection_stats = {"accepted": 0, "rejected": 0, "timed_out": 0, "evicted": 0, "open": 0}
+# tasks of the connections waiting for their next keep-alive request,
+# longest waiting first
+_idle = []
+_busy_response = b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 1\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+# waits until the stream took the written data, bounded by WRITE_TIMEOUT
+async def _drain(writer):
+  await uasyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+
+# the status line, the headers and small bodies are coalesced into one
+# preallocated buffer so that a typical response leaves in a single write.
+# the buffer is shared between all connections, this is safe as long as
+# nothing awaits while it holds unsent data - writer.write() copies the
+# bytes it was given, so only ever await after a flush
+_RESPONSE_BUFFER_SIZE = 1024
+_response_buffer = bytearray(_RESPONSE_BUFFER_SIZE)
+_hex_digits = b"0123456789abcdef"
+
+class ResponseWriter:
+  def __init__(self, writer):
+    self.writer = writer
+    self.caret = 0
+    # offset of the reserved chunk size prefix, -1 unless chunked
+    self.chunk_start = -1
+
+  # reserve room for a "xxx\r\n" chunk size prefix at the caret
+  def _open_chunk(self):
+    self.chunk_start = self.caret
+    self.caret += 5
+
+  # fill in the size prefix and the trailing crlf of the current chunk
+  def _close_chunk(self):
+    size = self.caret - self.chunk_start - 5
+    if size == 0:
+      # drop the reserved prefix of an empty chunk
+      self.caret = self.chunk_start
+      return
+    prefix = self.chunk_start
+    _response_buffer[prefix] = _hex_digits[(size >> 8) & 15]
+    _response_buffer[prefix + 1] = _hex_digits[(size >> 4) & 15]
+    _response_buffer[prefix + 2] = _hex_digits[size & 15]
+    _response_buffer[prefix + 3] = 13
+    _response_buffer[prefix + 4] = 10
+    _response_buffer[self.caret] = 13
+    _response_buffer[self.caret + 1] = 10
+    self.caret += 2
+
+  # hand the buffered bytes to the stream, does not await
+  def flush(self):
+    chunked = self.chunk_start >= 0
+    if chunked:
+      self._close_chunk()
+    if self.caret:
+      self.writer.write(memoryview(_response_buffer)[:self.caret])
+    self.caret = 0
+    if chunked:
+      self._open_chunk()
+
+  def start_chunked(self):
+    self._open_chunk()
+
+  async def write(self, data):
+    if isinstance(data, str):
+      data = data.encode()
+    view = memoryview(data)
+    # keep two bytes for the crlf that closes a chunk
+    reserve = 2 if self.chunk_start >= 0 else 0
+    while len(view):
+      room = _RESPONSE_BUFFER_SIZE - reserve - self.caret
+      if len(view) <= room:
+        _response_buffer[self.caret:self.caret + len(view)] = view
+        self.caret += len(view)
+        return
+      if self.caret == 0 and self.chunk_start < 0:
+        # nothing buffered and too large to coalesce, send it as it is
+        self.writer.write(view)
+        await _drain(self.writer)
+        return
+      _response_buffer[self.caret:self.caret + room] = view[:room]
+      self.caret += room
+      view = view[room:]
+      self.flush()
+      await _drain(self.writer)
+
+  async def finish(self):
+    if self.chunk_start >= 0:
+      self._close_chunk()
+      self.chunk_start = -1
+      # zero sized chunk terminates the body
+      await self.write(b"0\r\n\r\n")
+    self.flush()
+    await _drain(self.writer)
+
+# writes the status line and headers into the response buffer
+def _write_head(out, response, keep_alive, chunked):
+  status_message = status_message_map.get(response.status, "Unknown")
+  head = f"HTTP/1.1 {response.status} {status_message}\r\n"
+  for key, value in response.headers.items():
+    head += f"{key}: {value}\r\n"
+  if chunked:
+    head += "Transfer-Encoding: chunked\r\n"
+  head += "Connection: keep-alive\r\n" if keep_alive else "Connection: close\r\n"
+  head += "\r\n"
+  # headers are ascii by definition
+  data = head.encode("ascii")
+  if len(data) > _RESPONSE_BUFFER_SIZE:
+    out.writer.write(data)
+    return status_message
+  _response_buffer[:len(data)] = data
+  out.caret = len(data)
+  return status_message
+
+# sends a response, returns the status message for logging and whether
+# the connection can be kept open afterwards
+async def _send_response(writer, response, keep_alive):
+  out = ResponseWriter(writer)
+  chunked = False
+  if isinstance(response, FileResponse):
+    if response.status != 200:
+      # no body, the client still has to know where the response ends
+      response.headers["Content-Length"] = 0
+    status_message = _write_head(out, response, keep_alive, False)
+    if response.status == 200:
+      with open(response.file, "rb") as f:
+        while True:
+          chunk = f.read(_RESPONSE_BUFFER_SIZE)
+          if not chunk:
+            break
+          await out.write(chunk)
+  elif type(response.body).__name__ == "generator":
+    # unknown length, stream it in chunks if the connection stays open
+    # otherwise the end of the body is marked by closing the connection
+    chunked = keep_alive and "Content-Length" not in response.headers
+    status_message = _write_head(out, response, keep_alive, chunked)
+    if chunked:
+      out.start_chunked()
+    for chunk in response.body:
+      await out.write(chunk)
+  else:
+    # string/bytes
+    body = response.body
+    if body is None:
+      body = b""
+    if isinstance(body, str):
+      body = body.encode()
+    if "Content-Length" not in response.headers:
+      response.add_header("Content-Length", len(body))
+    status_message = _write_head(out, response, keep_alive, False)
+    await out.write(body)
+  await out.finish()
+  return status_message, keep_alive
+
+# decides whether the client wants the connection to stay open
+def _wants_keep_alive(request):
+  connection = request.headers.get("connection", "").lower()
+  if request.protocol == "HTTP/1.0":
+    return connection == "keep-alive"
+  return connection != "close"
+
+# handle a single request on an open connection, returns True if the
+# connection may be used for another request
+async def _serve_request(request_line, reader, writer, allow_keep_alive):
   response = None
   request_start_time = time.ticks_ms()
-  request_line = await reader.readline()
   try:
     method, uri, protocol = request_line.decode().split()
   except Exception as e:
-    return
+    return False
   request = Request(method, uri, protocol)
-  request.headers = await _parse_headers(reader)
+  request.headers = await uasyncio.wait_for(_parse_headers(reader), READ_TIMEOUT)
+  body_consumed = "content-length" not in request.headers
   if "content-length" in request.headers and "content-type" in request.headers:
     if request.headers["content-type"].startswith("multipart/form-data"):
-      request.form = await _parse_form_data(reader, request.headers)
+      try:
+        request.form = await _parse_form_data(reader, request.headers, request.rejected)
+      except ValueError as e:
+        # the rest of the body can't be told apart from a next request
+        status = 413 if isinstance(e, _PartTooLarge) else 400
+        await _send_response(writer, Response(str(e), status=status), False)
+        print(f"> {request.method} {request.path} ({status} {status_message_map[status]})")
+        return False
+      body_consumed = True
     if request.headers["content-type"].startswith("application/json"):
       request.data = await _parse_json_body(reader, request.headers)
+      body_consumed = True
     if request.headers["content-type"].startswith("application/x-www-form-urlencoded"):
-      form_data = await reader.read(int(request.headers["content-length"]))
-      request.form = _parse_query_string(form_data.decode()) 
+      form_data = await uasyncio.wait_for(reader.readexactly(int(request.headers["content-length"])), READ_TIMEOUT)
+      request.form = _parse_query_string(form_data.decode())
+      body_consumed = True
+  if not body_consumed:
+    # skip an unparsed body so the next request starts at its request line
+    remaining = int(request.headers["content-length"])
+    while remaining > 0:
+      skipped = await uasyncio.wait_for(reader.read(min(remaining, _RESPONSE_BUFFER_SIZE)), READ_TIMEOUT)
+      if not skipped:
+        return False
+      remaining -= len(skipped)
   route = _match_route(request)
   if route:
     response = route.call_handler(request)
   elif catchall_handler:
     response = catchall_handler(request)
+  if response is None:
+    response = ("Not Found", 404)
   # if shorthand body generator only notation used then convert to tuple
   if type(response).__name__ == "generator":
     response = (response,)
@@ -322,38 +659,78 @@ async def _handle_request(reader, writer):
     content_type = response[2] if len(response) >= 3 else "text/html"
     response = Response(body, status=status)
     response.add_header("Content-Type", content_type)
-    if hasattr(body, '__len__'):
-      response.add_header("Content-Length", len(body))
-  # write status line
-  status_message = status_message_map.get(response.status, "Unknown")
-  writer.write(f"HTTP/1.1 {response.status} {status_message}\r\n".encode("ascii"))
-  # write headers
-  for key, value in response.headers.items():
-    writer.write(f"{key}: {value}\r\n".encode("ascii"))
-  # blank line to denote end of headers
-  writer.write("\r\n".encode("ascii"))
-  if isinstance(response, FileResponse):
-    # file
-    with open(response.file, "rb") as f:
-      while True:
-        chunk = f.read(1024)
-        if not chunk:
-          break
-        writer.write(chunk)
-        await writer.drain()
-  elif type(response.body).__name__ == "generator":
-    # generator
-    for chunk in response.body:
-      writer.write(chunk)
-      await writer.drain()
-  else:
-    # string/bytes
-    writer.write(response.body)
-    await writer.drain()
-  writer.close()
-  await writer.wait_closed()
+  keep_alive = allow_keep_alive and _wants_keep_alive(request)
+  status_message, keep_alive = await _send_response(writer, response, keep_alive)
   processing_time = time.ticks_ms() - request_start_time
   print(f"> {request.method} {request.path} ({response.status} {status_message}) [{processing_time}ms]")
+  return keep_alive
+
+# handle an incoming connection to the web server, serves requests until
+# the client closes, asks to close, idles out or hits the request cap.
+# stage timeouts propagate as uasyncio.TimeoutError
+async def _handle_request(reader, writer):
+  served = 0
+  try:
+    while served < KEEPALIVE_MAX_REQUESTS:
+      # the first request must arrive in time, later ones may idle
+      timeout = KEEPALIVE_TIMEOUT if served else READ_TIMEOUT
+      if served:
+        # idle, the slot may be handed to a new client meanwhile
+        task = uasyncio.current_task()
+        _idle.append(task)
+      try:
+        request_line = await uasyncio.wait_for(reader.readline(), timeout)
+      except uasyncio.TimeoutError:
+        if not served:
+          raise
+        break
+      finally:
+        if served and task in _idle:
+          _idle.remove(task)
+      if not request_line:
+        break
+      served += 1
+      allow_keep_alive = served < KEEPALIVE_MAX_REQUESTS
+      keep_alive = await uasyncio.wait_for(_serve_request(request_line, reader, writer, allow_keep_alive), REQUEST_TIMEOUT)
+      if not keep_alive:
+        break
+  finally:
+    writer.close()
+    await writer.wait_closed()
+
+# closes the connection idling longest in keep-alive, its slot is
+# released once the cancelled task ran. returns False if none idles
+def _evict_idle():
+  if not _idle:
+    return False
+  _idle.pop(0).cancel()
+  connection_stats["evicted"] += 1
+  return True
+
+# serves a connection if it gets a slot, otherwise answers 503 right away
+async def _handle_connection(reader, writer):
+  if connection_stats["open"] >= MAX_CONNECTIONS and not _evict_idle():
+    connection_stats["rejected"] += 1
+    try:
+      writer.write(_busy_response)
+      await _drain(writer)
+    except (OSError, uasyncio.TimeoutError):
+      pass
+    finally:
+      writer.close()
+      await writer.wait_closed()
+    return
+  connection_stats["accepted"] += 1
+  connection_stats["open"] += 1
+  try:
+    await _handle_request(reader, writer)
+  except uasyncio.TimeoutError:
+    connection_stats["timed_out"] += 1
+  except uasyncio.CancelledError:
+    # evicted while idle
+    pass
+  finally:
+    connection_stats["open"] -= 1
 
 # adds a new route to the routing table
 def add_route(path, handler, methods=["GET"]):
@@ -383,30 +760,135 @@ def catchall():
     return f
   return _catchall
 
+# file parts of multipart/form-data posts are passed to the upload handler
+# as handler(name, filename). it returns a writable object (an open file
+# will do) or None to discard the part, which is listed in request.rejected. the object's write() receives the
+# data chunk by chunk and close() is called once the part is complete, an
+# optional abort() is called instead if the body ends early
+def set_upload_handler(handler):
+  global upload_handler
+  upload_handler = handler
+
+
+# decorator for adding the upload handler
+def upload():
+  def _upload(f):
+    set_upload_handler(f)
+    return f
+  return _upload
+
 def run(host = "0.0.0.0", port = 80):
 
   loop = uasyncio.get_event_loop()
-  loop.create_task(uasyncio.start_server(_handle_request, host, port))
+  loop.create_task(uasyncio.start_server(_handle_connection, host, port))
   loop.run_forever()
 
 
 # -- dns.py --
+# every A query gets the same answer, so the answer record is built once
+# when the server starts. datagrams are received into a fixed buffer and
+# the reply is assembled in place, right behind the question
+_DNS_BUFFER_SIZE = 512
+_DNS_RATE_LIMIT = 20 # queries per client and second
+_DNS_MAX_CLIENTS = 16 # size of the rate limit table
+
+_dns_clients = {}
+
+# the answer suffix: name pointer, A record, IN class, ttl and address
+def _dns_answer(ip_address):
+  answer = bytearray(b"\xC0\x0C") # pointer to domain name at byte 12
+  answer += b"\x00\x01\x00\x01" # type and class (A record / IN class)
+  answer += b"\x00\x00\x00\x3C" # time to live 60 seconds
+  answer += b"\x00\x04" # response length (4 bytes = 1 ipv4 address)
+  answer += bytes(map(int, ip_address.split("."))) # ip address parts
+  return answer
+
+# turns the query in buffer, a memoryview of the receive buffer, into
+# the reply, returns the reply length or 0 if the datagram should be dropped
+def _dns_reply(buffer, size, answer):
+  if size < 12 or buffer[2] & 0x80: # too short or not a query
+    return 0
+  recursion_desired = buffer[2] & 0x01
+  opcode = (buffer[2] >> 3) & 0x0F
+  # only the question is echoed, additional records (edns) are dropped
+  for i in range(6, 12): # an/ns/ar count
+    buffer[i] = 0
+  buffer[2] = 0x84 | recursion_desired # response, authoritative
+  if opcode != 0 or buffer[4] != 0 or buffer[5] != 1:
+    buffer[3] = 0x84 # not implemented
+    buffer[4] = buffer[5] = 0
+    return 12
+  # skip the labels of the queried name
+  caret = 12
+  while caret < size:
+    length = buffer[caret]
+    if length == 0 or length & 0xC0:
+      break
+    caret += length + 1
+  if caret + 5 > size or buffer[caret] != 0:
+    return 0
+  qtype = buffer[caret + 1] << 8 | buffer[caret + 2]
+  qclass = buffer[caret + 3] << 8 | buffer[caret + 4]
+  end = caret + 5
+  if qclass != 1:
+    buffer[3] = 0x83 # name error, we only serve the internet class
+    return end
+  buffer[3] = 0x80 # no error
+  if qtype != 1:
+    # no data: the name exists but has no record of this type (AAAA,
+    # HTTPS, ...), so clients fall back to the A record right away
+    return end
+  buffer[7] = 1 # one answer
+  buffer[end:end + len(answer)] = answer
+  return end + len(answer)
+
+# allows at most _DNS_RATE_LIMIT queries per client and second
+def _dns_allow(host):
+  now = time.ticks_ms()
+  window = _dns_clients.get(host)
+  if window is None:
+    if len(_dns_clients) >= _DNS_MAX_CLIENTS:
+      # evict the client seen longest ago, the others keep their limit
+      oldest = None
+      for key in _dns_clients:
+        if oldest is None or time.ticks_diff(_dns_clients[key][0], _dns_clients[oldest][0]) < 0:
+          oldest = key
+      del _dns_clients[oldest]
+    window = _dns_clients[host] = [now, 0]
+  if time.ticks_diff(now, window[0]) >= 1000:
+    window[0] = now
+    window[1] = 0
+  window[1] += 1
+  return window[1] <= _DNS_RATE_LIMIT
+
 async def _handler(socket, ip_address):
+  answer = _dns_answer(ip_address)
+  buffer = bytearray(_DNS_BUFFER_SIZE)
+  view = memoryview(buffer)
+  # the reply is at most the query plus one answer record
+  limit = _DNS_BUFFER_SIZE - len(answer)
+  received = view[:limit]
+  # views of the reply sizes seen so far, the loop doesn't slice
+  replies = {}
+  receive_into = getattr(socket, "recvfrom_into", None)
   while True:
     try:
       yield uasyncio.core._io_queue.queue_read(socket)
-      request, client = socket.recvfrom(256)
-      response = request[:2] # request id
-      response += b"\x81\x80" # response flags
-      response += request[4:6] + request[4:6] # qd/an count
-      response += b"\x00\x00\x00\x00" # ns/ar count
-      response += request[12:] # origional request body
-      response += b"\xC0\x0C" # pointer to domain name at byte 12
-      response += b"\x00\x01\x00\x01" # type and class (A record / IN class)
-      response += b"\x00\x00\x00\x3C" # time to live 60 seconds
-      response += b"\x00\x04" # response length (4 bytes = 1 ipv4 address)
-      response += bytes(map(int, ip_address.split("."))) # ip address parts
-      socket.sendto(response, client)
+      if receive_into:
+        size, client = receive_into(received)
+      else:
+        # micropython sockets lack recvfrom_into, copy the datagram over
+        request, client = socket.recvfrom(limit)
+        size = len(request)
+        buffer[:size] = request
+      if not _dns_allow(client[0]):
+        continue
+      size = _dns_reply(view, size, answer)
+      if size:
+        reply = replies.get(size)
+        if reply is None:
+          reply = replies[size] = view[:size]
+        socket.sendto(reply, client)
     except Exception as e:
       print(e)
 
@@ -424,6 +906,96 @@ def run_catchall(ip_address, port=53):
 
 
 # ========== Code ==========
+# files the portal accepts as uploads: the assets, the modules of the
+# stack and config.json, everything else is refused with 403
+UPLOADS = ('logo.bin', 'index.html')
+STACK = ('.py', '.mpy')
+CONFIG_LIMIT = 2048 # bytes of an uploaded config.json, held in memory
+
+class FlashUpload:
+
+    '''
+    Streams an uploaded file to flash. The data is written to a
+    temporary file which replaces the target once the upload completed,
+    so an interrupted upload never leaves a truncated file behind.
+    '''
+
+    def __init__ (self, path):
+        self.path = path
+        self.file = open(path + '.part', 'wb')
+
+    def write (self, chunk):
+        self.file.write(chunk)
+
+    def close (self):
+        self.file.close()
+        try:
+            # FAT refuses to rename onto an existing file
+            os.remove(self.path)
+        except OSError:
+            pass
+        os.rename(self.path + '.part', self.path)
+
+    def abort (self):
+        self.file.close()
+        os.remove(self.path + '.part')
+
+def module_name (path):
+
+    '''
+    Name of the stack module path holds, None if it's no module.
+    '''
+
+    for extension in STACK:
+        if path.endswith(extension):
+            name = path[:-len(extension)]
+            if name and all(c.isalpha() or c.isdigit() or c == '_' for c in name):
+                return name
+    return None
+
+class StackUpload(FlashUpload):
+
+    '''
+    Installs an uploaded module like update() does: the other form of
+    the module is removed, since a .py shadows a .mpy on import.
+    '''
+
+    def close (self):
+        FlashUpload.close(self)
+        name = module_name(self.path)
+        for extension in STACK:
+            if name + extension != self.path:
+                try:
+                    os.remove(name + extension)
+                except OSError:
+                    pass
+
+class ConfigUpload:
+
+    '''
+    Collects an uploaded config.json, which is only persisted if all of
+    its values pass validation, the config is left as it was otherwise.
+    '''
+
+    def __init__ (self):
+        self.data = bytearray()
+
+    def write (self, chunk):
+        if len(self.data) + len(chunk) > CONFIG_LIMIT:
+            raise _PartTooLarge('config.json too large')
+        self.data.extend(chunk)
+
+    def close (self):
+        # ValueError for invalid json or values, answered with 400
+        values = json.loads(str(self.data, 'utf-8'))
+        if not isinstance(values, dict):
+            raise ValueError('config.json must hold an object')
+        config.update(**values)
+        config.flush()
+
+    def abort (self):
+        self.data = None
+
 def spawn ():
     
     '''
@@ -454,16 +1026,9 @@ def spawn ():
     def login_form(request):
         status, message = 404, 'none'
         try:
-            # load current config state
-            config = None
-            with open('config.json') as f:
-                config = json.load(f)
-            # override config
-            config['ssid'] = request.data['ssid']
-            config['wpa2'] = request.data['wpa2']
-            # dump
-            with open('config.json', 'w+') as f:
-                f.write(json.dumps(config))
+            # override config, both credentials are persisted in one write
+            config.update(ssid=request.data['ssid'], wpa2=request.data['wpa2'])
+            config.flush()
             status, message = 200, 'ok'
         except Exception as e:
             status, message = 500, 'fail'
@@ -471,6 +1036,31 @@ def spawn ():
             # wrap up the json package and send
             return Response(json.dumps({'message': message}), status=status, headers={"Content-Type": "application/json"})
 
+    # ========== define upload end-point ===========
+    @upload()
+    def store_upload(name, filename):
+        """ Stream uploaded assets, modules and the config to flash """
+        # strip any client side directories
+        path = filename.replace('\\', '/').split('/')[-1]
+        if path == config.PATH:
+            return ConfigUpload()
+        if path in UPLOADS:
+            return FlashUpload(path)
+        if module_name(path):
+            return StackUpload(path)
+        return None
+
+    @route("/stats", ["GET"])
+    def stats(request):
+        """ Connection counters of the governor """
+        return Response(json.dumps(connection_stats), headers={"Content-Type": "application/json"})
+
+    @route("/upload", ["POST"])
+    def upload_form(request):
+        if request.rejected:
+            return Response(json.dumps({'rejected': request.rejected}), status=403, headers={"Content-Type": "application/json"})
+        return Response(json.dumps({'stored': request.form}), headers={"Content-Type": "application/json"})
+
     # ========== Initialize Service ===========
     # Set to Accesspoint mode
     # Change this to whatever Wifi SSID you wish
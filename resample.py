@@ -0,0 +1,101 @@
+#####################################################################################
+#####################################################################################
+# Candle Resampler © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Folds the candles of the fetched interval into longer timeframes,
+# so further views cost no requests:
+#     sampler = resample.Resampler(15, (60, 240, 1440), 128)
+#     sampler.update(start, o, h, l, c, v)   # per candle, oldest first
+#     sampler.frames[60].candles.column(sampler.frames[60].candles.closes)
+# Updates of the open candle replace it, candles older than it are
+# ignored, so overlapping backfills can be fed again. Every update
+# costs constant time per timeframe. Buckets are aligned to UTC like
+# kraken's, so all timeframes agree with each other and with kraken.
+#####################################################################################
+#####################################################################################
+
+from candles import Candles
+
+class Frame:
+
+    '''
+    Last size candles of step seconds.
+    '''
+
+    def __init__ (self, step, size):
+        self.step = step
+        self.candles = Candles(size)
+        self.clear()
+
+    def clear (self):
+        self.candles.clear()
+        self.bucket = None      # start of the open bucket
+        self.base = None        # start of the newest fine candle
+        # the bucket's fine candles before the newest one
+        self.settled = None     # (open, high, low, volume)
+        self.candle = None      # newest fine candle (open, high, low, close, volume)
+
+    def update (self, start, o, h, l, c, v):
+        if self.base is not None and start < self.base:
+            return
+        bucket = start - start % self.step
+        if start != self.base:
+            if bucket != self.bucket:
+                self.settled = None
+            elif self.candle:
+                # the previous fine candle closed within the bucket
+                po, ph, pl, _, pv = self.candle
+                if self.settled:
+                    so, sh, sl, sv = self.settled
+                    self.settled = (so, max(sh, ph), min(sl, pl), sv + pv)
+                else:
+                    self.settled = (po, ph, pl, pv)
+            self.base = start
+        self.candle = (o, h, l, c, v)
+        if self.settled:
+            so, sh, sl, sv = self.settled
+            o, h, l, v = so, max(sh, h), min(sl, l), sv + v
+        if bucket == self.bucket:
+            self.candles.amend(bucket, o, h, l, c, v)
+        else:
+            self.bucket = bucket
+            self.candles.push(bucket, o, h, l, c, v)
+
+class Resampler:
+
+    '''
+    Timeframes (minutes) derived from candles of interval minutes,
+    those which aren't multiples of it are left out.
+    '''
+
+    def __init__ (self, interval, timeframes, size):
+        self.frames = {}
+        for minutes in timeframes:
+            if minutes > interval and minutes % interval == 0:
+                self.frames[minutes] = Frame(minutes * 60, size)
+
+    def clear (self):
+        for frame in self.frames.values():
+            frame.clear()
+
+    def update (self, start, o, h, l, c, v):
+
+        '''
+        Feeds a candle of the fine interval starting at start (s).
+        '''
+
+        for frame in self.frames.values():
+            frame.update(start, o, h, l, c, v)
+
+def label (minutes):
+
+    '''
+    Short name of a timeframe, e.g. 15m, 4h or 1d.
+    '''
+
+    if minutes % 1440 == 0:
+        return f'{minutes // 1440}d'
+    if minutes % 60 == 0:
+        return f'{minutes // 60}h'
+    return f'{minutes}m'
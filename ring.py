@@ -0,0 +1,109 @@
+#####################################################################################
+#####################################################################################
+# SPSC Ring © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Lock-free single-producer/single-consumer ring of preallocated slots
+# to hand data from one core to the other:
+#     i = ring.reserve()          # producer, -1 if full
+#     ring.buffers[i][...] = ...
+#     ring.commit(i, length)
+#     i = ring.latest()           # consumer, -1 if empty
+#     use(ring.buffers[i], ring.lengths[i])
+#     ring.release(i)
+# The producer only writes the head, the consumer only the tail, both
+# are single words, so no lock is needed and nothing is allocated.
+#####################################################################################
+#####################################################################################
+
+from array import array
+
+HEAD = 0
+TAIL = 1
+
+class Ring:
+
+    '''
+    Holds slots - 1 messages of up to size bytes each.
+    '''
+
+    def __init__ (self, slots, size):
+        self.slots = slots
+        self.size = size
+        self.buffers = [bytearray(size) for _ in range(slots)]
+        self.lengths = array('i', [0] * slots)
+        # head: next slot to write, tail: oldest unread slot
+        self.cursor = array('i', [0, 0])
+        # messages refused because the ring was full, producer side
+        self.dropped = 0
+
+    # ---- producer ----
+    def reserve (self):
+
+        '''
+        Returns the index of the slot to write, -1 if the ring is full.
+        '''
+
+        head = self.cursor[HEAD]
+        if (head + 1) % self.slots == self.cursor[TAIL]:
+            self.dropped += 1
+            return -1
+        return head
+
+    def commit (self, index, length):
+
+        '''
+        Publishes the reserved slot.
+        '''
+
+        self.lengths[index] = length
+        self.cursor[HEAD] = (index + 1) % self.slots
+
+    def push (self, data):
+
+        '''
+        Copies data into the next slot, False if the ring is full.
+        '''
+
+        index = self.reserve()
+        if index < 0:
+            return False
+        length = min(len(data), self.size)
+        buffer = self.buffers[index]
+        for i in range(length):
+            buffer[i] = data[i]
+        self.commit(index, length)
+        return True
+
+    # ---- consumer ----
+    def oldest (self):
+
+        '''
+        Returns the index of the oldest unread slot, -1 if empty.
+        '''
+
+        tail = self.cursor[TAIL]
+        return -1 if tail == self.cursor[HEAD] else tail
+
+    def latest (self):
+
+        '''
+        Returns the index of the newest slot, -1 if empty. Releasing
+        it skips all older messages.
+        '''
+
+        head = self.cursor[HEAD]
+        if head == self.cursor[TAIL]:
+            return -1
+        return (head - 1) % self.slots
+
+    def release (self, index):
+
+        '''
+        Hands the slot and all older ones back to the producer.
+        '''
+
+        self.cursor[TAIL] = (index + 1) % self.slots
+
+    def pending (self):
+        return (self.cursor[HEAD] - self.cursor[TAIL]) % self.slots
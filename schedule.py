@@ -0,0 +1,114 @@
+#####################################################################################
+#####################################################################################
+# Poll Scheduler © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Picks the delay of the next REST poll instead of a fixed one:
+#     poller = schedule.Poller(15, 10, 120)   # interval, min and max (s)
+#     engine.follow(poller)                   # fed the closes
+#     poller.plan(now, end, fetch.wait_ms('ohlc'), limited)
+#     if poller.due(): ...
+# The price is polled about when it can have moved by TARGET since
+# the last poll, which takes longer the calmer the market is, judged
+# by the volatility of the last WINDOW candles and of the open one.
+# The close of a candle is polled LAG seconds after it. Rate limits
+# raise the lower bound, and a breaker's backoff always takes
+# precedence over the bounds.
+#####################################################################################
+#####################################################################################
+
+from math import sqrt
+from utime import ticks_add, ticks_diff, ticks_ms
+from indicators import Returns
+
+TARGET = 0.001          # relative move worth a poll
+WINDOW = 48             # candles of the rolling volatility
+LAG = 2                 # seconds after a candle close until it's polled
+
+class Poller:
+
+    '''
+    Polls of candles of interval minutes, between low and high seconds
+    apart.
+    '''
+
+    def __init__ (self, interval, low, high, window=WINDOW):
+        self.step = interval * 60
+        self.low = 1000 * low
+        self.high = 1000 * max(low, high)
+        self.floor = self.low   # lower bound, raised by rate limits
+        self.returns = Returns(window)
+        self.delay = self.low   # ms, of the planned poll
+        self.at = ticks_ms()    # ticks_ms of the planned poll
+        self.clear()
+
+    # ---- closes, fed like an indicator ----
+    def clear (self):
+        self.returns.clear()
+
+    def push (self, x):
+        self.returns.push(x)
+
+    def amend (self, x):
+        self.returns.amend(x)
+
+    def volatility (self):
+
+        '''
+        Standard deviation of the log returns per candle, None while
+        fewer than two are known.
+        '''
+
+        return self.returns.volatility()
+
+    # ---- schedule ----
+    def plan (self, now=0, end=0, wait_ms=0, limited=False, failed=False):
+
+        '''
+        Plans the next poll and returns its delay (ms). now is the
+        server time (s) and end the close of the open candle, 0 if
+        unknown, wait_ms the backoff of the breakers and limited True
+        if the last poll ran into a rate limit. A failed poll is
+        retried once the backoff allows it.
+        '''
+
+        # rate limits double the lower bound, good polls halve it again
+        if limited:
+            self.floor = min(self.high, 2 * self.floor)
+        else:
+            self.floor = max(self.low, self.floor // 2)
+        delay = 0 if failed else self.high
+        sigma = None if failed else self.volatility()
+        if sigma:
+            # the open candle moving faster than the usual ones counts
+            move = self.returns.open()
+            if move is not None and now and end:
+                elapsed = max(0.25, 1 - (end - now) / self.step)
+                sigma = max(sigma, abs(move) / sqrt(elapsed))
+            # the expected move grows with the square root of time
+            delay = int(min(delay, 1000 * self.step * (TARGET / sigma) ** 2))
+        if now and end and not failed:
+            delay = min(delay, 1000 * (max(0, end - now) + LAG))
+        self.delay = max(self.floor, delay, wait_ms)
+        self.at = ticks_add(ticks_ms(), self.delay)
+        return self.delay
+
+    def wait_ms (self):
+
+        '''
+        Milliseconds until the planned poll, 0 once it's due.
+        '''
+
+        return max(0, ticks_diff(self.at, ticks_ms()))
+
+    def due (self):
+        return not self.wait_ms()
+
+    def reset (self):
+
+        '''
+        Polls right away, e.g. once the coin changed.
+        '''
+
+        self.floor = self.low
+        self.at = ticks_ms()
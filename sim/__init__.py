@@ -0,0 +1,132 @@
+#####################################################################################
+#####################################################################################
+# Host Emulator © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Runs the ticker under CPython on a workstation. install() registers
+# drop-in shims for the MicroPython modules it imports:
+#     machine, network, ssd1306, framebuf, utime, urequests,
+#     micropython, uasyncio, usocket, rp2, deflate
+# and patches the MicroPython extensions of time, gc and sys.
+#
+#     python -m sim --duration 120 --speed 10 --frames frames/
+#     python -m cProfile -s cumtime -m sim --duration 60
+#
+# or from python:
+#     import sim; sim.install()
+#     import ticker
+#####################################################################################
+#####################################################################################
+
+import builtins, gc, os, sys, threading, time, traceback
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules which are replaced by the shims of this package
+SHIMS = ['machine', 'network', 'ssd1306', 'framebuf', 'utime', 'urequests', 'micropython', 'uasyncio', 'usocket', 'rp2', 'deflate']
+
+# heap of a Pico W as seen by MicroPython after boot
+HEAP_SIZE = 192 * 1024
+
+class Halt(BaseException):
+
+    '''
+    Raised by sleep() once the run deadline passed. Derives from
+    BaseException so that the ticker's exception handlers let it pass.
+    '''
+
+class Reset(BaseException):
+
+    '''
+    Raised by machine.reset().
+    '''
+
+# ---- virtual time ----
+class clock:
+
+    '''
+    Emulated time: runs speed times faster than the wall clock. A
+    deadline (emulated seconds) stops the run at the next sleep.
+    '''
+
+    speed = 1.0
+    origin = time.monotonic()
+    deadline = None
+
+    def now ():
+        return (time.monotonic() - clock.origin) * clock.speed
+
+    def sleep (seconds):
+        if clock.deadline is not None and clock.now() + seconds > clock.deadline:
+            raise Halt()
+        time.sleep(max(0, seconds) / clock.speed)
+
+# ---- virtual BOOTSEL button ----
+class bootsel:
+
+    '''
+    The BOOTSEL button, pressed from the host:
+        sim.bootsel.press(0.5)
+    '''
+
+    pressed = False
+
+    def press (duration=0.2):
+        bootsel.pressed = True
+        threading.Timer(duration / clock.speed, bootsel.release).start()
+
+    def release ():
+        bootsel.pressed = False
+
+# ---- heap ----
+def mem_alloc ():
+    import tracemalloc
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    return 0
+
+def mem_free ():
+    return max(0, HEAP_SIZE - mem_alloc())
+
+def _threshold (amount=None):
+    return -1 if amount is None else None
+
+def print_exception (e, file=None):
+    traceback.print_exception(type(e), e, e.__traceback__, file=file or sys.stdout)
+
+def _excepthook (args):
+    # threads (the render thread, timers) stop quietly at the end of a run
+    if not issubclass(args.exc_type, (Halt, Reset)):
+        threading.__excepthook__(args)
+
+def _unraisablehook (unraisable):
+    # _thread.start_new_thread reports through this hook
+    if not isinstance(unraisable.exc_value, (Halt, Reset)):
+        sys.__unraisablehook__(unraisable)
+
+def install (trace_heap=False):
+
+    '''
+    Registers the shims. With trace_heap gc.mem_alloc() reports the
+    memory traced by tracemalloc, which slows the run down.
+    '''
+
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import importlib
+    for name in SHIMS:
+        sys.modules[name] = importlib.import_module(f'sim.{name}')
+    utime = sys.modules['utime']
+    for name in ('ticks_ms', 'ticks_us', 'ticks_cpu', 'ticks_diff', 'ticks_add', 'sleep_ms', 'sleep_us'):
+        setattr(time, name, getattr(utime, name))
+    gc.threshold = _threshold
+    gc.mem_alloc = mem_alloc
+    gc.mem_free = mem_free
+    sys.print_exception = print_exception
+    threading.excepthook = _excepthook
+    sys.unraisablehook = _unraisablehook
+    # the native emitter decorators need no import on the device
+    builtins.micropython = sys.modules['micropython']
+    if trace_heap:
+        import tracemalloc
+        tracemalloc.start()
@@ -0,0 +1,114 @@
+'''
+Command line runner of the host emulator, see sim/__init__.py.
+
+    python -m sim [--config FILE] [--duration S] [--speed X]
+                  [--frames DIR] [--press T[:D]] [--workdir DIR]
+'''
+
+import argparse, json, os, runpy, shutil, sys, tempfile, threading
+
+import sim
+
+def parse_press (value):
+    at, _, duration = value.partition(':')
+    return float(at), float(duration or .2)
+
+def arguments ():
+    parser = argparse.ArgumentParser(prog='python -m sim', description='Runs the ticker under CPython.')
+    parser.add_argument('--config', help='config.json to boot with, defaults to a configured ticker')
+    parser.add_argument('--duration', type=float, help='emulated seconds after which the run halts')
+    parser.add_argument('--speed', type=float, default=1.0, help='emulated seconds per wall clock second')
+    parser.add_argument('--frames', help='directory to dump every displayed frame to')
+    parser.add_argument('--format', choices=['pbm', 'png'], default='png', help='image format of dumped frames')
+    parser.add_argument('--press', type=parse_press, action='append', default=[], metavar='T[:D]',
+                        help='press BOOTSEL at emulated second T for D seconds (default .2), repeatable')
+    parser.add_argument('--standin', nargs='?', const='', metavar='OPTIONS',
+                        help='serve kraken and github from sim/standin.py, e.g. --standin="--latency 200"')
+    parser.add_argument('--workdir', help='device file system, defaults to a temporary directory')
+    parser.add_argument('--trace-heap', action='store_true', help='report traced host memory as gc.mem_alloc()')
+    parser.add_argument('--preview', action='store_true', help='print the last frame to the terminal')
+    return parser.parse_args()
+
+def prepare (workdir, config):
+
+    '''
+    Populates the emulated flash with the assets the ticker loads
+    and a config.json.
+    '''
+
+    os.makedirs(workdir, exist_ok=True)
+    for asset in ('logo.bin', 'index.html'):
+        target = os.path.join(workdir, asset)
+        if not os.path.exists(target):
+            shutil.copy(os.path.join(sim.ROOT, asset), target)
+    target = os.path.join(workdir, 'config.json')
+    if config:
+        shutil.copy(config, target)
+    elif not os.path.exists(target):
+        with open(target, 'w') as f:
+            json.dump({'ssid': 'sim', 'wpa2': 'sim'}, f)
+
+def main ():
+    args = arguments()
+    sim.clock.speed = args.speed
+    sim.clock.deadline = args.duration
+    sim.install(trace_heap=args.trace_heap)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bitboi-')
+    prepare(workdir, args.config)
+    os.chdir(workdir)
+    print(f'sim: flash at {workdir}')
+
+    if args.standin is not None:
+        from sim import standin
+        server = standin.serve(standin.arguments(['--port', '0', '--quiet'] + args.standin.split()))
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+        with open('config.json') as f:
+            values = json.load(f)
+        values.update(kraken_url=url, repository=url + '/github/', stream_url=url.replace('http', 'ws', 1) + '/ws')
+        with open('config.json', 'w') as f:
+            json.dump(values, f)
+        print(f'sim: stand-in at {url}')
+
+    from sim import image, ssd1306
+    displays = []
+    def record (display):
+        if not displays:
+            displays.append(display)
+        if args.frames:
+            os.makedirs(args.frames, exist_ok=True)
+            dump = image.png if args.format == 'png' else image.pbm
+            path = os.path.join(args.frames, f'{display.frames:05d}.{args.format}')
+            with open(path, 'wb') as f:
+                f.write(dump(display.panel, invert=display.inverted))
+    ssd1306.SSD1306.listeners.append(record)
+
+    for at, duration in args.press:
+        timer = threading.Timer(at / args.speed, sim.bootsel.press, (duration,))
+        timer.daemon = True
+        timer.start()
+
+    status = 0
+    try:
+        runpy.run_path(os.path.join(sim.ROOT, 'main.py'), run_name='__main__')
+    except (sim.Halt, sim.Reset, SystemExit) as e:
+        # main() ends with sys.exit(), which hides what stopped it
+        cause = e.__context__ if isinstance(e, SystemExit) else e
+        if isinstance(cause, sim.Halt):
+            print(f'sim: halted after {sim.clock.now():.1f} s')
+        elif isinstance(cause, sim.Reset):
+            print(f'sim: machine.reset() after {sim.clock.now():.1f} s')
+        else:
+            print(f'sim: exited after {sim.clock.now():.1f} s')
+    except KeyboardInterrupt:
+        status = 130
+    if displays:
+        print(f'sim: {displays[0].frames} frames shown')
+        if args.preview:
+            print(image.text(displays[0].panel))
+    # timers of the ticker may still be scheduled
+    sys.stdout.flush()
+    os._exit(status)
+
+if __name__ == '__main__':
+    main()
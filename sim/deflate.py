@@ -0,0 +1,45 @@
+'''
+deflate shim on top of zlib, as in firmware >= 1.21: DeflateIO
+inflates the stream it wraps while it's read, a chunk at a time.
+'''
+
+import zlib
+
+AUTO = 0
+RAW = 1
+ZLIB = 2
+GZIP = 3
+
+CHUNK = 256
+
+class DeflateIO:
+
+    def __init__ (self, stream, format=AUTO, wbits=0, close=False):
+        bits = wbits or 15
+        self.stream = stream
+        self._close = close
+        self.inflater = zlib.decompressobj({AUTO: 32 + bits, RAW: -bits, ZLIB: bits, GZIP: 16 + bits}[format])
+        self.pending = b''
+
+    def read (self, n=-1):
+        while (n is None or n < 0 or len(self.pending) < n) and not self.inflater.eof:
+            chunk = self.stream.read(CHUNK)
+            try:
+                self.pending += self.inflater.decompress(chunk) if chunk else self.inflater.flush()
+            except zlib.error as e:
+                raise OSError(str(e))
+            if not chunk:
+                break
+        if n is None or n < 0:
+            n = len(self.pending)
+        data, self.pending = self.pending[:n], self.pending[n:]
+        return data
+
+    def readinto (self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close (self):
+        if self._close:
+            self.stream.close()
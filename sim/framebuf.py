@@ -0,0 +1,149 @@
+'''
+framebuf shim in pure python for the monochrome formats.
+Text is drawn in 8x8 cells like on the device, but with a 5x7 font,
+so glyph shapes differ from the firmware's.
+'''
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+
+# 5x7 glyphs for ' ' to '~', one byte per column, lsb at the top
+_FONT = bytes.fromhex(
+    '0000000000' '00005f0000' '0007000700' '147f147f14' '242a7f2a12'
+    '2313086462' '3649552250' '0005030000' '001c224100' '0041221c00'
+    '14083e0814' '08083e0808' '0050300000' '0808080808' '0060600000'
+    '2010080402' '3e5149453e' '00427f4000' '4261514946' '2141454b31'
+    '1814127f10' '2745454539' '3c4a494930' '0171090503' '3649494936'
+    '064949291e' '0036360000' '0056360000' '0814224100' '1414141414'
+    '0041221408' '0201510906' '324979413e' '7e1111117e' '7f49494936'
+    '3e41414122' '7f4141221c' '7f49494941' '7f09090101' '3e41415132'
+    '7f0808087f' '00417f4100' '2040413f01' '7f08142241' '7f40404040'
+    '7f0204027f' '7f0408107f' '3e4141413e' '7f09090906' '3e4151215e'
+    '7f09192946' '4649494931' '01017f0101' '3f4040403f' '1f2040201f'
+    '7f2018207f' '6314081463' '0304780403' '6151494543' '007f414100'
+    '0204081020' '0041417f00' '0402010204' '4040404040' '0001020400'
+    '2054545478' '7f48444438' '3844444420' '384444487f' '3854545418'
+    '087e090102' '081454543c' '7f08040478' '00447d4000' '2040443d00'
+    '007f102844' '00417f4000' '7c04180478' '7c08040478' '3844444438'
+    '7c14141408' '081414187c' '7c08040408' '4854545420' '043f444020'
+    '3c4040207c' '1c2040201c' '3c4030403c' '4428102844' '0c5050503c'
+    '4464544c44' '0008364100' '00007f0000' '0041360800' '0201020402'
+)
+# drawn for characters outside of the font, like on the device
+_BOX = bytes.fromhex('7f7f7f7f7f')
+
+class FrameBuffer:
+
+    def __init__ (self, buffer, width, height, format, stride=None):
+        if format not in (MONO_VLSB, MONO_HLSB, MONO_HMSB):
+            raise ValueError('sim framebuf supports the monochrome formats only')
+        self.buffer = buffer
+        self.width = width
+        self.height = height
+        self.format = format
+        self.stride = width if stride is None else stride
+
+    # ---- pixel addressing ----
+    def _locate (self, x, y):
+        if self.format == MONO_VLSB:
+            return (y >> 3) * self.stride + x, 1 << (y & 7)
+        offset = (x + y * ((self.stride + 7) & ~7)) >> 3
+        if self.format == MONO_HLSB:
+            return offset, 0x80 >> (x & 7)
+        return offset, 1 << (x & 7)
+
+    def _get (self, x, y):
+        offset, mask = self._locate(x, y)
+        return 1 if self.buffer[offset] & mask else 0
+
+    def _set (self, x, y, c):
+        offset, mask = self._locate(x, y)
+        if c:
+            self.buffer[offset] |= mask
+        else:
+            self.buffer[offset] &= ~mask & 0xff
+
+    # ---- drawing ----
+    def pixel (self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    def fill (self, c):
+        value = 0xff if c else 0
+        for i in range(len(self.buffer)):
+            self.buffer[i] = value
+
+    def fill_rect (self, x, y, w, h, c):
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, self.width), min(y + h, self.height)
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                self._set(xx, yy, c)
+
+    def hline (self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline (self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect (self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line (self, x1, y1, x2, y2, c):
+        dx, dy = abs(x2 - x1), -abs(y2 - y1)
+        sx, sy = (1 if x1 < x2 else -1), (1 if y1 < y2 else -1)
+        error = dx + dy
+        while True:
+            self.pixel(x1, y1, c)
+            if x1 == x2 and y1 == y2:
+                break
+            double = 2 * error
+            if double >= dy:
+                error += dy
+                x1 += sx
+            if double <= dx:
+                error += dx
+                y1 += sy
+
+    def text (self, s, x, y, c=1):
+        for char in s:
+            code = ord(char)
+            glyph = _FONT[(code - 32) * 5:(code - 31) * 5] if 32 <= code < 127 else _BOX
+            for column, bits in enumerate(glyph):
+                for row in range(8):
+                    if bits >> row & 1:
+                        self.pixel(x + column, y + row, c)
+            x += 8
+
+    def scroll (self, xstep, ystep):
+        pixels = [[self._get(x, y) for x in range(self.width)] for y in range(self.height)]
+        for y in range(self.height):
+            for x in range(self.width):
+                sx, sy = x - xstep, y - ystep
+                if 0 <= sx < self.width and 0 <= sy < self.height:
+                    self._set(x, y, pixels[sy][sx])
+
+    def blit (self, source, x, y, key=-1, palette=None):
+        if isinstance(source, tuple):
+            source = FrameBuffer(*source)
+        if (x, y, key, palette) == (0, 0, -1, None) and (source.format, source.width, source.height, source.stride) == (self.format, self.width, self.height, self.stride):
+            # whole frame copies, e.g. core 0's canvas to the display
+            self.buffer[:len(source.buffer)] = source.buffer
+            return
+        for sy in range(source.height):
+            for sx in range(source.width):
+                c = source._get(sx, sy)
+                if palette is not None:
+                    c = palette.pixel(c, 0)
+                if c != key:
+                    self.pixel(x + sx, y + sy, c)
@@ -0,0 +1,216 @@
+'''
+Golden-frame regression harness: draws the ticker's pages with fixed
+inputs into the emulated display, compares every frame pixel by pixel
+with the bitmaps stored in sim/golden and reports the draw times.
+
+    python -m sim.golden                 # compare, exit 1 on mismatch
+    python -m sim.golden --update        # accept the current frames
+    python -m sim.golden --diff diffs/   # write PNGs of mismatches
+    python -m sim.golden --filter chart --repeat 50
+
+Runs headless, the display is an in-memory frame buffer. Text is drawn
+with the emulator's font, so the goldens pin the ticker's drawing code,
+not the firmware's glyphs.
+'''
+
+import argparse, math, os, sys, tempfile, time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDEN = os.path.join(HERE, 'golden')
+
+# ticker settings the frames are drawn with, independent of config.json
+SETTINGS = {'INTERVAL': 15, 'TREND_INTERVALS': 12, 'EPOCH': 128}
+
+NEWS = 'BTC ETF inflows hit record high while miners hold reserves. '
+
+def series (n, base=64000.0):
+
+    '''
+    Deterministic price series of n values.
+    '''
+
+    return [base * (1 + .03 * math.sin(i / 9) + .01 * math.sin(i * 1.7)) for i in range(n)]
+
+def candles (ticker, closes):
+
+    '''
+    Candle store with the given closes, opening at the previous close.
+    '''
+
+    store = ticker.candles.Candles(len(closes))
+    for i, c in enumerate(closes):
+        o = closes[i - 1] if i else c
+        spread = .002 * c * (1 + math.sin(i * 2.3))
+        store.push(1700000000 + 900 * i, o, max(o, c) + spread, min(o, c) - spread, c, 5 + 4 * math.sin(i / 3))
+    return store
+
+def frames (ticker):
+
+    '''
+    Returns (name, draw) pairs, draw() renders the frame onto a
+    cleared display.
+    '''
+
+    closed = series(SETTINGS['EPOCH'])
+    falling = series(SETTINGS['EPOCH'], 1830.0)[::-1]
+    flat = [100.0] * 127 + [100.5]
+    price = int(closed[-1])
+    feed = NEWS.encode()
+    ticker.news.buffer[:len(feed)] = feed
+    ticker.news.length = len(feed)
+    def news (pointer):
+        return lambda: ticker.show_news_feed_window(ticker.canvas, pointer, 11)
+    def composed ():
+        ticker.show_chart(closed, price)
+        news(7)()
+    def with_indicators (draw, overlay=False):
+        def run ():
+            ticker.engine.seed(closed, 0)
+            ticker.OVERLAY = overlay
+            try:
+                draw()
+            finally:
+                ticker.OVERLAY = False
+        return run
+    return [
+        ('price/5-digits', lambda: ticker.show_price(price)),
+        ('price/3-digits', lambda: ticker.show_price(987)),
+        ('price/millions', lambda: ticker.show_price(1234567)),
+        ('price/fraction', lambda: ticker.renderPrice(0.0123, 20, 10, 3)),
+        ('chart/rising', lambda: ticker.show_chart(closed, price)),
+        ('chart/falling', lambda: ticker.show_chart(falling, int(falling[-1]))),
+        ('chart/flat', lambda: ticker.plot_chart(ticker.canvas, flat, 32, 3)),
+        ('chart/candles', lambda: ticker.plot_candles(ticker.canvas, candles(ticker, closed))),
+        ('chart/bars', lambda: ticker.plot_candles(ticker.canvas, candles(ticker, closed), bars=True)),
+        ('chart/short', lambda: ticker.plot_chart(ticker.canvas, closed[-32:], 32, 3)),
+        ('chart/overlay', with_indicators(lambda: ticker.show_chart(closed, price), True)),
+        ('statistics', lambda: ticker.show_statistics(closed, price)),
+        ('statistics/falling', lambda: ticker.show_statistics(falling, int(falling[-1]))),
+        ('indicators', with_indicators(ticker.show_indicators)),
+        ('news/start', news(0)),
+        ('news/wrap', news(len(NEWS) - 4)),
+        ('chart+news', composed)
+    ]
+
+def load_ticker ():
+
+    '''
+    Imports the ticker under the emulator with the fixed settings.
+    '''
+
+    import sim
+    sim.install()
+    # no config.json, the defaults apply
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix='bitboi-golden-'))
+    try:
+        import ticker
+    finally:
+        os.chdir(cwd)
+    for name, value in SETTINGS.items():
+        setattr(ticker, name, value)
+    return ticker
+
+def path_of (name):
+    return os.path.join(GOLDEN, name.replace('/', '-') + '.pbm')
+
+def draw_time (ticker, draw, repeat):
+
+    '''
+    Median draw time in µs over repeat draws.
+    '''
+
+    times = []
+    for _ in range(repeat):
+        ticker.clear()
+        start = time.perf_counter()
+        draw()
+        times.append((time.perf_counter() - start) * 1e6)
+    times.sort()
+    return times[len(times) // 2]
+
+def compare (fb, golden):
+
+    '''
+    Returns the number of differing pixels and their bounding box.
+    '''
+
+    from sim import image
+    width, height, expected = image.read_pbm(golden)
+    if (width, height) != (fb.width, fb.height):
+        return width * height, (0, 0, width - 1, height - 1)
+    actual = image.rows(fb)
+    diff = [(x, y) for y in range(height) for x in range(width) if actual[y][x] != expected[y][x]]
+    if not diff:
+        return 0, None
+    xs, ys = [x for x, _ in diff], [y for _, y in diff]
+    return len(diff), (min(xs), min(ys), max(xs), max(ys))
+
+def diff_image (fb, golden):
+
+    '''
+    PNG with the pixels that differ lit.
+    '''
+
+    from sim import framebuf, image
+    _, _, expected = image.read_pbm(golden)
+    out = framebuf.FrameBuffer(bytearray(fb.width * fb.height // 8), fb.width, fb.height, framebuf.MONO_VLSB)
+    actual = image.rows(fb)
+    for y in range(fb.height):
+        for x in range(fb.width):
+            out.pixel(x, y, actual[y][x] ^ expected[y][x])
+    return image.png(out)
+
+def run (update=False, pattern='', repeat=20, diff=None):
+    from sim import image
+    ticker = load_ticker()
+    canvas = ticker.canvas
+    failed = []
+    print(f'{"frame":22}{"µs":>10}  result')
+    for name, draw in frames(ticker):
+        if pattern not in name:
+            continue
+        us = draw_time(ticker, draw, repeat)
+        ticker.clear()
+        draw()
+        golden = path_of(name)
+        if update:
+            os.makedirs(GOLDEN, exist_ok=True)
+            with open(golden, 'wb') as f:
+                f.write(image.pbm(canvas))
+            result = 'updated'
+        elif not os.path.exists(golden):
+            result = 'missing golden'
+            failed.append(name)
+        else:
+            with open(golden, 'rb') as f:
+                expected = f.read()
+            pixels, box = compare(canvas, expected)
+            if pixels:
+                result = f'{pixels} pixels differ in {box}'
+                failed.append(name)
+                if diff:
+                    os.makedirs(diff, exist_ok=True)
+                    with open(os.path.join(diff, name.replace('/', '-') + '.png'), 'wb') as f:
+                        f.write(diff_image(canvas, expected))
+                    with open(os.path.join(diff, name.replace('/', '-') + '.actual.png'), 'wb') as f:
+                        f.write(image.png(canvas))
+            else:
+                result = 'ok'
+        print(f'{name:22}{us:>10.1f}  {result}')
+    return failed
+
+def main ():
+    parser = argparse.ArgumentParser(prog='python -m sim.golden', description='Golden-frame render regression check.')
+    parser.add_argument('--update', action='store_true', help='store the current frames as goldens')
+    parser.add_argument('--filter', default='', help='only frames whose name contains this')
+    parser.add_argument('--repeat', type=int, default=20, help='draws per frame for the timing')
+    parser.add_argument('--diff', help='directory for diff images of mismatching frames')
+    args = parser.parse_args()
+    failed = run(args.update, args.filter, args.repeat, args.diff)
+    if failed:
+        print(f'{len(failed)} frames differ from their goldens: {", ".join(failed)}')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
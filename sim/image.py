@@ -0,0 +1,86 @@
+'''
+Image dumps of emulated frame buffers: PBM, PNG and text previews.
+'''
+
+import struct, zlib
+
+def rows (fb, invert=False):
+
+    '''
+    Returns the pixels of fb as list of rows of 0/1.
+    '''
+
+    return [[fb._get(x, y) ^ invert for x in range(fb.width)] for y in range(fb.height)]
+
+def _pack (row):
+    packed = bytearray((len(row) + 7) // 8)
+    for x, bit in enumerate(row):
+        if bit:
+            packed[x >> 3] |= 0x80 >> (x & 7)
+    return bytes(packed)
+
+def pbm (fb, invert=False):
+
+    '''
+    Binary PBM (P4), lit pixels are black.
+    '''
+
+    header = f'P4\n{fb.width} {fb.height}\n'.encode()
+    return header + b''.join(_pack(row) for row in rows(fb, invert))
+
+def read_pbm (data):
+
+    '''
+    Parses a binary PBM into (width, height, rows).
+    '''
+
+    fields = []
+    caret = 0
+    while len(fields) < 3:
+        while data[caret:caret + 1].isspace():
+            caret += 1
+        if data[caret:caret + 1] == b'#':
+            caret = data.index(b'\n', caret)
+            continue
+        end = caret
+        while not data[end:end + 1].isspace():
+            end += 1
+        fields.append(data[caret:end])
+        caret = end
+    if fields[0] != b'P4':
+        raise ValueError('not a binary PBM')
+    width, height = int(fields[1]), int(fields[2])
+    caret += 1
+    stride = (width + 7) // 8
+    result = []
+    for y in range(height):
+        line = data[caret + y * stride:caret + (y + 1) * stride]
+        result.append([(line[x >> 3] >> (7 - (x & 7))) & 1 for x in range(width)])
+    return width, height, result
+
+def png (fb, scale=4, invert=False):
+
+    '''
+    1-bit grayscale PNG, lit pixels are white like on the OLED.
+    '''
+
+    scaled = []
+    for row in rows(fb, invert):
+        wide = [bit for bit in row for _ in range(scale)]
+        scaled += [b'\x00' + _pack(wide)] * scale
+    def chunk (kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    header = struct.pack('>IIBBBBB', fb.width * scale, fb.height * scale, 1, 0, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(b''.join(scaled))) + chunk(b'IEND', b'')
+
+def text (fb, invert=False):
+
+    '''
+    Terminal preview, two pixel rows per character.
+    '''
+
+    pixels = rows(fb, invert)
+    if len(pixels) % 2:
+        pixels.append([0] * fb.width)
+    glyphs = ' ▄▀█'
+    return '\n'.join(''.join(glyphs[2 * top + bottom] for top, bottom in zip(pixels[y], pixels[y + 1])) for y in range(0, len(pixels), 2))
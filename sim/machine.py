@@ -0,0 +1,98 @@
+'''
+machine shim: pins and I²C do nothing, reset() ends the run.
+'''
+
+import threading
+from sim import Reset, clock
+
+class Pin:
+
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__ (self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        self._value = value or 0
+
+    def value (self, value=None):
+        if value is None:
+            return self._value
+        self._value = int(bool(value))
+
+    def __call__ (self, value=None):
+        return self.value(value)
+
+    def on (self):
+        self._value = 1
+
+    def off (self):
+        self._value = 0
+
+    def irq (self, handler=None, trigger=None):
+        pass
+
+class I2C:
+
+    def __init__ (self, id, scl=None, sda=None, freq=400000):
+        self.id = id
+        self.freq = freq
+
+    def scan (self):
+        return [0x3c]
+
+    def writeto (self, addr, buf, stop=True):
+        return len(buf)
+
+    def writevto (self, addr, vector, stop=True):
+        return sum(len(buf) for buf in vector)
+
+class Timer:
+
+    '''
+    Periodic and one-shot timers backed by a host thread, the
+    callback runs on that thread like a soft IRQ.
+    '''
+
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__ (self, id=-1, **kwargs):
+        self._stop = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init (self, mode=PERIODIC, period=-1, freq=-1, callback=None):
+        self.deinit()
+        period = 1 / freq if freq > 0 else period / 1000
+        stop = self._stop = threading.Event()
+        def run ():
+            while not stop.wait(period / clock.speed):
+                callback(self)
+                if mode == Timer.ONE_SHOT:
+                    break
+        threading.Thread(target=run, daemon=True).start()
+
+    def deinit (self):
+        if self._stop:
+            self._stop.set()
+
+def reset ():
+    raise Reset()
+
+def soft_reset ():
+    raise Reset()
+
+def freq (hz=None):
+    return 125000000
+
+def unique_id ():
+    return b'\xb1\x7b\x01\x00\x00\x00\x00\x00'
+
+def idle ():
+    pass
@@ -0,0 +1,51 @@
+'''
+micropython shim. The code emitters are no-ops, except that inline
+assembly is only emulated for read_bootsel(), which reads the virtual
+BOOTSEL button (see sim.bootsel).
+'''
+
+from sim import bootsel
+
+def const (value):
+    return value
+
+def native (function):
+    return function
+
+def viper (function):
+    return function
+
+def asm_thumb (function):
+    if function.__name__ != 'read_bootsel':
+        def unsupported (*args):
+            raise NotImplementedError(f'inline assembly {function.__name__} is not emulated')
+        return unsupported
+    # the pin reads low while the button is pressed
+    def read_bootsel ():
+        return 0 if bootsel.pressed else 1
+    return read_bootsel
+
+def opt_level (level=None):
+    return 0
+
+def alloc_emergency_exception_buf (size):
+    pass
+
+def schedule (function, argument):
+    function(argument)
+
+def heap_lock ():
+    return 0
+
+def heap_unlock ():
+    return 0
+
+def kbd_intr (char):
+    pass
+
+def mem_info (verbose=False):
+    import gc
+    print(f'heap: total {gc.mem_alloc() + gc.mem_free()}, used {gc.mem_alloc()}, free {gc.mem_free()}')
+
+def qstr_info (verbose=False):
+    pass
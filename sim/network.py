@@ -0,0 +1,51 @@
+'''
+network shim: the host's own connection stands in for the WLAN.
+'''
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_GOT_IP = 3
+
+class WLAN:
+
+    def __init__ (self, interface=STA_IF):
+        self.interface = interface
+        self._active = False
+        self._connected = False
+        self._config = {'essid': '', 'pm': 0}
+
+    def active (self, state=None):
+        if state is None:
+            return self._active
+        self._active = bool(state)
+
+    def connect (self, ssid=None, key=None, **kwargs):
+        if not self._active:
+            raise OSError('wifi not active')
+        self._config['essid'] = ssid
+        self._connected = True
+
+    def disconnect (self):
+        self._connected = False
+
+    def isconnected (self):
+        return self._active and (self._connected or self.interface == AP_IF)
+
+    def status (self, param=None):
+        return STAT_GOT_IP if self.isconnected() else STAT_IDLE
+
+    def config (self, *args, **kwargs):
+        if args:
+            return self._config.get(args[0])
+        self._config.update(kwargs)
+
+    def ifconfig (self, config=None):
+        if self.interface == AP_IF:
+            return ('192.168.4.1', '255.255.255.0', '192.168.4.1', '192.168.4.1')
+        return ('127.0.0.1', '255.0.0.0', '127.0.0.1', '127.0.0.1')
+
+    def scan (self):
+        return []
@@ -0,0 +1,8 @@
+'''
+rp2 shim, only the BOOTSEL button (see sim.bootsel).
+'''
+
+from sim import bootsel
+
+def bootsel_button ():
+    return 1 if bootsel.pressed else 0
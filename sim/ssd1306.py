@@ -0,0 +1,54 @@
+'''
+ssd1306 shim: the display is an in-memory frame buffer. Every show()
+takes a snapshot which can be dumped with sim.image.
+'''
+
+from sim import framebuf
+
+class SSD1306(framebuf.FrameBuffer):
+
+    # callables notified with the display after every show()
+    listeners = []
+
+    def __init__ (self, width, height, external_vcc=False):
+        self.external_vcc = external_vcc
+        self.pages = height // 8
+        self.inverted = False
+        self.powered = True
+        self.contrast_level = 255
+        self.frames = 0
+        super().__init__(bytearray(self.pages * width), width, height, framebuf.MONO_VLSB)
+        # what the panel shows, i.e. the buffer at the last show()
+        self.panel = framebuf.FrameBuffer(bytearray(self.pages * width), width, height, framebuf.MONO_VLSB)
+
+    def init_display (self):
+        self.fill(0)
+        self.show()
+
+    def poweroff (self):
+        self.powered = False
+
+    def poweron (self):
+        self.powered = True
+
+    def contrast (self, contrast):
+        self.contrast_level = contrast
+
+    def invert (self, invert):
+        self.inverted = bool(invert)
+
+    def rotate (self, rotate):
+        pass
+
+    def show (self):
+        self.panel.buffer[:] = self.buffer
+        self.frames += 1
+        for listener in self.listeners:
+            listener(self)
+
+class SSD1306_I2C(SSD1306):
+
+    def __init__ (self, width, height, i2c, addr=0x3C, external_vcc=False):
+        self.i2c = i2c
+        self.addr = addr
+        super().__init__(width, height, external_vcc)
@@ -0,0 +1,499 @@
+'''
+Local stand-in for the Kraken REST API and the github repository, to
+measure fetch paths reproducibly without the internet.
+
+    python -m sim.standin --port 8080 --latency 150 --bandwidth 8192
+    python -m sim.standin --chunked --error-rate .05 --rate-limit 1
+    python -m sim.standin --identity   # never compress replies
+    python -m sim.standin --record     # refresh fixtures from upstream
+
+Point the ticker at it in config.json:
+
+    "kraken_url": "http://127.0.0.1:8080",
+    "repository": "http://127.0.0.1:8080/github/"
+
+Kraken routes (/0/public/Time, OHLC, Ticker, AssetPairs) replay the
+responses recorded in sim/fixtures/kraken, or synthesize them from a
+deterministic price curve if nothing was recorded. /github/<name>
+replays sim/fixtures/github, falling back to the working tree, so the
+files manifest, news and the stack itself are served from checkout.
+/ws speaks Kraken's websocket api v1 for the ohlc and ticker channels
+of the synthetic curve ("stream_url": "ws://127.0.0.1:8080/ws"),
+--ws-drop closes each connection after a while to exercise reconnects.
+Replies are compressed if the client accepts gzip or deflate, unless
+--identity is given. Timings and sizes (as sent) of every reply are
+collected and served as JSON on /_stats.
+'''
+
+import argparse, base64, gzip, hashlib, json, math, os, random, select, ssl, struct, sys, threading, time, zlib
+import urllib.parse, urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+FIXTURES = os.path.join(HERE, 'fixtures')
+
+UPSTREAM = {
+    'kraken': 'https://api.kraken.com/0/public/',
+    'github': 'https://raw.githubusercontent.com/B0-B/bitboi/main/'
+}
+
+# base prices of the synthetic curve
+PAIRS = {
+    'XXBTZUSD': ('XBTUSD', 'XXBT', 'ZUSD', 64000.0),
+    'XETHZUSD': ('ETHUSD', 'XETH', 'ZUSD', 3100.0),
+    'SOLUSD': ('SOLUSD', 'SOL', 'ZUSD', 145.0),
+    'XXBTZEUR': ('XBTEUR', 'XXBT', 'ZEUR', 59000.0),
+    'XETHZEUR': ('ETHEUR', 'XETH', 'ZEUR', 2850.0)
+}
+
+RATE_LIMITED = b'{"error":["EAPI:Rate limit exceeded"],"result":{}}'
+UNAVAILABLE = b'{"error":["EService:Unavailable"],"result":{}}'
+WS_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+# ---- synthetic kraken ----
+def _pair (name):
+
+    '''
+    Resolves a requested pair (XBTUSD, XXBTZUSD, ...) to its kraken name.
+    '''
+
+    name = name.upper()
+    for key, (altname, *_) in PAIRS.items():
+        if name in (key, altname):
+            return key
+    return None
+
+def _asset (name):
+
+    '''
+    Short name of an asset, XXBT -> XBT, ZUSD -> USD, SOL -> SOL.
+    '''
+
+    return name[1:] if len(name) == 4 and name[0] in 'XZ' else name
+
+def price (pair, t):
+
+    '''
+    Deterministic price of pair at unix time t: a few superimposed
+    cycles and noise seeded by the timestamp.
+    '''
+
+    base = PAIRS[pair][3]
+    noise = random.Random(f'{pair}{int(t) // 60}').gauss(0, .0015)
+    cycles = .04 * math.sin(t / 259200) + .015 * math.sin(t / 21600) + .004 * math.sin(t / 1800)
+    return base * (1 + cycles + noise)
+
+def ticker (pair, now):
+
+    '''
+    Ticker fields of pair at unix time now.
+    '''
+
+    last, open_ = price(pair, now), price(pair, now - now % 86400)
+    return {'a': [f'{last * 1.0001:.1f}', '1', '1.000'], 'b': [f'{last * .9999:.1f}', '1', '1.000'],
+            'c': [f'{last:.1f}', '0.01'], 'v': ['1000.0', '2000.0'], 'p': [f'{last:.1f}', f'{last:.1f}'],
+            't': [1000, 2000], 'l': [f'{last * .98:.1f}', f'{last * .97:.1f}'],
+            'h': [f'{last * 1.02:.1f}', f'{last * 1.03:.1f}'], 'o': f'{open_:.1f}'}
+
+def ohlc (pair, interval, now):
+
+    '''
+    The running candle of pair as pushed on the ohlc channel.
+    '''
+
+    step = interval * 60
+    start = now - now % step
+    o, c = price(pair, start), price(pair, now)
+    h, l = max(o, c) * 1.001, min(o, c) * .999
+    return [f'{now:.6f}', f'{start + step:.6f}', f'{o:.1f}', f'{h:.1f}', f'{l:.1f}', f'{c:.1f}', f'{(o + c) / 2:.1f}', '12.34567890', 250]
+
+def synthetic (endpoint, query, now):
+    error, result = [], None
+    if endpoint == 'Time':
+        result = {'unixtime': int(now), 'rfc1123': time.strftime('%a, %d %b %y %H:%M:%S +0000', time.gmtime(now))}
+    elif endpoint == 'AssetPairs':
+        result = {key: {'altname': altname, 'wsname': f'{_asset(base)}/{_asset(quote)}', 'base': base, 'quote': quote,
+                        'pair_decimals': 1, 'lot_decimals': 8, 'margin_call': 80, 'margin_stop': 40}
+                  for key, (altname, base, quote, _) in PAIRS.items()}
+    elif endpoint in ('OHLC', 'Ticker'):
+        pair = _pair(query.get('pair', ''))
+        if not pair:
+            error = ['EQuery:Unknown asset pair']
+        elif endpoint == 'Ticker':
+            result = {pair: ticker(pair, now)}
+        else:
+            step = int(query.get('interval', 1)) * 60
+            last = int(now) - int(now) % step
+            # kraken returns at most 720 candles
+            first = max(int(query.get('since', 0)) // step * step, last - 719 * step)
+            rows = []
+            for t in range(first, last + 1, step):
+                o, c = price(pair, t), price(pair, min(t + step - 1, now))
+                h, l = max(o, c) * 1.001, min(o, c) * .999
+                rows.append([t, f'{o:.1f}', f'{h:.1f}', f'{l:.1f}', f'{c:.1f}', f'{(o + c) / 2:.1f}', '12.34567890', 250])
+            result = {pair: rows, 'last': last}
+    else:
+        error = ['EGeneral:Unknown method']
+    # kraken replies without whitespace
+    return json.dumps({'error': error, 'result': result if result is not None else {}}, separators=(',', ':')).encode()
+
+# ---- fixtures ----
+def fixture_path (kind, endpoint, query):
+    name = endpoint
+    if kind == 'kraken' and 'pair' in query:
+        name += '-' + query['pair'].upper()
+        if 'interval' in query:
+            name += '-' + query['interval']
+    return os.path.join(FIXTURES, kind, name.replace('/', '_'))
+
+def record (kind, endpoint, query, path):
+    url = UPSTREAM[kind] + endpoint
+    if query:
+        url += '?' + urllib.parse.urlencode(query)
+    with urllib.request.urlopen(url, timeout=30) as response:
+        body = response.read()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(body)
+    return body
+
+# ---- server ----
+class Stats:
+
+    def __init__ (self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def add (self, route, status, size, seconds):
+        with self.lock:
+            entry = self.routes.setdefault(route, {'requests': 0, 'bytes': 0, 'seconds': 0.0, 'statuses': {}})
+            entry['requests'] += 1
+            entry['bytes'] += size
+            entry['seconds'] += seconds
+            entry['statuses'][str(status)] = entry['statuses'].get(str(status), 0) + 1
+
+    def report (self):
+        with self.lock:
+            return {route: dict(entry, mean_ms=round(1000 * entry['seconds'] / entry['requests'], 1))
+                    for route, entry in self.routes.items()}
+
+class StandIn(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    def __init__ (self, address, options):
+        super().__init__(address, Handler)
+        self.options = options
+        self.random = random.Random(options.seed)
+        self.stats = Stats()
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def chance (self, rate):
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def admit (self, client):
+
+        '''
+        Token bucket per client, rate_limit requests per second with a
+        burst of the same size. Returns False when the client is over.
+        '''
+
+        rate = self.options.rate_limit
+        if not rate:
+            return True
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.get(client, (rate, now))
+            tokens = min(rate, tokens + (now - last) * rate)
+            admitted = tokens >= 1
+            self.buckets[client] = (tokens - admitted, now)
+            return admitted
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message (self, format, *args):
+        if not self.server.options.quiet:
+            sys.stderr.write(f'{self.address_string()} {format % args}\n')
+
+    def route (self):
+
+        '''
+        Returns (route, status, content type, body, extra headers) or
+        None if the connection should be dropped.
+        '''
+
+        server, options = self.server, self.server.options
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        if url.path == '/_stats':
+            return '_stats', 200, 'application/json', json.dumps(server.stats.report()).encode(), {}
+        if url.path.startswith('/0/public/'):
+            kind, endpoint = 'kraken', url.path[len('/0/public/'):]
+        elif url.path.startswith('/github/'):
+            kind, endpoint = 'github', url.path[len('/github/'):]
+        else:
+            return url.path, 404, 'text/plain', b'Not Found', {}
+        route = f'{kind}/{endpoint}'
+        content_type = 'application/json' if kind == 'kraken' else 'text/plain'
+
+        # injected faults
+        if not server.admit(self.client_address[0]):
+            if kind == 'kraken':
+                # kraken answers over the limit with 200 and an error
+                return route, 200, content_type, RATE_LIMITED, {}
+            return route, 429, 'text/plain', b'Too Many Requests', {'Retry-After': '1'}
+        if server.chance(options.drop_rate):
+            return None
+        if server.chance(options.error_rate):
+            if kind == 'kraken' and server.chance(.5):
+                return route, 200, content_type, UNAVAILABLE, {}
+            return route, server.random.choice((500, 502, 503, 504)), 'text/plain', b'Service Unavailable', {}
+
+        path = fixture_path(kind, endpoint, query)
+        if options.record:
+            return route, 200, content_type, record(kind, endpoint, query, path), {}
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                return route, 200, content_type, f.read(), {}
+        if kind == 'kraken':
+            return route, 200, content_type, synthetic(endpoint, query, time.time()), {}
+        local = os.path.normpath(os.path.join(ROOT, endpoint))
+        if local.startswith(ROOT + os.sep) and os.path.isfile(local):
+            with open(local, 'rb') as f:
+                return route, 200, content_type, f.read(), {}
+        return route, 404, 'text/plain', b'404: Not Found', {}
+
+    def encoding (self):
+
+        '''
+        Content encoding of the reply, the first of gzip and deflate the
+        client accepts, None to send it as is.
+        '''
+
+        if self.server.options.identity:
+            return None
+        accepted = [value.split(';')[0].strip() for value in self.headers.get('Accept-Encoding', '').split(',')]
+        for encoding in ('gzip', 'deflate'):
+            if encoding in accepted:
+                return encoding
+        return None
+
+    def send (self, data):
+
+        '''
+        Writes data capped to the configured bandwidth.
+        '''
+
+        bandwidth = self.server.options.bandwidth
+        if not bandwidth:
+            self.wfile.write(data)
+            return
+        # pace in slices of 50 ms worth of bytes
+        step = max(1, bandwidth // 20)
+        for i in range(0, len(data), step):
+            self.wfile.write(data[i:i + step])
+            self.wfile.flush()
+            time.sleep(len(data[i:i + step]) / bandwidth)
+
+    # ---- websocket ----
+    def frame (self, payload, opcode=1):
+        length = len(payload)
+        if length < 126:
+            head = struct.pack('!BB', 0x80 | opcode, length)
+        elif length < 65536:
+            head = struct.pack('!BBH', 0x80 | opcode, 126, length)
+        else:
+            head = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+        self.wfile.write(head + payload)
+        self.wfile.flush()
+
+    def read_frame (self):
+
+        '''
+        Returns (opcode, payload) of the next client frame.
+        '''
+
+        def read (n):
+            data = b''
+            while len(data) < n:
+                chunk = self.raw.read(n - len(data))
+                if not chunk:
+                    raise ConnectionError('closed')
+                data += chunk
+            return data
+        first, second = read(2)
+        length = second & 0x7f
+        if length == 126:
+            length, = struct.unpack('!H', read(2))
+        elif length == 127:
+            length, = struct.unpack('!Q', read(8))
+        mask = read(4) if second & 0x80 else b'\0\0\0\0'
+        payload = bytes(b ^ mask[i & 3] for i, b in enumerate(read(length)))
+        return first & 0x0f, payload
+
+    def subscribe (self, request, subscriptions):
+        channels = []
+        for name in request.get('pair', []):
+            pair = _pair(name.replace('/', ''))
+            subscription = request.get('subscription', {})
+            status = {'event': 'subscriptionStatus', 'pair': name, 'subscription': subscription}
+            if not pair or subscription.get('name') not in ('ohlc', 'ticker'):
+                status.update(status='error', errorMessage='Currency pair not supported' if not pair else 'Subscription name invalid')
+            else:
+                channel = 100 + len(subscriptions)
+                interval = subscription.get('interval', 1) if subscription['name'] == 'ohlc' else 0
+                name_ = f'ohlc-{interval}' if interval else 'ticker'
+                subscriptions.append((channel, pair, name, interval))
+                status.update(status='subscribed', channelID=channel, channelName=name_)
+            channels.append(status)
+        return channels
+
+    def websocket (self):
+        options = self.server.options
+        key = self.headers.get('Sec-WebSocket-Key', '').encode()
+        accept = base64.b64encode(hashlib.sha1(key + WS_GUID).digest()).decode()
+        self.send_response(101)
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept)
+        self.end_headers()
+        self.close_connection = True
+        # unbuffered, so select sees every frame not yet read. Clients
+        # only send after the handshake, nothing is left in rfile.
+        self.raw = self.connection.makefile('rb', 0)
+        opened = time.monotonic()
+        subscriptions = []
+        self.frame(json.dumps({'event': 'systemStatus', 'status': 'online', 'version': '1.9.0'}).encode())
+        due = time.monotonic()
+        try:
+            while not options.ws_drop or time.monotonic() - opened < options.ws_drop:
+                if select.select([self.connection], [], [], max(0, due - time.monotonic()))[0]:
+                    opcode, payload = self.read_frame()
+                    if opcode == 8:
+                        self.frame(b'', 8)
+                        return
+                    if opcode == 9:
+                        self.frame(payload, 10)
+                    elif opcode == 1:
+                        request = json.loads(payload)
+                        if request.get('event') == 'subscribe':
+                            for status in self.subscribe(request, subscriptions):
+                                self.frame(json.dumps(status).encode())
+                        elif request.get('event') == 'ping':
+                            self.frame(json.dumps({'event': 'pong', 'reqid': request.get('reqid')}).encode())
+                    continue
+                if time.monotonic() < due:
+                    continue
+                due += options.ws_period
+                now = time.time()
+                if not subscriptions:
+                    self.frame(b'{"event":"heartbeat"}')
+                for channel, pair, name, interval in subscriptions:
+                    if interval:
+                        message = [channel, ohlc(pair, interval, now), f'ohlc-{interval}', name]
+                    else:
+                        message = [channel, ticker(pair, now), 'ticker', name]
+                    self.frame(json.dumps(message).encode())
+            self.frame(struct.pack('!H', 1001), 8)
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            self.server.stats.add('ws', 101, 0, time.monotonic() - opened)
+
+    def do_GET (self):
+        start = time.monotonic()
+        options = self.server.options
+        if urllib.parse.urlsplit(self.path).path == '/ws' and self.headers.get('Upgrade', '').lower() == 'websocket':
+            return self.websocket()
+        reply = self.route()
+        if reply is None:
+            self.close_connection = True
+            self.server.stats.add('dropped', 0, 0, time.monotonic() - start)
+            return
+        route, status, content_type, body, headers = reply
+        encoding = self.encoding()
+        if encoding:
+            body = gzip.compress(body) if encoding == 'gzip' else zlib.compress(body)
+            headers = dict(headers, **{'Content-Encoding': encoding})
+
+        # time to first byte
+        delay = options.latency + (self.server.random.uniform(0, options.jitter) if options.jitter else 0)
+        time.sleep(delay / 1000)
+
+        chunked = options.chunked and status == 200
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if chunked:
+            size = options.chunk_size
+            for i in range(0, len(body), size):
+                chunk = body[i:i + size]
+                self.send(b'%x\r\n' % len(chunk) + chunk + b'\r\n')
+            self.send(b'0\r\n\r\n')
+        else:
+            self.send(body)
+        self.wfile.flush()
+        self.server.stats.add(route, status, len(body), time.monotonic() - start)
+
+def arguments (argv=None):
+    parser = argparse.ArgumentParser(prog='python -m sim.standin', description='Local Kraken and github stand-in.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0, help='time to first byte in ms')
+    parser.add_argument('--jitter', type=float, default=0, help='uniform extra latency in ms')
+    parser.add_argument('--bandwidth', type=int, default=0, help='bytes per second per connection, 0 is unlimited')
+    parser.add_argument('--chunked', action='store_true', help='send successful replies with chunked encoding')
+    parser.add_argument('--chunk-size', type=int, default=512)
+    parser.add_argument('--error-rate', type=float, default=0, help='share of replies replaced by server errors')
+    parser.add_argument('--drop-rate', type=float, default=0, help='share of connections closed without reply')
+    parser.add_argument('--rate-limit', type=float, default=0, help='requests per second per client, 0 is unlimited')
+    parser.add_argument('--identity', action='store_true', help='never compress replies, whatever the client accepts')
+    parser.add_argument('--ws-period', type=float, default=1, help='seconds between websocket updates')
+    parser.add_argument('--ws-drop', type=float, default=0, help='close websocket connections after this many seconds, 0 keeps them')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the injected faults')
+    parser.add_argument('--record', action='store_true', help='forward to upstream and store the replies as fixtures')
+    parser.add_argument('--cert', help='certificate to serve https with')
+    parser.add_argument('--key', help='private key of the certificate')
+    parser.add_argument('--quiet', action='store_true')
+    return parser.parse_args(argv)
+
+def serve (options):
+
+    '''
+    Starts the stand-in on a background thread and returns the server,
+    e.g. for benchmarks: serve(arguments(['--port', '0'])).
+    '''
+
+    server = StandIn((options.host, options.port), options)
+    if options.cert:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(options.cert, options.key)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main ():
+    options = arguments()
+    server = serve(options)
+    scheme = 'https' if options.cert else 'http'
+    print(f'stand-in on {scheme}://{options.host}:{server.server_address[1]}', flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(json.dumps(server.stats.report(), indent=2))
+
+if __name__ == '__main__':
+    main()
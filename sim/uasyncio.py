@@ -0,0 +1,44 @@
+'''
+uasyncio shim on top of asyncio.
+MicroPython runs plain generators as tasks, CPython does not - such
+tasks (the portal's catch-all DNS server) are skipped with a note.
+'''
+
+import asyncio, inspect
+from asyncio import *
+
+async def sleep_ms (ms):
+    await asyncio.sleep(ms / 1000)
+
+class _Loop:
+
+    def __init__ (self):
+        self.loop = asyncio.new_event_loop()
+
+    def create_task (self, coroutine):
+        if not inspect.iscoroutine(coroutine):
+            print(f'sim: {getattr(coroutine, "__name__", coroutine)} is not a coroutine, not emulated')
+            return None
+        return self.loop.create_task(coroutine)
+
+    def run_forever (self):
+        self.loop.run_forever()
+
+    def run_until_complete (self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def stop (self):
+        self.loop.stop()
+
+_loop = None
+
+def get_event_loop (runq_len=0, waitq_len=0):
+    global _loop
+    if _loop is None:
+        _loop = _Loop()
+    return _loop
+
+def new_event_loop ():
+    global _loop
+    _loop = None
+    return get_event_loop()
@@ -0,0 +1,66 @@
+'''
+urequests shim on top of urllib. Like on the device, HTTP error
+statuses are returned as responses, connection failures raise OSError,
+certificates are not verified and chunked replies are not supported.
+'''
+
+import io, json as _json, ssl
+import urllib.error, urllib.request
+
+_context = ssl._create_unverified_context()
+
+class Response:
+
+    def __init__ (self, status_code, reason, headers, content):
+        self.status_code = status_code
+        self.reason = reason.encode() if isinstance(reason, str) else reason
+        self.headers = headers
+        self.content = content
+        self.raw = io.BytesIO(content)
+        self.encoding = 'utf-8'
+
+    @property
+    def text (self):
+        return self.content.decode(self.encoding)
+
+    def json (self):
+        return _json.loads(self.content)
+
+    def close (self):
+        self.raw.close()
+
+def request (method, url, data=None, json=None, headers=None, stream=None, auth=None, timeout=None, parse_headers=True):
+    headers = dict(headers or {})
+    if json is not None:
+        data = _json.dumps(json)
+        headers.setdefault('Content-Type', 'application/json')
+    if isinstance(data, str):
+        data = data.encode()
+    req = urllib.request.Request(url, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout, context=_context) as response:
+            if 'chunked' in response.headers.get('Transfer-Encoding', ''):
+                raise ValueError('Unsupported Transfer-Encoding: chunked')
+            return Response(response.status, response.reason, dict(response.headers), response.read())
+    except urllib.error.HTTPError as e:
+        return Response(e.code, e.reason, dict(e.headers), e.read())
+    except (urllib.error.URLError, TimeoutError) as e:
+        raise OSError(str(e))
+
+def head (url, **kw):
+    return request('HEAD', url, **kw)
+
+def get (url, **kw):
+    return request('GET', url, **kw)
+
+def post (url, **kw):
+    return request('POST', url, **kw)
+
+def put (url, **kw):
+    return request('PUT', url, **kw)
+
+def patch (url, **kw):
+    return request('PATCH', url, **kw)
+
+def delete (url, **kw):
+    return request('DELETE', url, **kw)
@@ -0,0 +1,5 @@
+'''
+usocket shim, the host's sockets.
+'''
+
+from socket import *
@@ -0,0 +1,46 @@
+'''
+utime shim running on the emulated clock (see sim.clock).
+'''
+
+import time as _time
+from sim import clock
+
+# MicroPython ticks wrap around at 2**30
+_PERIOD = 1 << 30
+_HALF = _PERIOD >> 1
+
+def sleep (seconds):
+    clock.sleep(seconds)
+
+def sleep_ms (ms):
+    clock.sleep(ms / 1000)
+
+def sleep_us (us):
+    clock.sleep(us / 1000000)
+
+def ticks_ms ():
+    return int(clock.now() * 1000) % _PERIOD
+
+def ticks_us ():
+    return int(clock.now() * 1000000) % _PERIOD
+
+def ticks_cpu ():
+    return ticks_us()
+
+def ticks_add (ticks, delta):
+    return (ticks + delta) % _PERIOD
+
+def ticks_diff (end, start):
+    return (end - start + _HALF) % _PERIOD - _HALF
+
+def time ():
+    return int(_time.time())
+
+def time_ns ():
+    return _time.time_ns()
+
+def localtime (seconds=None):
+    return _time.localtime(seconds)[:8]
+
+def gmtime (seconds=None):
+    return _time.gmtime(seconds)[:8]
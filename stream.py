@@ -0,0 +1,295 @@
+#####################################################################################
+#####################################################################################
+# Price Stream © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Minimal WebSocket client for Kraken's public feed (websocket api v1).
+# Subscribes to the ohlc and ticker channels of one pair and keeps the
+# closed price series current between REST backfills:
+#     feed = stream.Feed('wss://ws.kraken.com', 'XBT/USD', 15, 128)
+#     feed.backfill(closed, end)  # series and candle end time from REST
+#     feed.service(100)           # True if the series changed
+# A lost connection is retried with backoff and resubscribed, after
+# which the series needs a new backfill.
+#####################################################################################
+#####################################################################################
+
+import json, select, usocket
+from binascii import b2a_base64
+from os import urandom
+from utime import sleep_ms, ticks_add, ticks_ms, ticks_diff
+
+# opcodes
+CONTINUATION = 0
+TEXT = 1
+BINARY = 2
+CLOSE = 8
+PING = 9
+PONG = 10
+
+MAX_MESSAGE = 4096      # larger messages are refused
+TIMEOUT = 10            # seconds for connecting and reading a started frame
+BACKOFF_MS = 1000       # first reconnect delay, doubled up to MAX_BACKOFF_MS
+MAX_BACKOFF_MS = 60000
+
+class WebSocket:
+
+    '''
+    Blocking client connection, text messages only.
+    '''
+
+    def __init__ (self, url, timeout=TIMEOUT):
+        scheme, _, rest = url.partition('://')
+        host, _, path = rest.partition('/')
+        host, _, port = host.partition(':')
+        secure = self.secure = scheme == 'wss'
+        port = int(port) if port else (443 if secure else 80)
+        address = usocket.getaddrinfo(host, port, 0, usocket.SOCK_STREAM)[0][-1]
+        self.socket = usocket.socket(usocket.AF_INET, usocket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        try:
+            self.socket.connect(address)
+            if secure:
+                import ssl
+                self.io = ssl.wrap_socket(self.socket, server_hostname=host)
+            else:
+                # on MicroPython the socket itself
+                self.io = self.socket.makefile('rwb', 0)
+            # polled through the ssl object, which knows of records it
+            # has decrypted ahead, the raw socket doesn't
+            self.poller = select.poll()
+            self.poller.register(self.io if secure else self.socket, select.POLLIN)
+            self._handshake(host, '/' + path)
+        except:
+            self.socket.close()
+            raise
+
+    def _read (self, n):
+        data = b''
+        while len(data) < n:
+            chunk = self.io.read(n - len(data))
+            if not chunk:
+                raise OSError('connection closed')
+            data += chunk
+        return data
+
+    def _handshake (self, host, path):
+        key = b2a_base64(urandom(16)).strip()
+        self.io.write(b'GET ' + path.encode() + b' HTTP/1.1\r\nHost: ' + host.encode() + b'\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: ' + key + b'\r\nSec-WebSocket-Version: 13\r\n\r\n')
+        head = b''
+        while not head.endswith(b'\r\n\r\n'):
+            head += self._read(1)
+            if len(head) > 2048:
+                raise OSError('handshake too large')
+        status = head.split(b'\r\n', 1)[0]
+        if b' 101 ' not in status + b' ':
+            raise OSError('handshake failed: ' + status.decode())
+
+    def send (self, text, opcode=TEXT):
+        payload = text.encode() if isinstance(text, str) else text
+        length = len(payload)
+        if length < 126:
+            head = bytes((0x80 | opcode, 0x80 | length))
+        elif length < 65536:
+            head = bytes((0x80 | opcode, 0x80 | 126, length >> 8, length & 0xff))
+        else:
+            raise ValueError('message too large')
+        # client frames are masked
+        mask = urandom(4)
+        masked = bytearray(payload)
+        for i in range(length):
+            masked[i] ^= mask[i & 3]
+        self.io.write(head + mask + masked)
+
+    def readable (self, timeout_ms):
+        # CPython's ssl sockets poll their raw socket, unlike MicroPython's
+        pending = getattr(self.io, 'pending', None)
+        if pending and pending():
+            return True
+        return bool(self.poller.poll(timeout_ms))
+
+    def receive (self):
+
+        '''
+        Reads the next message, answers pings. Returns the text of a
+        text message, None for control frames, raises OSError once
+        the server closes.
+        '''
+
+        message = b''
+        while True:
+            head = self._read(2)
+            final = head[0] & 0x80
+            opcode = head[0] & 0x0f
+            length = head[1] & 0x7f
+            if length == 126:
+                extended = self._read(2)
+                length = extended[0] << 8 | extended[1]
+            elif length == 127:
+                extended = self._read(8)
+                length = 0
+                for byte in extended:
+                    length = length << 8 | byte
+            if head[1] & 0x80:
+                mask = self._read(4)
+            if length > MAX_MESSAGE:
+                raise OSError('message too large')
+            payload = self._read(length) if length else b''
+            if head[1] & 0x80:
+                payload = bytes(payload[i] ^ mask[i & 3] for i in range(length))
+            if opcode == PING:
+                self.send(payload, PONG)
+                return None
+            if opcode == CLOSE:
+                raise OSError('closed by server')
+            if opcode >= CLOSE:
+                return None
+            message += payload
+            if len(message) > MAX_MESSAGE:
+                raise OSError('message too large')
+            if final:
+                return message.decode() if opcode != BINARY else message
+
+    def close (self):
+        try:
+            self.send(b'', CLOSE)
+        except Exception:
+            pass
+        # closing the ssl object closes the socket beneath
+        (self.io if self.secure else self.socket).close()
+
+class Feed:
+
+    '''
+    Closing prices of one pair kept current by the ohlc and ticker
+    channels. The series is only updated once backfilled.
+    '''
+
+    def __init__ (self, url, pair, interval, size):
+        self.url = url
+        self.pair = pair
+        self.interval = interval
+        self.size = size
+        self.closed = []
+        self.end = 0            # end time (s) of the newest candle
+        self.price = None       # last trade
+        # called with (start, open, high, low, close, volume) of the
+        # newest candle whenever it changes, e.g. a resampler
+        self.sink = None
+        self.candle = None
+        self.backfilled = False
+        self.socket = None
+        self.backoff = BACKOFF_MS
+        self.retry = ticks_ms()
+        self.messages = 0
+        self.reconnects = 0
+
+    def backfill (self, closed, end):
+
+        '''
+        Takes over the series from REST, end is the end time of its
+        newest, still open candle.
+        '''
+
+        self.closed = closed[-self.size:]
+        self.end = end
+        self.backfilled = True
+
+    def connect (self):
+        self.socket = WebSocket(self.url)
+        for subscription in ({'name': 'ohlc', 'interval': self.interval}, {'name': 'ticker'}):
+            self.socket.send(json.dumps({'event': 'subscribe', 'pair': [self.pair], 'subscription': subscription}))
+        self.backoff = BACKOFF_MS
+
+    def disconnect (self):
+        if self.socket:
+            self.socket.close()
+            self.socket = None
+        # candles may be missed until the next connection
+        self.backfilled = False
+
+    def _fail (self, e):
+        print('stream:', e)
+        self.disconnect()
+        self.reconnects += 1
+        self.retry = ticks_add(ticks_ms(), self.backoff)
+        self.backoff = min(MAX_BACKOFF_MS, 2 * self.backoff)
+
+    def handle (self, message):
+
+        '''
+        Applies a message, returns True if the series changed.
+        '''
+
+        data = json.loads(message)
+        if isinstance(data, dict):
+            if data.get('event') == 'subscriptionStatus' and data.get('status') == 'error':
+                raise OSError(data.get('errorMessage', 'subscription failed'))
+            return False
+        if not self.backfilled or len(data) < 4 or not self.closed:
+            return False
+        channel = data[-2]
+        if channel == 'ticker':
+            price = float(data[1]['c'][0])
+            changed = price != self.price
+            self.price = self.closed[-1] = price
+            if changed and self.candle:
+                start, o, h, l, _, v = self.candle
+                self._sink(start, o, max(h, price), min(l, price), price, v)
+            return changed
+        if channel.startswith('ohlc'):
+            candle = data[1]
+            end = int(float(candle[1]))
+            close = float(candle[5])
+            if end > self.end:
+                # a new candle opened
+                self.closed.append(close)
+                if len(self.closed) > self.size:
+                    self.closed.pop(0)
+                self.end = end
+            elif end == self.end:
+                self.closed[-1] = close
+            else:
+                return False
+            self._sink(end - self.interval * 60, float(candle[2]), float(candle[3]), float(candle[4]), close, float(candle[7]))
+            return True
+        return False
+
+    def _sink (self, *candle):
+        self.candle = candle
+        if self.sink:
+            self.sink(*candle)
+
+    def service (self, timeout_ms):
+
+        '''
+        Processes the messages arriving within timeout_ms, returns True
+        if the series or price changed. Reconnects when due.
+        '''
+
+        if not self.socket:
+            if ticks_diff(ticks_ms(), self.retry) < 0:
+                sleep_ms(timeout_ms)
+                return False
+            try:
+                self.connect()
+            except Exception as e:
+                self._fail(e)
+                return False
+        changed = False
+        try:
+            start = ticks_ms()
+            while True:
+                remaining = timeout_ms - ticks_diff(ticks_ms(), start)
+                if remaining <= 0 or not self.socket.readable(remaining):
+                    return changed
+                message = self.socket.receive()
+                if message:
+                    self.messages += 1
+                    changed = self.handle(message) or changed
+        except Exception as e:
+            self._fail(e)
+            return changed
+
+    def close (self):
+        self.disconnect()
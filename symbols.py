@@ -0,0 +1,153 @@
+#####################################################################################
+#####################################################################################
+# Symbol Table © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Kraken's tradable pairs of one reference currency, kept on flash:
+#     table = symbols.load('USD')         # no network, may be empty
+#     table.get('XBT')                    # 'XXBTZUSD', O(1)
+#     table.search('DO')                  # ['DOT', ...] for pickers
+#     pairs = symbols.scan(response.raw.read, 'USD')
+# The AssetPairs reply is scanned while it downloads, only the name
+# and wsname of every pair are kept, so the table is built without
+# holding the reply. The name is the key kraken's replies are keyed
+# by, e.g. OHLC results. It is refreshed once TTL passed.
+#####################################################################################
+#####################################################################################
+
+PATH = 'symbols.txt'
+TTL = 86400             # seconds until the table is fetched again
+RETRY = 3600            # seconds until a failed fetch is retried
+CHUNK = 512
+TAIL = 48               # bytes kept of a chunk, enough for a pair name and a marker
+
+ALTNAME = b'"altname"'
+WSNAME = b'"wsname"'
+
+class Table:
+
+    '''
+    Base symbol -> pair name of one reference, e.g. XBT -> XXBTZUSD.
+    '''
+
+    def __init__ (self, ref, pairs=None, fetched=0):
+        self.ref = ref
+        self.pairs = pairs or {}
+        self.fetched = fetched  # server time (s) of the download
+        self.failed = 0         # server time (s) of the last failed refresh
+        self.bases = sorted(self.pairs)
+
+    def __len__ (self):
+        return len(self.pairs)
+
+    def __contains__ (self, base):
+        return base in self.pairs
+
+    def get (self, base, default=None):
+        return self.pairs.get(base, default)
+
+    def search (self, prefix, limit=8):
+
+        '''
+        Bases starting with prefix, in order, at most limit.
+        '''
+
+        # binary search for the first base >= prefix
+        low, high = 0, len(self.bases)
+        while low < high:
+            middle = (low + high) // 2
+            if self.bases[middle] < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        while low < len(self.bases) and len(found) < limit and self.bases[low].startswith(prefix):
+            found.append(self.bases[low])
+            low += 1
+        return found
+
+    def due (self, now):
+
+        '''
+        True if the table should be fetched again at server time now
+        (s), False while now is unknown.
+        '''
+
+        if not now:
+            return False
+        if self.failed and now - self.failed < RETRY:
+            return False
+        return not self.pairs or now - self.fetched >= TTL
+
+def scan (read, ref):
+
+    '''
+    Collects the pairs quoted in ref from an AssetPairs reply, read(n)
+    returns its next bytes. Only a few hundred bytes are held at once.
+    '''
+
+    pairs = {}
+    name = None
+    carry = b''
+    while True:
+        chunk = read(CHUNK)
+        if not chunk:
+            break
+        data = carry + chunk
+        pos = 0
+        rest = max(0, len(data) - TAIL)
+        while True:
+            a = data.find(ALTNAME, pos)
+            w = data.find(WSNAME, pos)
+            if a < 0 and w < 0:
+                break
+            at, marker = (a, ALTNAME) if w < 0 or 0 <= a < w else (w, WSNAME)
+            # the value is the next string, after the colon
+            start = data.find(b'"', at + len(marker))
+            end = data.find(b'"', start + 1) if start >= 0 else -1
+            if end < 0:
+                # value continues in the next chunk, with the name before
+                rest = max(pos, at - TAIL)
+                break
+            value = data[start + 1:end].decode()
+            if marker == ALTNAME:
+                # the altname opens the pair's object: "XXBTZUSD":{"altname":...
+                name = value
+                if data[at - 3:at] == b'":{':
+                    opening = data.rfind(b'"', pos, at - 3)
+                    if opening >= 0:
+                        name = data[opening + 1:at - 3].decode()
+            else:
+                base, _, quote = value.partition('/')
+                if quote == ref and name:
+                    pairs[base] = name
+            pos = end + 1
+            rest = max(pos, rest)
+        carry = data[max(pos, rest):]
+    return pairs
+
+def load (ref):
+
+    '''
+    Table stored on flash, empty if there is none for ref.
+    '''
+
+    try:
+        with open(PATH) as f:
+            fetched, stored = f.readline().split()
+            if stored != ref:
+                return Table(ref)
+            pairs = {}
+            for line in f:
+                base, _, pair = line.strip().partition(' ')
+                if pair:
+                    pairs[base] = pair
+            return Table(ref, pairs, int(fetched))
+    except (OSError, ValueError):
+        return Table(ref)
+
+def save (table):
+    with open(PATH, 'w') as f:
+        f.write(f'{table.fetched} {table.ref}\n')
+        for base in table.bases:
+            f.write(f'{base} {table.pairs[base]}\n')
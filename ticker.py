@@ -0,0 +1,1578 @@
+#####################################################################################
+#####################################################################################
+# Ticker Code © 2024
+# Copyright © 2024 github.com/B0-B
+
+# This program allows to orchestrate all needed modules:
+# - main program
+# - captive portal
+# It is booted by main.py and can be installed precompiled (ticker.mpy)
+#####################################################################################
+#####################################################################################
+
+__version__ = 'v7.2'
+
+#####################################################################################
+
+import gc, json, os, sys, _thread
+import alerts, candles, config, fetch, indicators, inputs, memtrace, perf, resample, schedule, stream, symbols
+from ring import Ring
+from math import sqrt, log
+from utime import sleep, sleep_ms, ticks_add, ticks_ms, ticks_diff
+from network import WLAN, STA_IF
+from machine import Pin, I2C, reset
+from ssd1306 import SSD1306_I2C
+from framebuf import FrameBuffer, MONO_HLSB, MONO_VLSB
+try:
+    # firmware >= 1.21
+    from rp2 import bootsel_button
+except ImportError:
+    bootsel_button = None
+
+# boot reference for the first frame measurement
+BOOT_TICKS = ticks_ms()
+
+# ============= Parameters ==============
+# Pages which alternate on display
+PAGE = 0
+DISPLAY_PAGES = ['price', 'chart', 'statistics', 'indicators']
+# hidden page with profiling results, enabled in config.json
+DIAGNOSTICS_PAGE = 'diagnostics'
+
+# ---- I2C pin-out ----
+# Do not change these parameters, otherwise
+# this could short the display!
+WIDTH = 128
+HEIGHT = 64
+scl_pin = 19
+sda_pin = 18
+vcc_pin = 20
+gnd_pin = 21
+# display geometry (this can be changed)
+leftPadding = 5
+# 128x64 MONO_HLSB bitmap, raw or run-length encoded (.rle)
+LOGO = 'logo.bin'
+# bytes of a frame in the display's format (MONO_VLSB)
+FRAME_SIZE = WIDTH * HEIGHT // 8
+# frame period of the render thread
+FRAME_MS = 300
+# how long an alert flashes over the frames
+ALERT_MS = 6000
+
+# ---- kraken API ----
+krakenReference = {			
+    'bitcoin': 'XBT',
+    'ethereum': 'ETH'
+}
+
+class news:
+    feed = ''                   # latest feed, core 0
+    buffer = bytearray(512)     # feed shown by the render thread, core 1
+    length = 0
+
+# ---- load config ----
+_config = config.load()
+# urls, config.json can point them elsewhere (e.g. sim/standin.py)
+github_repository = _config['repository']
+github_stack_files = github_repository + 'files'
+github_feed_target = github_repository + 'news'
+# convert to variables
+EPOCH = 128					                    	# a value for each pixel - number of values seperated by interval (too large values can overload memory)
+INTERVAL = int(_config['interval'])             	# interval unit in minutes (e.g. a day = 1440 minutes)
+TREND_INTERVALS = int(_config['trend_intervals'])   # how many intervals for trend window
+REFERENCE = _config['reference']			    	# reference currency
+COIN = _config['coin']                      		# selected kraken ticker symbol
+PAGE_MS = 15000                                     # how long a page is shown, polls are planned by schedule.py
+OVERLAY = _config['chart_overlay']                  # EMA and bollinger bands on the chart
+CHART = _config['chart']                            # chart mode: line, candles or bars
+REDRAW_MS = 1000                                    # minimal delay of redraws pushed by the stream
+STREAMED = 3                                        # idle() result once the stream changed the series
+STALE_MS = 2000 * _config['poll_max']               # data older than this is shown with its age
+# longer timeframes resampled from the INTERVAL candles, a chart page each
+TIMEFRAMES = {f'chart {resample.label(minutes)}': minutes for minutes in _config['timeframes'] if minutes > INTERVAL and minutes % INTERVAL == 0}
+DISPLAY_PAGES += list(TIMEFRAMES)
+if _config['diagnostics']:
+    DISPLAY_PAGES.append(DIAGNOSTICS_PAGE)
+# pairs of the reference currency from flash, refreshed in the background
+symbolTable = symbols.load(REFERENCE)
+
+
+# ============= Load Modules ==============
+# ---- load I²C connection ----
+# emulate necessary pins for display
+# emulate VCC on pin 20
+VCC = Pin(vcc_pin, Pin.OUT)
+VCC.value(1)
+# emulate GND on pin 21
+GND = Pin(gnd_pin, Pin.OUT)
+GND.value(0)
+# init I²C
+i2c = I2C(1, scl=Pin(scl_pin), sda=Pin(sda_pin), freq=200000)
+display = SSD1306_I2C(WIDTH, HEIGHT, i2c)
+# ---- frame hand-over ----
+# core 0 draws on the canvas and presents it, once the render
+# thread runs core 1 owns the display and I²C (see render())
+canvas = FrameBuffer(bytearray(FRAME_SIZE), WIDTH, HEIGHT, MONO_VLSB)
+class screen:
+    rendering = False
+    frames = Ring(3, FRAME_SIZE)
+    feed = Ring(3, len(news.buffer))
+    alerts = Ring(3, 16)
+    stale = 0                   # age (min) of the data shown, 0 while fresh
+    # the last frame of core 0, restored once an alert is gone
+    backdrop = FrameBuffer(bytearray(FRAME_SIZE), WIDTH, HEIGHT, MONO_VLSB)
+screen.slots = [FrameBuffer(buffer, WIDTH, HEIGHT, MONO_VLSB) for buffer in screen.frames.buffers]
+# ---- page cache ----
+# composed pages, redrawn only when the data changes
+class pages:
+    CACHED = [page for page in DISPLAY_PAGES if page != DIAGNOSTICS_PAGE]
+    cache = {}                  # page -> FrameBuffer, allocated on first use
+    valid = {}                  # page -> drawn from the current data
+    stamp = None                # identifies the data the pages show
+# ---- init wifi ----
+wifi = WLAN(STA_IF)
+wifi_connected = False
+# ---- indicators ----
+# follow the closed series, seeded from REST
+engine = indicators.Engine(INTERVAL, EPOCH)
+# alert rules of config.json, fed the same closes
+monitor = alerts.Alerts(_config['alerts'])
+engine.follow(monitor)
+# ---- polling ----
+# delays of the REST polls, from the volatility of the same closes
+poller = schedule.Poller(INTERVAL, _config['poll_min'], _config['poll_max'])
+engine.follow(poller)
+# ---- candles ----
+# the fetched candles, EPOCH * candles.BYTES bytes (3 KiB)
+ohlcv = candles.Candles(EPOCH)
+# longer timeframes folded from them
+sampler = resample.Resampler(INTERVAL, TIMEFRAMES.values(), EPOCH)
+# ---- Watchdog ----
+class watchdog:
+    SLICE_SIZE = 10 			# compare only the last x values to save space
+    TICK_THRESHOLD = 30 		# restarts the ticker automatically if this threshold is reached
+                                # the watchdog counts how often the history kept unchanged
+    COUNTER = 0     
+    COPY = []
+    def track (timeseries):
+
+        '''
+        Tracks how often (in a row) the timeseries kept unchanged.
+        If the stagnation holds for longer than specified threshold,
+        the watchdog will restart the device.
+        '''
+
+        # check for changes in the timeseries
+        if not timeseries or len(timeseries) < watchdog.SLICE_SIZE or timeseries[-watchdog.SLICE_SIZE:] == watchdog.COPY:
+            watchdog.COUNTER += 1
+            if watchdog.COUNTER >= watchdog.TICK_THRESHOLD:
+                # keep the heap trace for the next boot
+                memtrace.snapshot()
+                reset()
+            return
+
+        # all fine - override and reset counter
+        watchdog.COPY = timeseries[-watchdog.SLICE_SIZE:]
+        watchdog.COUNTER = 0
+
+# ============= Methods ==============
+# ---- bootsel button exploit ----
+def bootsel_is_pressed ():
+    
+    '''
+    Inverse alias of read_bootsel().
+    Returns boolean corresponding to bootsel high/low state.
+    Prefers rp2.bootsel_button() which also locks the other core
+    out of the flash, so it's safe while the render thread runs.
+    '''
+    
+    if bootsel_button:
+        return bootsel_button() == 1
+    return not read_bootsel()
+
+@micropython.asm_thumb
+def read_bootsel():
+    
+    '''
+    Pragmatic assembly implementation which reads the bootsel state.
+    Credit to github@pdg137
+    https://github.com/micropython/micropython/issues/6852#issuecomment-1350081346
+    '''
+    
+    # disable interrupts
+    cpsid(0x0)    
+    # set r2 = addr of GPIO_QSI_SS registers, at 0x40018000
+    # GPIO_QSPI_SS_CTRL is at +0x0c
+    # GPIO_QSPI_SS_STATUS is at +0x08
+    # is there no easier way to load a 32-bit value?
+    mov(r2, 0x40)
+    lsl(r2, r2, 8)
+    mov(r1, 0x01)
+    orr(r2, r1)
+    lsl(r2, r2, 8)
+    mov(r1, 0x80)
+    orr(r2, r1)
+    lsl(r2, r2, 8)    
+    # set bit 13 (OEOVER[1]) to disable output
+    mov(r1, 1)
+    lsl(r1, r1, 13)
+    str(r1, [r2, 0x0c])   
+    # delay about 3us
+    # seems to work on the Pico - tune for your system
+    mov(r0, 0x16)
+    label(DELAY)
+    sub(r0, 1)
+    bpl(DELAY)    
+    # check GPIO_QSPI_SS_STATUS bit 17 - input value
+    ldr(r0, [r2, 0x08])
+    lsr(r0, r0, 17)
+    mov(r1, 1)
+    and_(r0, r1)    
+    # clear bit 13 to re-enable, or it crashes
+    mov(r1, 0)
+    str(r1, [r2, 0x0c])   
+    # re-enable interrupts
+    cpsie(0x0)
+
+
+# ---- I²C methods ----
+def clear ():
+    
+    '''
+    Clears display.
+    '''
+    
+    canvas.fill(0)
+
+def present ():
+    
+    '''
+    Shows the canvas. While the render thread runs the frame is
+    queued for it, a frame is dropped if it lags behind.
+    '''
+    
+    if not screen.rendering:
+        display.blit(canvas, 0, 0)
+        display.show()
+        return True
+    index = screen.frames.reserve()
+    if index < 0:
+        return False
+    screen.slots[index].blit(canvas, 0, 0)
+    screen.frames.commit(index, FRAME_SIZE)
+    return True
+    
+def invalidate ():
+
+    '''
+    Marks all cached pages as outdated.
+    '''
+
+    pages.valid.clear()
+
+def update_pages (closed, price):
+
+    '''
+    Invalidates the cached pages if closed, price or the candles
+    changed since they were drawn. The stream and REST both replace
+    the newest close and shift the series, so its ends identify it,
+    the candles and timeframes are written through record_candle
+    and counted by the store's revision.
+    '''
+
+    stamp = (ohlcv.revision, len(closed), closed[0], closed[-1], price)
+    if stamp != pages.stamp:
+        pages.stamp = stamp
+        invalidate()
+
+def draw_page (page, closed, price):
+
+    '''
+    Draws page onto the cleared canvas.
+    '''
+
+    # render the price (enlarged)
+    if page == 'price':
+        show_price(price)
+    # show chart
+    elif page == 'chart':
+        show_chart(closed, price)
+    # show statistics, like price, change, volatility etc.
+    elif page == 'statistics':
+        show_statistics(closed, price)
+    # EMA, RSI, bollinger bands and MACD
+    elif page == 'indicators':
+        show_indicators()
+    # chart of a resampled timeframe
+    elif page in TIMEFRAMES:
+        show_timeframe(TIMEFRAMES[page], price)
+    # profiling results, only in rotation if enabled
+    elif page == DIAGNOSTICS_PAGE:
+        show_diagnostics()
+
+def compose (page, closed, price):
+
+    '''
+    Puts page onto the canvas: a blit of its cached frame if the data
+    did not change since it was drawn, otherwise it is drawn and cached.
+    Returns True if the cache was hit.
+    '''
+
+    if page in pages.valid:
+        canvas.blit(pages.cache[page], 0, 0)
+        return True
+    clear()
+    draw_page(page, closed, price)
+    if page in pages.CACHED:
+        if page not in pages.cache:
+            pages.cache[page] = FrameBuffer(bytearray(FRAME_SIZE), WIDTH, HEIGHT, MONO_VLSB)
+        pages.cache[page].blit(canvas, 0, 0)
+        pages.valid[page] = True
+    return False
+
+def load_bitmap (path, buffer):
+
+    '''
+    Reads a bitmap file straight into the provided buffer.
+    Files ending in .rle hold (count, byte) pairs which are
+    expanded while reading.
+    '''
+
+    with open(path, 'rb') as f:
+        if not path.endswith('.rle'):
+            f.readinto(buffer)
+            return buffer
+        caret = 0
+        pair = bytearray(2)
+        while f.readinto(pair) == 2:
+            count, value = pair
+            for i in range(caret, caret + count):
+                buffer[i] = value
+            caret += count
+    return buffer
+
+def trademark (time=2):
+    
+    '''
+    Displays trademark logo for a provided amount of time.
+    '''
+    
+    try:
+        logoData = load_bitmap(LOGO, bytearray(WIDTH * HEIGHT // 8))
+    except OSError:
+        print(f'{LOGO} missing, skip logo')
+        return
+    fb = FrameBuffer(logoData, WIDTH, HEIGHT, MONO_HLSB)
+    clear()
+    canvas.blit(fb, 0, 0)
+    present()
+    # ticks_ms() counts from power-up and so includes compiling this module
+    print(f'first frame {ticks_ms()} ms after power-up ({ticks_diff(ticks_ms(), BOOT_TICKS)} ms after imports)')
+    sleep(time)
+    clear()
+
+def text (output, lineHeight=10, lineLength=15, startLine=0):
+
+    '''
+    displays text on oled display
+    '''
+    
+    line = startLine
+    current_line = ''
+    
+    for i in range(len(output)):
+        current_line += output[i]
+        if (i % lineLength == 0 and i > 0) or i == len(output)-1:
+            canvas.text(current_line, 0, int(line*lineHeight))
+            line += 1
+            current_line = ''
+        
+    present()
+
+def print_display (output, clean=True, startLine=0):
+    
+    '''
+    Prints in terminal and OLED display.
+    '''
+    
+    if clean:
+        clear()
+    text(output, startLine=startLine)
+    print(output)
+    
+def plot_chart (oled, data, height=30, y=0, overlays=()):
+    
+    '''
+    plots the data to chart.
+    Origin is at the lower left corner.
+    Overlays are series on the same scale, dotted and aligned to
+    the newest value.
+    '''
+    
+    if len(data) > 128:    
+        ValueError('data array too large for plotting, must have <=128 values.')
+        
+    # invert y coord
+    y = 64 - y
+    
+    plotData = [None for i in range(128-len(data))]
+            
+    
+    # scale timeseries to display pixel size
+    bounds = [min(data), max(data)]
+    for series in overlays:
+        bounds = [min(bounds[0], min(series)), max(bounds[1], max(series))]
+    _range = bounds[1] - bounds[0]
+    for i in range(len(data)):
+        normalized = (data[i]-bounds[0]) / _range
+        plotData.append(int(normalized*height))
+    
+    for i in range(1,len(plotData)):
+        if plotData[i]:
+            oled.pixel(i, y-plotData[i], 1)
+            # shorter series start with a gap
+            if plotData[i-1] is None:
+                continue
+            dy = plotData[i]-plotData[i-1]
+            if dy != 0:
+                s = int(dy / abs(dy))
+            for j in range(1,abs(dy)):
+                oled.pixel(i, y-plotData[i]+s*j, 1)
+    
+    # dotted overlays, every other pixel
+    for series in overlays:
+        series = series[-len(data):]
+        offset = 128 - len(series)
+        for i in range(offset % 2, len(series), 2):
+            oled.pixel(offset+i, y-int((series[i]-bounds[0]) / _range * height), 1)
+
+def plot_candles (oled, store, count=32, height=28, y=8, volume=6, bars=False):
+    
+    '''
+    Candlestick chart of the newest count candles of store, or OHLC
+    bars, 4 pixels apart and aligned right. Rising candles are
+    hollow, falling ones filled. Below runs a strip of volume pixels
+    high with the volume of each candle.
+    Origin is at the lower left corner.
+    '''
+    
+    n = min(count, store.count, WIDTH // 4)
+    if not n:
+        return
+    indices = [store.index(i) for i in range(n - 1, -1, -1)]
+    low = min(store.lows[i] for i in indices)
+    high = max(store.highs[i] for i in indices)
+    peak = max(store.volumes[i] for i in indices)
+    scale = height / (high - low) if high > low else 0
+    
+    # invert y coord
+    base = HEIGHT - y
+    x = WIDTH - 4 * n
+    for i in indices:
+        o, c = store.opens[i], store.closes[i]
+        top = base - int((store.highs[i] - low) * scale)
+        bottom = base - int((store.lows[i] - low) * scale)
+        y_open = base - int((o - low) * scale)
+        y_close = base - int((c - low) * scale)
+        # wick from high to low
+        oled.vline(x + 1, top, bottom - top + 1, 1)
+        if bars:
+            # open tick left, close tick right
+            oled.pixel(x, y_open, 1)
+            oled.pixel(x + 2, y_close, 1)
+        else:
+            body = min(y_open, y_close)
+            size = abs(y_open - y_close) + 1
+            oled.fill_rect(x, body, 3, size, 1)
+            if c >= o and size > 2:
+                oled.fill_rect(x + 1, body + 1, 1, size - 2, 0)
+        if peak:
+            bar = int(store.volumes[i] / peak * volume)
+            oled.fill_rect(x, HEIGHT - bar, 3, bar, 1)
+        x += 4
+
+def center (output, lineHeight=10, pad_x=0, pad_y=0, delay=.2):
+    current_line = ''
+    line = 0
+    for i in range(len(output)):
+        current_line += output[i]
+        if (i % 15 == 0 and i > 0) or (delay==0 and i == len(output)-1):
+            canvas.text(current_line, pad_x, int(line*lineHeight) + pad_y)
+            line += 1
+            current_line = ''
+        if delay > 0:
+            clear()
+            canvas.text(current_line, pad_x, int(line*lineHeight) + pad_y)
+            present()
+        sleep(delay)
+    present()
+
+def renderPrice (number, y=0, x=0, significance=4):
+
+    ind = 0
+    short = float(number)
+    suffix = ['', 'K', 'M', 'B', 'T', 'Q']
+    while short > 999:
+        short /= 1000
+        ind += 1
+    
+    # cut to n significant digits and construct final price string
+    final = str(short)[:significance+1]
+    price = f'{final}{suffix[ind]}'
+
+    # render price string
+    tab = 25
+    tabs = 10 # short tab
+    pointer = x
+    char = None
+    for i in range(len(price)):
+        char = price[i]
+        renderDigit (char, x=pointer, y=y)
+        # Remove the dot if its the last symbol in string
+        if i == len(price) - 2 and char == '.':
+            continue
+        if char == '.':
+            pointer += tabs
+        else:
+            pointer += tab
+
+def renderDigit (char, x, y):
+
+    #canvas.fill_rect(0, 20, 20, 30, 1)
+    canvas.fill_rect(x, y, 20, 30, 1)
+    # round edges of digits
+    if char in '0236789':
+        canvas.pixel(x, y, 0)
+        canvas.pixel(x+19, y, 0)
+        canvas.pixel(x, y+29, 0)
+        canvas.pixel(x+19, y+29, 0)
+    if char == '0':
+        canvas.fill_rect(x+5, y+5, 10, 20, 0)
+    if char == '1':
+        canvas.fill_rect(x, y+5, 12, 25, 0)
+        canvas.fill_rect(x+17, y, 3, 30, 0)
+        canvas.fill_rect(x, y, 5, 5, 0)
+        canvas.fill_rect(x, y, 6, 4, 0)
+        canvas.fill_rect(x, y, 7, 3, 0)
+        canvas.fill_rect(x, y, 8, 2, 0)
+    if char == '2':
+        canvas.fill_rect(x, y+5, 15, 7, 0)
+        canvas.fill_rect(x+5, y+17, 15, 8, 0)
+        canvas.pixel(x, y+12, 0)
+        canvas.pixel(x+19, y+16, 0)
+        canvas.pixel(x+19, y, 0)
+    if char == '3':
+        canvas.fill_rect(x, y+5, 15, 7, 0)
+        canvas.fill_rect(x, y+17, 15, 8, 0)
+    if char == '4':
+        canvas.fill_rect(x+5, y, 10, 12, 0)
+        canvas.fill_rect(x, y+18, 15, 12, 0)
+    if char == '5':
+        canvas.fill_rect(x+5, y+5, 15, 7, 0)
+        canvas.fill_rect(x, y+17, 15, 8, 0)
+        canvas.pixel(x+19, y+12, 0)
+        canvas.pixel(x+19, y+29, 0)
+        canvas.pixel(x, y+29, 0)
+    if char == '6':
+        canvas.fill_rect(x+5, y+5, 15, 7, 0)
+        canvas.fill_rect(x+5, y+17, 10, 8, 0)
+        canvas.pixel(x+19, y+12, 0)
+    if char == '7':
+        canvas.fill_rect(x, y+5, 15, 25, 0)
+        canvas.fill_rect(x+14, y+10, 1, 20, 1)
+        canvas.fill_rect(x+13, y+15, 1, 15, 1)
+        canvas.fill_rect(x+12, y+20, 1, 10, 1)
+        canvas.fill_rect(x+11, y+25, 1, 5, 1)
+        canvas.fill_rect(x+19, y+10, 1, 20, 0)
+        canvas.fill_rect(x+18, y+15, 1, 15, 0)
+        canvas.fill_rect(x+17, y+20, 1, 10, 0)
+        canvas.fill_rect(x+16, y+25, 1, 5, 0)
+    if char == '8':
+        canvas.fill_rect(x+5, y+5, 10, 7, 0)
+        canvas.fill_rect(x+5, y+17, 10, 8, 0)
+    if char == '9':
+        canvas.fill_rect(x+5, y+5, 10, 7, 0)
+        canvas.fill_rect(x, y+17, 15, 8, 0)
+        canvas.fill_rect(x, y+17, 2, 13, 0)
+        canvas.pixel(x, y+16, 0)
+    if char == '.':
+        canvas.fill_rect(x, y, 20, 30, 0)
+        canvas.fill_rect(x, y+25, 5, 5, 1)
+    if char == 'K':
+        canvas.fill_rect(x+5, y, 25, 30, 0)
+        canvas.fill_rect(x+5, y+13, 5, 5, 1)
+        canvas.fill_rect(x+10, y+8, 5, 5, 1)
+        canvas.fill_rect(x+15, y+3, 5, 5, 1)
+        
+        canvas.fill_rect(x+10, y+13, 5, 5, 1)
+        canvas.fill_rect(x+15, y+18, 5, 12, 1)
+        
+        canvas.fill_rect(x+14, y+18, 1, 4, 1)
+        canvas.fill_rect(x+15, y+14, 2, 4, 1)
+        canvas.fill_rect(x+19, y+18, 1, 3, 0)
+        canvas.fill_rect(x+11, y+18, 3, 1, 1)
+        canvas.fill_rect(x+8, y+11, 2, 2, 1)
+        canvas.fill_rect(x+15, y+8, 2, 2, 1)
+        canvas.fill_rect(x+13, y+6, 2, 2, 1)
+    if char == 'M':
+        canvas.fill_rect(x+6, y, 8, 2, 0)
+        canvas.fill_rect(x+8, y+2, 4, 2, 0)
+        canvas.fill_rect(x+9, y+4, 2, 2, 0)
+        canvas.fill_rect(x+6, y+13, 3, 17, 0)
+        canvas.fill_rect(x+12, y+13, 3, 17, 0)
+        canvas.fill_rect(x+9, y+15, 3, 15, 0)
+    if char == 'B':
+        canvas.fill_rect(x+18, y, 2, 11, 0)
+        canvas.fill_rect(x+5, y+5, 8, 7, 0)
+        canvas.fill_rect(x+5, y+17, 10, 8, 0)
+        canvas.pixel(x+17, y, 0)
+        canvas.pixel(x+19, y+29, 0)
+        canvas.fill_rect(x+18, y+11, 1, 3, 0)
+        canvas.fill_rect(x+17, y+12, 1, 1, 0)
+        canvas.fill_rect(x+19, y+11, 1, 3, 0)
+    if char == 'T':
+        canvas.fill_rect(x, y+5, 7, 25, 0)
+        canvas.fill_rect(x+13, y+5, 7, 25, 0)
+    if char == 'Q':
+        canvas.pixel(x, y, 0)
+        canvas.pixel(x+19, y, 0)
+        canvas.pixel(x, y+29, 0)
+        canvas.pixel(x+19, y+29, 0)
+        canvas.fill_rect(x+5, y+5, 10, 20, 0)
+        canvas.fill_rect(x+12, y+20, 2, 7, 0)
+        canvas.fill_rect(x+13, y+21, 2, 7, 0)
+        canvas.fill_rect(x+14, y+22, 2, 7, 0)
+        canvas.fill_rect(x+15, y+23, 2, 7, 0)
+        canvas.fill_rect(x+16, y+24, 2, 7, 0)
+        canvas.fill_rect(x+17, y+25, 2, 7, 0)
+        canvas.fill_rect(x+18, y+26, 2, 7, 0)
+        canvas.fill_rect(x+19, y+27, 2, 7, 0)
+        canvas.fill_rect(x+12, y+20, 2, 5, 1)
+        canvas.fill_rect(x+13, y+21, 2, 5, 1)
+        canvas.fill_rect(x+14, y+22, 2, 5, 1)
+        canvas.fill_rect(x+15, y+23, 2, 5, 1)
+        canvas.fill_rect(x+16, y+24, 2, 5, 1)
+        canvas.fill_rect(x+17, y+25, 2, 5, 1)
+        canvas.fill_rect(x+18, y+26, 2, 5, 1)
+        canvas.fill_rect(x+19, y+27, 2, 5, 1)
+
+
+# ---- trading API and stats ----    
+class krakenApi:
+
+    '''
+    Loads crypto price data from kraken rest API.
+    Returns list of candle lists (time,o,h,l,c,avg,volume).
+    '''
+
+    krakenUrl = 'https://futures.kraken.com'
+    apiUrl = _config['kraken_url']
+    lastTime = 0 # start time (s) of the newest candle of the last history
+    serverTime = 0 # server time (s) at serverTicks
+    serverTicks = 0
+    
+    def now ():
+        
+        '''
+        Estimated server time (s), 0 until the first history.
+        '''
+        
+        if not krakenApi.serverTime:
+            return 0
+        return krakenApi.serverTime + ticks_diff(ticks_ms(), krakenApi.serverTicks) // 1000
+    
+    def getSymbols (ref='USD'):
+        
+        '''
+        Downloads the pairs quoted in ref into a symbol table. The reply
+        is scanned while it arrives, it's never held as a whole.
+        Raises on failure, callers retry later.
+        '''
+        
+        with fetch.guard('symbols'):
+            with fetch.Download('symbols', f'{krakenApi.apiUrl}/0/public/AssetPairs') as body:
+                if body.status != 200:
+                    raise OSError(f'AssetPairs status {body.status}')
+                pairs = symbols.scan(body.read, ref)
+            # e.g. a rate limit reply, scanned without a match
+            if not pairs:
+                raise ValueError(f'no pairs quoted in {ref}')
+        return symbols.Table(ref, pairs, krakenApi.now())
+    
+    def history (symbol, interval, epoch=30, ref='USD', sink=None):
+
+        '''
+        Requests OHLC timeseries data 720 points of chosen time intervals in minutes.
+        The pair is named as in the symbol table, which is also the key
+        of the reply, symbol and ref only while the table lacks it.
+        Every candle is passed to sink(start, open, high, low, close, volume)
+        if given, oldest first. Both requests are guarded by circuit
+        breakers, while one backs off fetch.Unavailable is raised
+        without a request.
+        '''
+        
+        # get corresponding server time and compute since
+        with fetch.guard('time'):
+            with perf.span('time'):
+                with fetch.Download('time', f'{krakenApi.apiUrl}/0/public/Time') as body:
+                    result = fetch.kraken(body.json())
+        serverTime = result['unixtime'] 
+        krakenApi.serverTime, krakenApi.serverTicks = serverTime, ticks_ms()
+        sleep(1)
+        since = serverTime - epoch * INTERVAL * 60
+        
+        # make history request
+        pair = symbolTable.get(symbol) if symbolTable.ref == ref else None
+        with fetch.guard('ohlc'):
+            with perf.span('ohlc'):
+                body = fetch.Download('ohlc', f'{krakenApi.apiUrl}/0/public/OHLC?pair={pair or symbol + ref}&interval={interval}&since={since}', timeout=10)
+            # parsed while it's inflated
+            with body, perf.span('json'):
+                pkg = body.json()
+            result = fetch.kraken(pkg)
+        
+        # unpack, without a table entry the pair was named by its altname,
+        # the reply holds it under kraken's name next to 'last'
+        closed = []
+        ohlcData = result.get(pair)
+        if ohlcData is None:
+            for name in result:
+                if name != 'last':
+                    ohlcData = result[name]
+        for i in range(len(ohlcData)):
+            closed.append(float(ohlcData[i][4]))
+            if sink:
+                row = ohlcData[i]
+                sink(int(row[0]), float(row[1]), float(row[2]), float(row[3]), closed[-1], float(row[6]))
+        krakenApi.lastTime = int(ohlcData[-1][0])
+        
+        return closed
+            
+def drift (history, window):
+    
+    '''
+    Returns the geometric brownian motion drift meaned oved the recent window interval.
+    The unit is given as relative price change in [%/interval]
+    '''
+    
+    d = 0
+    snippet = history[-window:]
+    for i in range(len(snippet)-1):
+        d += log(snippet[i+1]/snippet[i])
+    return d/(window-1)
+
+def volatility (history, drift, window):
+    
+    '''
+    Returns the volatility meaned accross a requested window.
+    Estimated from the standard deviation of logarithmic returns and using
+    the drift as expectation. The drift needs to be pre-computed.
+    '''
+    
+    var = 0
+    snippet = history[-window:]
+    for i in range(len(snippet)-1):
+        var += (log(snippet[i+1]/snippet[i]) - drift) ** 2
+    var /= window - 1 # sample variance correction
+    vol = sqrt(var) # std deviation from var
+    
+    return vol
+
+def digits (number, n):
+    
+    '''
+    Rounds number to significant digits.
+    Starts counting from the first non-zero digit.
+    '''
+    
+    stringed = str(number)
+    new = ''
+    count = 0
+    for sym in stringed:
+        # skip zeros at the beginning
+        if count == 0 and sym == '0':
+            continue
+        # exclude the dot as digit
+        if sym != '.':
+            count += 1
+        # add symbol to final string
+        new += sym
+        if count == n:
+            break
+    return float(new)
+
+
+# ---- sequences ----
+# CICD pipeline
+def mpy_version ():
+
+    '''
+    Returns the bytecode version of .mpy files this firmware
+    can import, None if it can't import precompiled modules.
+    '''
+
+    try:
+        return sys.implementation._mpy & 0xff
+    except AttributeError:
+        return None
+
+def download (name, accept=None):
+
+    '''
+    Downloads a file of the stack to name + '.part' through a fixed
+    buffer, the file is never held as a whole. Returns False if it is
+    unavailable or accept() rejects its first bytes.
+    '''
+
+    buffer = bytearray(512)
+    view = memoryview(buffer)
+    for i in range(5):
+        try:
+            with fetch.Download('stack', github_repository + name) as body:
+                if body.status != 200:
+                    print(f'{name} not available ({body.status})')
+                    return False
+                # raw bytes, the stack contains binary assets
+                head = body.read(4)
+                if not head or accept and not accept(head):
+                    return False
+                with open(name + '.part', 'wb') as f:
+                    f.write(head)
+                    n = body.readinto(buffer)
+                    while n:
+                        f.write(view[:n])
+                        n = body.readinto(buffer)
+            return True
+        except Exception as e:
+            print(f'failed to load {name}, try again ...')
+            sleep(.2)
+    return False
+
+def install (forms):
+
+    '''
+    Installs the first usable form of a stack entry and returns its name.
+    A precompiled .mpy is only taken if its bytecode version matches the
+    firmware, otherwise the next form (the .py source) is installed.
+    The other forms are removed since a .py shadows a .mpy on import.
+    '''
+
+    version = mpy_version()
+    
+    def matches (head):
+        # .mpy header: b'M', bytecode version, flags, small int bits
+        if head[0] == 77 and len(head) > 1 and head[1] == version:
+            return True
+        print(f'{name} does not match bytecode version {version}')
+        return False
+    
+    for name in forms:
+        # written next to the target first, a partial file never replaces it
+        if not download(name, matches if name.endswith('.mpy') else None):
+            continue
+        for other in forms:
+            try:
+                os.remove(other)
+            except OSError:
+                pass
+        os.rename(name + '.part', name)
+        return name
+    return None
+
+def update ():
+
+    '''
+    Tiny CICD pipeline.
+    Reads the file manifest from github pages and installs
+    the listed stack if it announces a newer version.
+    The manifest holds a "version" line and one line per file,
+    listing its forms in order of preference, e.g.
+    "ticker.mpy ticker.py".
+    '''
+
+    # request latest manifest
+    manifest = None
+    for i in range(5):
+        try:
+            with fetch.Download('stack', github_stack_files) as body:
+                manifest = body.read().decode()
+            break
+        except Exception as e:
+            print('failed to request latest version, try again ...')
+            sleep(.2)
+    if not manifest:
+        return
+    
+    # parse out version and file stack
+    newVersion = ''
+    stack = []
+    for line in manifest.split('\n'):
+        entry = line.split()
+        if not entry:
+            continue
+        if entry[0] == 'version':
+            newVersion = entry[1]
+        else:
+            stack.append(entry)
+    if not newVersion or __version__ == newVersion:
+        # do nothing if versions don't differ
+        return
+    
+    # seconds counter for confirmation
+    count = 5
+    updateConfirmed = False
+    inputs.clear()
+    for s in range(count):
+        print_display(f'Should I update to new version {newVersion}? Press button for "yes" ({count-s}s)')
+        # sleep for up to 1 second unless the button is pressed
+        if inputs.wait(1000):
+            updateConfirmed = True
+            break
+    if not updateConfirmed:
+        return
+    
+    # install the stack, the manifest lists ticker last as it carries
+    # the version - an interrupted update is retried on the next boot
+    print_display(f'Updating to version {newVersion} ...')
+    for forms in stack:
+        if not install(forms):
+            print_display('update failed.')
+            return
+        sleep(.2)
+    
+    # finish
+    count = 5
+    for i in range(count, 0 , -1):
+        print_display(f'Update complete! Will reboot in {i} ')
+        sleep(1)
+    reset()
+        
+def welcome ():
+    
+    '''
+    Little welcome sequence.
+    '''
+    
+    delay = 3
+    typeDelay = 0.1
+    center('HELLO :)', 10, 40, 24, typeDelay)
+    sleep(delay)
+    center("I am bitboi", 10, 20, 24, typeDelay)
+    sleep(delay)
+    center("a crypto ticker", 10, 0, 24, typeDelay)
+    sleep(delay)
+    center("Wi-Fi: bitboi", 10, 10, 24, typeDelay)
+    sleep(delay)
+
+def load_news_feed ():
+    
+    # draw current news document from github pages
+    with fetch.guard('news'):
+        with fetch.Download('news', github_feed_target) as body:
+            data = body.read().decode()
+    received_feed = str(data).replace('\n', ' ') + ' '
+
+    # override global feed if payload differs
+    return received_feed
+
+def set_news (feed):
+    
+    '''
+    Replaces the news feed and hands a copy to the render thread.
+    '''
+    
+    news.feed = feed
+    screen.feed.push(feed.encode())
+
+def receive_news ():
+    
+    '''
+    Takes over the newest feed from core 0, returns True if there was one.
+    '''
+    
+    index = screen.feed.latest()
+    if index < 0:
+        return False
+    received = screen.feed.buffers[index]
+    news.length = screen.feed.lengths[index]
+    for i in range(news.length):
+        news.buffer[i] = received[i]
+    screen.feed.release(index)
+    return True
+     
+def show_news_feed_window (fb, feed_pointer, news_window, label='NEWS'):
+    
+    '''
+    Displays current windown of news feed string, based on pointer.
+    '''
+
+    window = ''
+    for inc in range(news_window if news.length else 0):
+        window += chr(news.buffer[(feed_pointer+inc)%news.length])
+    fb.fill_rect(0, 0, 127, 10, 0) # white background
+    fb.fill_rect(0, 0, 32, 10, 1) # white background
+    fb.text(label, 0, 2, 0)
+    fb.text(f'    {window}', 0, 2, 1)
+    
+def age (minutes):
+    
+    '''
+    Short age badge, e.g. 5m, 2h or 3d.
+    '''
+    
+    if minutes < 60:
+        return f'{minutes}m'
+    if minutes < 1440:
+        return f'{minutes // 60}h'
+    return f'{minutes // 1440}d'
+    
+def raise_alert (message):
+    
+    '''
+    Hands an alert to the render thread, which flashes it over the
+    frames for ALERT_MS. Returns right away.
+    '''
+    
+    print('alert:', message)
+    if screen.rendering:
+        screen.alerts.push(message.encode())
+
+def show_alert (fb, message):
+    
+    '''
+    Alert banner across the bottom line.
+    '''
+    
+    fb.fill_rect(0, 54, WIDTH, 10, 1)
+    fb.text(message, (WIDTH - 8 * len(message)) // 2, 55, 0)
+
+def render (feed_pointer, news_window):
+
+    '''
+    Render loop on core 1, the only user of the display and I²C.
+    Shows the newest frame presented by core 0 with the news window
+    and alerts on top at a fixed rate, whatever the network does.
+    '''
+    
+    alert = None
+    until = 0
+    
+    while True:
+        
+        start = ticks_ms()
+        
+        # take over the newest frame, the display keeps the last one
+        index = screen.frames.latest()
+        if index >= 0:
+            screen.backdrop.blit(screen.slots[index], 0, 0)
+            screen.frames.release(index)
+            display.blit(screen.backdrop, 0, 0)
+        if receive_news():
+            feed_pointer = 0
+        
+        # alerts are shown one after the other
+        if alert and ticks_diff(until, start) <= 0:
+            alert = None
+            display.invert(0)
+            display.blit(screen.backdrop, 0, 0)
+        index = -1 if alert else screen.alerts.oldest()
+        if index >= 0:
+            alert = bytes(screen.alerts.buffers[index][:screen.alerts.lengths[index]]).decode()
+            until = ticks_add(start, ALERT_MS)
+            screen.alerts.release(index)
+        
+        # while the data is stale its age replaces the NEWS label
+        if news.length or screen.stale:
+            show_news_feed_window(display, feed_pointer, news_window, age(screen.stale) if screen.stale else 'NEWS')
+            feed_pointer = (feed_pointer + 1) % max(1, news.length)
+        if alert:
+            show_alert(display, alert)
+            # flash by inverting every other frame
+            display.invert(ticks_diff(until, start) // FRAME_MS % 2)
+        with perf.span('show'):
+            display.show()
+        sleep_ms(max(0, FRAME_MS - ticks_diff(ticks_ms(), start)))
+
+def show_diagnostics ():
+
+    '''
+    Shows p50/p95 (ms) of the slowest profiling spans.
+    '''
+
+    slowest = sorted(perf.spans(), key=lambda s: s.percentile(95), reverse=True)
+    canvas.text('span  p50/p95ms', 0, 14)
+    for line, s in enumerate(slowest[:4]):
+        canvas.text(f'{s.name[:5]:<5} {s.percentile(50)//1000}/{s.percentile(95)//1000}', 0, 26 + 10 * line)
+
+# ---- pages ----
+def price_line (closed, price):
+
+    '''
+    Price with the return over the last 24h, e.g. "$64231 -1.2%".
+    '''
+
+    intervals_per_day = int(1440/INTERVAL)
+    change_24h = round(100 * (closed[-1] / closed[-intervals_per_day] - 1), 1)
+    sign = ['+', ''][change_24h < 0]
+    return f'${price} {sign}{change_24h}%'
+
+def show_price (price):
+    
+    '''
+    Price page: the price enlarged.
+    '''
+    
+    with perf.span('price'):
+        renderPrice(price, 20, 10, 3)
+
+def show_chart (closed, price):
+    
+    '''
+    Chart page: price line above the chart of the closed prices.
+    '''
+    
+    canvas.text(price_line(closed, price), leftPadding, 15)
+    if CHART != 'line' and ohlcv.count > 1:
+        with perf.span('chart'):
+            plot_candles(canvas, ohlcv, bars=CHART == 'bars')
+        return
+    overlays = ()
+    if OVERLAY and engine.ready():
+        overlays = (engine.averages.values(), engine.uppers.values(), engine.lowers.values())
+    with perf.span('chart'):
+        plot_chart (canvas, closed, height=32, y=3, overlays=overlays)
+
+def show_statistics (closed, price):
+    
+    '''
+    Statistics page: price line, drift (ROI) and volatility per hour.
+    '''
+    
+    intervals_per_hour = int(60/INTERVAL)
+    with perf.span('stats'):
+        d = drift(closed, TREND_INTERVALS)
+        v = volatility(closed, d, TREND_INTERVALS)
+    d_h = round(100 * d / intervals_per_hour, 2)
+    v_h = round(100*v/sqrt(intervals_per_hour), 2) # see https://en.wikipedia.org/wiki/Volatility_(finance)#Mathematical_definition
+    
+    # build ROI line from 1h drift
+    roiLine = f'ROI: {["+", ""][d < 0]}{d_h} %/h'
+    
+    # build volatility line
+    volLine = f'VOL: {v_h} %/h'
+    
+    # add assembled lines
+    canvas.text(price_line(closed, price), leftPadding , 18)
+    canvas.text(roiLine, leftPadding , 36)
+    canvas.text(volLine, leftPadding , 54)
+
+def show_timeframe (minutes, price):
+    
+    '''
+    Chart page of a longer timeframe, resampled from the fetched
+    candles, e.g. "4h $64231".
+    '''
+    
+    store = sampler.frames[minutes].candles
+    closes = store.column(store.closes)
+    canvas.text(f'{resample.label(minutes)} ${price}', leftPadding, 15)
+    if len(closes) < 2 or min(closes) == max(closes):
+        canvas.text('collecting...', leftPadding, 38)
+        return
+    with perf.span('chart'):
+        if CHART != 'line':
+            plot_candles(canvas, store, bars=CHART == 'bars')
+        else:
+            plot_chart (canvas, closes, height=32, y=3)
+
+def show_indicators ():
+    
+    '''
+    Indicators page: EMA, RSI, position within the bollinger bands
+    (%b) and MACD histogram of the engine's latest update.
+    '''
+    
+    if not engine.ready():
+        canvas.text('indicators', leftPadding, 26)
+        canvas.text('need more data', leftPadding, 38)
+        return
+    h = engine.macd.histogram
+    canvas.text(f'EMA{engine.ema.n} {int(engine.ema.value)}', leftPadding, 14)
+    canvas.text(f'RSI{engine.rsi.n} {round(engine.rsi.value, 1)}', leftPadding, 26)
+    canvas.text(f'BB %b {round(engine.bands.position(engine.close), 2)}', leftPadding, 38)
+    canvas.text(f'MACD {["+", ""][h < 0]}{round(h, 1)}', leftPadding, 50)
+
+
+def switch_coin ():
+
+    '''
+    Switches to the next coin of krakenReference, persists the
+    choice and returns its symbol.
+    '''
+
+    global COIN
+    coins = list(krakenReference)
+    COIN = coins[(coins.index(COIN) + 1) % len(coins)] if COIN in coins else coins[0]
+    config.assign('coin', COIN)
+    config.flush()
+    invalidate()
+    # the next series is a different coin, seed from it
+    engine.end = 0
+    poller.reset()
+    ohlcv.clear()
+    sampler.clear()
+    clear()
+    center(COIN, 10, 10, 24, 0)
+    return krakenReference[COIN]
+
+
+def resolve (coin):
+
+    '''
+    Kraken symbol of coin, a name of krakenReference or a base of the
+    symbol table (e.g. SOL), None if unknown. Never downloads.
+    '''
+
+    if coin in krakenReference:
+        return krakenReference[coin]
+    if coin.upper() in symbolTable:
+        return coin.upper()
+    return None
+
+def refresh_symbols ():
+
+    '''
+    Fetches the symbol table again and keeps it on flash. After a
+    failure the old table stays and the fetch waits symbols.RETRY.
+    '''
+
+    global symbolTable
+    try:
+        with perf.span('symbols'):
+            table = krakenApi.getSymbols(REFERENCE)
+        symbols.save(table)
+        symbolTable = table
+        print(f'symbol table: {len(table)} pairs quoted in {REFERENCE}')
+    except Exception as e:
+        print('symbol table:', e)
+        symbolTable.failed = krakenApi.now()
+
+def plan_poll (failed=False):
+
+    '''
+    Plans the next REST poll from the volatility, the close of the
+    open candle and the feedback of the breakers.
+    '''
+
+    end = krakenApi.lastTime + INTERVAL * 60 if krakenApi.lastTime else 0
+    limited = fetch.guard('time').rate_limited or fetch.guard('ohlc').rate_limited
+    delay = poller.plan(krakenApi.now(), end, fetch.wait_ms('time', 'ohlc'), limited, failed)
+    print(f'next poll in {delay // 1000} s')
+
+def record_candle (start, o, h, l, c, v):
+
+    '''
+    Stores a fetched or streamed candle and folds it into the longer
+    timeframes.
+    '''
+
+    ohlcv.update(start, o, h, l, c, v)
+    sampler.update(start, o, h, l, c, v)
+
+def open_feed (symbol):
+
+    '''
+    Price stream of symbol if streaming is enabled, otherwise None.
+    '''
+
+    if not _config['stream']:
+        return None
+    feed = stream.Feed(_config['stream_url'], f'{symbol}/{REFERENCE}', INTERVAL, EPOCH)
+    # the stream's candles keep the store and timeframes current
+    feed.sink = record_candle
+    return feed
+
+def idle (timeout_ms, feed):
+
+    '''
+    Waits for a button event like inputs.wait() and serves the price
+    stream meanwhile. Returns the event, or STREAMED once the stream
+    changed the series, at most every REDRAW_MS.
+    '''
+
+    if not feed:
+        return inputs.wait(timeout_ms)
+    start = ticks_ms()
+    changed = False
+    while ticks_diff(ticks_ms(), start) < timeout_ms:
+        event = inputs.poll()
+        if event:
+            return event
+        changed = feed.service(4 * inputs.PERIOD_MS) or changed
+        if changed and ticks_diff(ticks_ms(), start) >= REDRAW_MS:
+            return STREAMED
+    return inputs.NONE
+
+
+# ============= Ticker Code ==============
+def tick ():
+
+    '''
+    Live crypto ticker implementation with symbol switching button.
+    '''
+    
+    # extract the symbols for reference
+    symbol = resolve(COIN)
+    if not symbol:
+        print(f'unknown coin {COIN}, using bitcoin')
+        symbol = krakenReference['bitcoin']
+    
+    # optional push updates, REST backfills them
+    feed = open_feed(symbol)
+    
+    # alter display mode at every cycle
+    PAGE = 0
+    
+    # news buffer
+    # news_feed = ''
+    news_window = 11
+    feed_pointer = 0
+    
+    ticks = 0
+    
+    # record heap deltas around every profiling span
+    perf.observer = memtrace
+    
+    # - init render thread -
+    # from here on core 1 owns the display
+    screen.rendering = True
+    _thread.start_new_thread(render, (feed_pointer, news_window))
+    sleep(1)
+
+    closed = []
+    # ticks_ms of the last fresh data
+    fetched = ticks_ms()
+    
+    # set by a press, the next page is drawn from the last history
+    skipped = False
+    # set by the stream, the current page is drawn again
+    redraw = False
+    shown = ticks_ms()
+
+    while True:
+
+        try:
+            
+            polled = False
+            if not skipped:
+                
+                # check every ~5 minutes for news
+                if ticks % 20 == 0:
+                    print(f'request news feed from {github_feed_target}')
+                    print('news feed', news.feed)
+                    # the news are optional, a failure waits for the next turn
+                    try:
+                        with perf.span('news'):
+                            set_news(load_news_feed())
+                    except OSError as e:
+                        print('news:', e)
+                    # timing and allocation summary over serial
+                    perf.report()
+                    memtrace.report()
+
+                # request closed price array once the poll is due,
+                # unless the stream keeps it current
+                if feed and feed.backfilled:
+                    closed = feed.closed
+                    fetched = ticks_ms()
+                elif poller.due():
+                    polled = True
+                    # stale while revalidate: if kraken fails the last
+                    # series stays up with its age, the breakers space
+                    # out the retries
+                    try:
+                        with perf.span('history'):
+                            closed = krakenApi.history(symbol, INTERVAL, EPOCH, REFERENCE, record_candle)
+                        fetched = ticks_ms()
+                        if feed:
+                            feed.backfill(closed, krakenApi.lastTime + INTERVAL * 60)
+                            closed = feed.closed
+                    except (OSError, ValueError) as e:
+                        print('history:', e)
+                        polled = False
+                        plan_poll(failed=True)
+                        # the wifi may have dropped, connect() returns right away
+                        if not wifi.isconnected():
+                            wifi.connect(_config['ssid'], _config['wpa2'])
+                        if not closed:
+                            screen.stale = 0
+                            print_display('kraken offline, retrying ...', startLine=2)
+                            idle(poller.wait_ms(), feed)
+                            continue
+            skipped = False
+            
+            # follow the new closes in constant time
+            with perf.span('indicators'):
+                if engine.update(closed, feed.end if feed else krakenApi.lastTime + INTERVAL * 60):
+                    for message in monitor.check():
+                        raise_alert(message)
+            if polled:
+                plan_poll()
+            
+            # check if the symbol has a significant history first
+            if len(closed) < TREND_INTERVALS + 1:
+                print_display(f'not enough data for {symbol} yet.')
+                return
+            
+            # extract last price
+            price = int(closed[-1]) #digits(closed[-1], 5)
+            print(f'last price ${price}')
+            
+            # ---- page casing ----
+            
+            # pages are drawn once per data update, flipping to a
+            # page drawn before is a blit of its cached frame
+            update_pages(closed, price)
+            with perf.span('page'):
+                compose(DISPLAY_PAGES[PAGE], closed, price)
+            
+            # hand the page to the render thread, which shows it
+            # with the news window on its next frame, aged data
+            # with its age in place of the news label
+            stale = ticks_diff(ticks_ms(), fetched)
+            screen.stale = max(1, stale // 60000) if stale > STALE_MS or fetch.outage('time', 'ohlc') else 0
+            present()
+            if not redraw:
+                shown = ticks_ms()
+            redraw = False
+            
+            # refresh the symbol table once a day while the page is
+            # shown, the download takes from the delay below
+            if symbolTable.due(krakenApi.now()):
+                refresh_symbols()
+            
+            # delay until the next page or poll, a press flips to the
+            # next page right away and a long press switches to the
+            # next coin
+            left = PAGE_MS - 1000 - ticks_diff(ticks_ms(), shown)
+            polling = not (feed and feed.backfilled)
+            event = idle(min(left, poller.wait_ms()) if polling else left, feed)
+            if event == inputs.PRESS:
+                skipped = True
+            elif event == STREAMED:
+                skipped = redraw = True
+            elif event == inputs.LONG_PRESS:
+                symbol = switch_coin()
+                if feed:
+                    feed.close()
+                    feed = open_feed(symbol)
+            elif polling and poller.due() and ticks_diff(ticks_ms(), shown) < PAGE_MS - 1000:
+                # the poll is due before the page is over, the page
+                # is drawn again from the new data
+                redraw = True
+            
+        except Exception as e:
+
+            sys.print_exception(e)
+
+        finally:
+
+            # flip to next page
+            if not redraw:
+                PAGE = (PAGE + 1) % len(DISPLAY_PAGES)
+            
+            # skipped pages are no ticks
+            if not skipped:
+                
+                # increment ticks
+                ticks += 1
+
+                # heap state between ticks, the largest free block is
+                # probed only every 10th tick as probing takes a while
+                memtrace.sample('tick', largest=ticks % 10 == 0)
+
+                # feed the watchdog with latest timeseries, unless
+                # kraken is out, the breakers wait for it to recover
+                if not fetch.outage('time', 'ohlc'):
+                    watchdog.track(closed)
+                
+                sleep(1)
+
+
+# ============= Main Sequence ==============
+def main ():
+    try:
+        # heap trace left behind by the last watchdog reset
+        memtrace.restore()
+        
+        # delay to get into bootsel button working
+        sleep(1)
+        
+        # show logo
+        trademark(3)
+        
+        # ---- credentials & config ----
+        # check if wifi credentials were not set
+        # the portal is only imported when needed, it's only used for setup
+        if not _config['ssid'] or not _config['wpa2']:
+            welcome()
+            from portal import spawn
+            spawn()
+            return
+        elif bootsel_is_pressed():
+            text('started         captive        portal:         bitboi captive', startLine=0)
+            from portal import spawn
+            spawn()
+            return
+        
+        # ---- start Wi-Fi connection ---- 
+        # wifi has highest priority
+        attempts = 3
+        wifi.active(True)
+        # disable powersave mode to make the wifi more responsive
+        wifi.config(pm = 0xa11140)
+        center('connecting...', 10, 10, 24, 0.05)
+        for _ in range(attempts):
+            try:
+                wifi.connect(_config['ssid'], _config['wpa2'])
+                sleep(1)
+                # construct a little test request
+                # this should defnitely throw exceptions
+                set_news(load_news_feed())
+                break
+            except fetch.ServerError as e:
+                # the server replied, so the connection works
+                print('news:', e)
+                break
+            except OSError as e:
+                if str(e) == 'no matching wifi network found':
+                    print_display('No network!')
+                else:
+                    print_display('Connection Error > Reset')
+                    sleep(1)
+                    reset()
+                sys.print_exception(e)
+                return -1
+            except Exception as e:
+                print_display('Unknown error while connecting!')
+                sys.print_exception(e)
+                return -2
+        
+        # ---- button events ----
+        inputs.start(bootsel_is_pressed)
+        
+        # ---- update pipeline ----
+        update()
+        
+        # ---- start ticker ----
+        center('ticker', 10, 45, 24, 0.1)
+        tick()
+    except Exception as e:
+        sys.print_exception(e)
+        memtrace.snapshot()
+    finally:
+        sys.exit()
+
+
+if __name__ == '__main__':
+    main()
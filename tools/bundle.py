@@ -0,0 +1,73 @@
+#####################################################################################
+#####################################################################################
+# Release Bundle © 2024
+# Copyright © 2024 github.com/B0-B
+
+# Precompiles the device modules with mpy-cross and writes the file
+# manifest which update() reads on the device.
+# Usage: python tools/bundle.py [--mpy-cross PATH]
+#####################################################################################
+#####################################################################################
+
+import argparse, os, re, subprocess, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules shipped as .mpy with the .py source as fallback, the ticker
+# carries __version__ and is installed last, main.py repeats it for the
+# updaters of v7.1 and before
+MODULES = ['alerts', 'candles', 'config', 'fetch', 'indicators', 'inputs', 'memtrace', 'perf', 'portal', 'resample', 'ring', 'schedule', 'stream', 'symbols', 'ticker']
+# files shipped as they are
+ASSETS = ['index.html', 'logo.bin', 'main.py']
+
+def version (name='ticker.py'):
+
+    '''
+    Reads __version__ from ticker.py, or the named file.
+    '''
+
+    with open(os.path.join(ROOT, name)) as f:
+        return re.search(r"__version__ = '([^']+)'", f.read()).group(1)
+
+def forms (name):
+
+    '''
+    Manifest entry of a module, the .mpy only if it was built.
+    '''
+
+    if os.path.exists(os.path.join(ROOT, name + '.mpy')):
+        return f'{name}.mpy {name}.py'
+    return f'{name}.py'
+
+def compile_module (mpy_cross, name):
+
+    '''
+    Compiles <name>.py to <name>.mpy next to it.
+    '''
+
+    source = os.path.join(ROOT, name + '.py')
+    subprocess.run([mpy_cross, '-o', os.path.join(ROOT, name + '.mpy'), source], check=True)
+
+def manifest ():
+    lines = [f'version {version()}']
+    lines += sorted(ASSETS + [forms(name) for name in MODULES if name != 'ticker'])
+    lines.append(forms('ticker'))
+    return '\n'.join(lines) + '\n'
+
+def main ():
+    parser = argparse.ArgumentParser(description='build the .mpy bundle and file manifest')
+    parser.add_argument('--mpy-cross', default='mpy-cross', help='mpy-cross matching the device firmware')
+    args = parser.parse_args()
+    if version('main.py') != version():
+        sys.exit(f'main.py announces {version("main.py")}, ticker.py {version()}')
+    try:
+        for name in MODULES:
+            compile_module(args.mpy_cross, name)
+    except FileNotFoundError:
+        sys.exit(f'{args.mpy_cross} not found, install it with "pip install mpy-cross"')
+    with open(os.path.join(ROOT, 'files'), 'w') as f:
+        f.write(manifest())
+    print(manifest())
+
+if __name__ == '__main__':
+    main()